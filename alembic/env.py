@@ -10,6 +10,10 @@ from config import settings
 from database import Base # Импортируем нашу базовую модель
 from models.user import User
 from models.announcement import Announcement
+from models.price import Price
+from models.region import Region
+from models.job import Job
+from models.announcement_archive import AnnouncementArchive
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -0,0 +1,80 @@
+"""Seed the canonical list of regions
+
+Revision ID: 03b3fefdf698
+Revises: 7638ff806eea
+Create Date: 2026-10-17 18:36:52.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '03b3fefdf698'
+down_revision: Union[str, Sequence[str], None] = '7638ff806eea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Субъекты РФ. Без них на чистой базе справочник пуст и выбрать регион нельзя.
+# Список зафиксирован в миграции намеренно: новые регионы добавляет
+# python -m commands.regions add, а не правка этого файла.
+CANONICAL_REGIONS = [
+    "Республика Адыгея", "Республика Алтай", "Республика Башкортостан", "Республика Бурятия",
+    "Республика Дагестан", "Республика Ингушетия", "Кабардино-Балкарская Республика",
+    "Республика Калмыкия", "Карачаево-Черкесская Республика", "Республика Карелия",
+    "Республика Коми", "Республика Марий Эл", "Республика Мордовия", "Республика Саха (Якутия)",
+    "Республика Северная Осетия — Алания", "Республика Татарстан", "Республика Тыва",
+    "Удмуртская Республика", "Республика Хакасия", "Чеченская Республика", "Чувашская Республика",
+    "Алтайский край", "Забайкальский край", "Камчатский край", "Краснодарский край",
+    "Красноярский край", "Пермский край", "Приморский край", "Ставропольский край",
+    "Хабаровский край",
+    "Амурская область", "Архангельская область", "Астраханская область", "Белгородская область",
+    "Брянская область", "Владимирская область", "Волгоградская область", "Вологодская область",
+    "Воронежская область", "Ивановская область", "Иркутская область", "Калининградская область",
+    "Калужская область", "Кемеровская область", "Кировская область", "Костромская область",
+    "Курганская область", "Курская область", "Ленинградская область", "Липецкая область",
+    "Магаданская область", "Московская область", "Мурманская область", "Нижегородская область",
+    "Новгородская область", "Новосибирская область", "Омская область", "Оренбургская область",
+    "Орловская область", "Пензенская область", "Псковская область", "Ростовская область",
+    "Рязанская область", "Самарская область", "Саратовская область", "Сахалинская область",
+    "Свердловская область", "Смоленская область", "Тамбовская область", "Тверская область",
+    "Томская область", "Тульская область", "Тюменская область", "Ульяновская область",
+    "Челябинская область", "Ярославская область",
+    "Москва", "Санкт-Петербург",
+    "Еврейская автономная область",
+    "Ненецкий автономный округ", "Ханты-Мансийский автономный округ — Югра",
+    "Чукотский автономный округ", "Ямало-Ненецкий автономный округ",
+]
+
+
+def _normalize(name: str) -> str:
+    """Копия regions.normalize на момент миграции: пробелы схлопнуты, регистр сброшен."""
+    return " ".join(name.split()).casefold()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    # Регион, уже заведенный в другом написании ("ростовская  область"), не дублируется:
+    # сравнение идет так же, как в приложении (regions.normalize)
+    known = {_normalize(name) for name in conn.execute(sa.text("SELECT name FROM regions")).scalars()}
+    missing = [name for name in CANONICAL_REGIONS if _normalize(name) not in known]
+    if missing:
+        conn.execute(
+            sa.text("INSERT INTO regions (name) VALUES (:name) ON CONFLICT (name) DO NOTHING"),
+            [{"name": name} for name in missing],
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Удаляются только регионы из списка, на которые никто не ссылается
+    op.execute(sa.text("""
+        DELETE FROM regions AS r
+        WHERE r.name = ANY(:names)
+          AND NOT EXISTS (SELECT 1 FROM users WHERE region_id = r.id)
+          AND NOT EXISTS (SELECT 1 FROM announcements WHERE region_id = r.id)
+          AND NOT EXISTS (SELECT 1 FROM announcements_archive WHERE region_id = r.id)
+    """).bindparams(sa.bindparam("names", CANONICAL_REGIONS, type_=sa.ARRAY(sa.String))))
@@ -0,0 +1,64 @@
+"""Create prices table and price_trends view
+
+Revision ID: 17fa2b818214
+Revises: d007fc8d34f7
+Create Date: 2026-10-17 12:20:05.114372
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '17fa2b818214'
+down_revision: Union[str, Sequence[str], None] = 'd007fc8d34f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('prices',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('crop', sa.String(), nullable=False),
+    sa.Column('region', sa.String(), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('observed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_prices_region_crop_observed_at',
+        'prices',
+        ['region', 'crop', sa.text('observed_at DESC')],
+        unique=False,
+    )
+    # Последняя цена и тренд по каждой паре (регион, культура).
+    # Тренд сравнивает последнее наблюдение с предыдущим.
+    op.execute("""
+        CREATE MATERIALIZED VIEW price_trends AS
+        SELECT region, crop, price, previous_price, observed_at,
+               CASE
+                   WHEN previous_price IS NULL OR price = previous_price THEN 'flat'
+                   WHEN price > previous_price THEN 'up'
+                   ELSE 'down'
+               END AS trend
+        FROM (
+            SELECT region, crop, price, observed_at,
+                   lead(price) OVER w AS previous_price,
+                   row_number() OVER w AS rn
+            FROM prices
+            WINDOW w AS (PARTITION BY region, crop ORDER BY observed_at DESC, id DESC)
+        ) AS ranked
+        WHERE rn = 1
+    """)
+    # Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+    op.execute("CREATE UNIQUE INDEX ux_price_trends_region_crop ON price_trends (region, crop)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP MATERIALIZED VIEW price_trends")
+    op.drop_index('ix_prices_region_crop_observed_at', table_name='prices')
+    op.drop_table('prices')
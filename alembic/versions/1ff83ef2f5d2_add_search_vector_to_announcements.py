@@ -0,0 +1,46 @@
+"""Add full-text search vector to announcements
+
+Revision ID: 1ff83ef2f5d2
+Revises: 17fa2b818214
+Create Date: 2026-10-17 13:41:52.630918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1ff83ef2f5d2'
+down_revision: Union[str, Sequence[str], None] = '17fa2b818214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('announcements', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed(
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        nullable=True,
+    ))
+    op.create_index(
+        'ix_announcements_search_vector',
+        'announcements',
+        ['search_vector'],
+        unique=False,
+        postgresql_using='gin',
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_announcements_search_vector', table_name='announcements', postgresql_using='gin')
+    op.drop_column('announcements', 'search_vector')
@@ -0,0 +1,34 @@
+"""Add coordinates and geohash to announcements
+
+Revision ID: 43e3c33a56c4
+Revises: 1ff83ef2f5d2
+Create Date: 2026-10-17 15:02:18.417265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '43e3c33a56c4'
+down_revision: Union[str, Sequence[str], None] = '1ff83ef2f5d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('announcements', sa.Column('latitude', sa.Float(), nullable=True))
+    op.add_column('announcements', sa.Column('longitude', sa.Float(), nullable=True))
+    op.add_column('announcements', sa.Column('geohash', sa.String(length=12, collation='C'), nullable=True))
+    op.create_index('ix_announcements_geohash', 'announcements', ['geohash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_announcements_geohash', table_name='announcements')
+    op.drop_column('announcements', 'geohash')
+    op.drop_column('announcements', 'longitude')
+    op.drop_column('announcements', 'latitude')
@@ -0,0 +1,84 @@
+"""Add announcement status and expiry, partial indexes and archive table
+
+Revision ID: 7638ff806eea
+Revises: 7e2a06c92feb
+Create Date: 2026-10-17 17:42:11.518307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7638ff806eea'
+down_revision: Union[str, Sequence[str], None] = '7e2a06c92feb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ACTIVE_ONLY = sa.text("status = 'active'")
+
+# (имя, колонки, доп. параметры) индексов, которые становятся частичными
+_FEED_INDEXES = [
+    ('ix_announcements_region_id_created_at_id', ['region_id', sa.text('created_at DESC'), sa.text('id DESC')], {}),
+    ('ix_announcements_created_at_id', [sa.text('created_at DESC'), sa.text('id DESC')], {}),
+    ('ix_announcements_owner_id_created_at_id', ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')], {}),
+    ('ix_announcements_search_vector', ['search_vector'], {'postgresql_using': 'gin'}),
+    ('ix_announcements_geohash', ['geohash'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('announcements', sa.Column('status', sa.String(), server_default='active', nullable=False))
+    op.add_column('announcements', sa.Column('expires_at', sa.DateTime(), nullable=True))
+    # Старым объявлениям - 30 дней от публикации, но не меньше недели с момента
+    # миграции, чтобы они не исчезли из ленты все разом
+    op.execute("""
+        UPDATE announcements
+        SET expires_at = greatest(created_at + interval '30 days', now() + interval '7 days')
+    """)
+    op.alter_column('announcements', 'expires_at', nullable=False)
+
+    for name, columns, kwargs in _FEED_INDEXES:
+        op.drop_index(name, table_name='announcements')
+        op.create_index(name, 'announcements', columns, unique=False, postgresql_where=_ACTIVE_ONLY, **kwargs)
+    op.create_index('ix_announcements_active_expires_at', 'announcements', ['expires_at'], unique=False, postgresql_where=_ACTIVE_ONLY)
+    op.create_index('ix_announcements_inactive_id', 'announcements', ['id'], unique=False, postgresql_where=sa.text("status <> 'active'"))
+    op.create_index('ix_announcements_image_url', 'announcements', ['image_url'], unique=False, postgresql_where=sa.text('image_url IS NOT NULL'))
+
+    op.create_table(
+        'announcements_archive',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('price', sa.Float(), nullable=True),
+        sa.Column('region_id', sa.SmallInteger(), nullable=True),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('latitude', sa.Float(), nullable=True),
+        sa.Column('longitude', sa.Float(), nullable=True),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('announcements_archive')
+
+    op.drop_index('ix_announcements_image_url', table_name='announcements')
+    op.drop_index('ix_announcements_inactive_id', table_name='announcements')
+    op.drop_index('ix_announcements_active_expires_at', table_name='announcements')
+    for name, columns, kwargs in _FEED_INDEXES:
+        op.drop_index(name, table_name='announcements')
+        op.create_index(name, 'announcements', columns, unique=False, **kwargs)
+
+    # Удаленные и истекшие объявления без статуса снова попали бы в ленту
+    op.execute("DELETE FROM announcements WHERE status <> 'active'")
+    op.drop_column('announcements', 'expires_at')
+    op.drop_column('announcements', 'status')
@@ -0,0 +1,35 @@
+"""Widen announcements.owner_id to BIGINT to match users.id
+
+Revision ID: 78080d0aa211
+Revises: 03b3fefdf698
+Create Date: 2026-10-17 18:52:27.640318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '78080d0aa211'
+down_revision: Union[str, Sequence[str], None] = '03b3fefdf698'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ID пользователей Telegram уже не помещаются в INTEGER, а users.id - BIGINT.
+# Смена типа переписывает таблицы и их индексы (ACCESS EXCLUSIVE на время миграции).
+_TABLES = ('announcements', 'announcements_archive')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in _TABLES:
+        op.alter_column(table, 'owner_id', existing_type=sa.Integer(), type_=sa.BigInteger(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Не пройдет, если в таблицах уже есть владельцы с id больше 2^31 - 1
+    for table in _TABLES:
+        op.alter_column(table, 'owner_id', existing_type=sa.BigInteger(), type_=sa.Integer(), existing_nullable=False)
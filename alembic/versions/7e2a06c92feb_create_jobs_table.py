@@ -0,0 +1,48 @@
+"""Create jobs table for the background job queue
+
+Revision ID: 7e2a06c92feb
+Revises: 8740125c4e01
+Create Date: 2026-10-17 16:58:44.236190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2a06c92feb'
+down_revision: Union[str, Sequence[str], None] = '8740125c4e01'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'jobs',
+        sa.Column('id', sa.BigInteger(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), server_default=sa.text("'{}'::jsonb"), nullable=False),
+        sa.Column('status', sa.String(), server_default='pending', nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('max_attempts', sa.Integer(), server_default='5', nullable=False),
+        sa.Column('run_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_jobs_pending_run_at', 'jobs', ['run_at'], unique=False,
+                    postgresql_where=sa.text("status = 'pending'"))
+    op.create_index('ix_jobs_running_locked_at', 'jobs', ['locked_at'], unique=False,
+                    postgresql_where=sa.text("status = 'running'"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_jobs_running_locked_at', table_name='jobs', postgresql_where=sa.text("status = 'running'"))
+    op.drop_index('ix_jobs_pending_run_at', table_name='jobs', postgresql_where=sa.text("status = 'pending'"))
+    op.drop_table('jobs')
@@ -0,0 +1,40 @@
+"""Add feed keyset indexes to announcements
+
+Revision ID: 84d34086715b
+Revises: 03db12991ee1
+Create Date: 2026-10-17 10:12:41.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '84d34086715b'
+down_revision: Union[str, Sequence[str], None] = '03db12991ee1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_announcements_region_created_at_id',
+        'announcements',
+        ['region', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.create_index(
+        'ix_announcements_created_at_id',
+        'announcements',
+        [sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_announcements_created_at_id', table_name='announcements')
+    op.drop_index('ix_announcements_region_created_at_id', table_name='announcements')
@@ -0,0 +1,51 @@
+"""Add announcement counters to regions and users
+
+Revision ID: 8740125c4e01
+Revises: a9753fd8b405
+Create Date: 2026-10-17 16:20:37.105842
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8740125c4e01'
+down_revision: Union[str, Sequence[str], None] = 'a9753fd8b405'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('regions', sa.Column('announcement_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('announcement_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Начальные значения счетчиков - один проход по announcements на каждую таблицу
+    op.execute("""
+        UPDATE regions AS r SET announcement_count = c.total
+        FROM (SELECT region_id, count(*) AS total FROM announcements GROUP BY region_id) AS c
+        WHERE c.region_id = r.id
+    """)
+    op.execute("""
+        UPDATE users AS u SET announcement_count = c.total
+        FROM (SELECT owner_id, count(*) AS total FROM announcements GROUP BY owner_id) AS c
+        WHERE c.owner_id = u.id
+    """)
+
+    # Постраничный список объявлений автора
+    op.create_index(
+        'ix_announcements_owner_id_created_at_id',
+        'announcements',
+        ['owner_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_announcements_owner_id_created_at_id', table_name='announcements')
+    op.drop_column('users', 'announcement_count')
+    op.drop_column('regions', 'announcement_count')
@@ -0,0 +1,128 @@
+"""Move user and announcement regions to a regions table
+
+Revision ID: a9753fd8b405
+Revises: 43e3c33a56c4
+Create Date: 2026-10-17 15:48:09.772014
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9753fd8b405'
+down_revision: Union[str, Sequence[str], None] = '43e3c33a56c4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _normalize(name: str) -> str:
+    """Ключ сравнения названий: пробелы схлопнуты, регистр сброшен.
+
+    Копия regions.normalize на момент миграции: миграция не должна меняться
+    вместе с кодом приложения.
+    """
+    return " ".join(name.split()).casefold()
+
+
+def _merge_spellings(conn):
+    """Варианты написания регионов: ({написание: название в справочнике}, [названия]).
+
+    Группировка идет в Python через _normalize - так же, как приложение
+    сравнивает названия (regions.normalize). SQL lower() и регулярные выражения Postgres
+    понимают регистр и пробелы иначе, чем casefold() и str.split().
+    """
+    counts = conn.execute(sa.text("""
+        SELECT region, count(*) FROM (
+            SELECT region FROM users WHERE region IS NOT NULL
+            UNION ALL
+            SELECT region FROM announcements WHERE region IS NOT NULL
+        ) AS names
+        GROUP BY region
+    """)).all()
+    groups = {}
+    for spelling, count in counts:
+        key = _normalize(spelling)
+        if key:
+            clean = " ".join(spelling.split())
+            groups.setdefault(key, {}).setdefault(clean, 0)
+            groups[key][clean] += count
+    # В справочник попадает самое частое написание (при равенстве - первое по алфавиту)
+    names = {key: min(variants, key=lambda name: (-variants[name], name)) for key, variants in groups.items()}
+    mapping = {spelling: names[_normalize(spelling)] for spelling, _ in counts if _normalize(spelling)}
+    return mapping, sorted(names.values())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'regions',
+        sa.Column('id', sa.SmallInteger(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name'),
+    )
+
+    # Варианты написания одного региона ("Ростовская обл", "ростовская обл ")
+    # сливаются в одну запись с самым частым написанием
+    conn = op.get_bind()
+    mapping, names = _merge_spellings(conn)
+    if names:
+        conn.execute(sa.text("INSERT INTO regions (name) VALUES (:name)"), [{"name": name} for name in names])
+
+    op.add_column('users', sa.Column('region_id', sa.SmallInteger(), nullable=True))
+    op.add_column('announcements', sa.Column('region_id', sa.SmallInteger(), nullable=True))
+    op.execute("CREATE TEMPORARY TABLE region_spellings (spelling varchar PRIMARY KEY, name varchar NOT NULL)")
+    if mapping:
+        conn.execute(
+            sa.text("INSERT INTO region_spellings (spelling, name) VALUES (:spelling, :name)"),
+            [{"spelling": spelling, "name": name} for spelling, name in mapping.items()],
+        )
+    for table in ('users', 'announcements'):
+        op.execute(f"""
+            UPDATE {table} AS t SET region_id = r.id
+            FROM region_spellings AS s
+            JOIN regions AS r ON r.name = s.name
+            WHERE t.region = s.spelling
+        """)
+    op.execute("DROP TABLE region_spellings")
+    op.create_foreign_key('fk_users_region_id_regions', 'users', 'regions', ['region_id'], ['id'])
+    op.create_foreign_key('fk_announcements_region_id_regions', 'announcements', 'regions', ['region_id'], ['id'])
+
+    op.drop_index('ix_announcements_region_created_at_id', table_name='announcements')
+    op.drop_index(op.f('ix_announcements_region'), table_name='announcements')
+    op.create_index(
+        'ix_announcements_region_id_created_at_id',
+        'announcements',
+        ['region_id', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.drop_column('announcements', 'region')
+    op.drop_column('users', 'region')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column('users', sa.Column('region', sa.String(), nullable=True))
+    op.add_column('announcements', sa.Column('region', sa.String(), nullable=True))
+    for table in ('users', 'announcements'):
+        op.execute(f"""
+            UPDATE {table} AS t SET region = r.name
+            FROM regions AS r
+            WHERE r.id = t.region_id
+        """)
+    op.drop_index('ix_announcements_region_id_created_at_id', table_name='announcements')
+    op.create_index(op.f('ix_announcements_region'), 'announcements', ['region'], unique=False)
+    op.create_index(
+        'ix_announcements_region_created_at_id',
+        'announcements',
+        ['region', sa.text('created_at DESC'), sa.text('id DESC')],
+        unique=False,
+    )
+    op.drop_constraint('fk_announcements_region_id_regions', 'announcements', type_='foreignkey')
+    op.drop_constraint('fk_users_region_id_regions', 'users', type_='foreignkey')
+    op.drop_column('announcements', 'region_id')
+    op.drop_column('users', 'region_id')
+    op.drop_table('regions')
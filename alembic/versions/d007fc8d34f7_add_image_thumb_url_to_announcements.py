@@ -0,0 +1,28 @@
+"""Add image_thumb_url to announcements
+
+Revision ID: d007fc8d34f7
+Revises: 84d34086715b
+Create Date: 2026-10-17 11:03:27.881954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd007fc8d34f7'
+down_revision: Union[str, Sequence[str], None] = '84d34086715b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('announcements', sa.Column('image_thumb_url', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('announcements', 'image_thumb_url')
@@ -0,0 +1,232 @@
+# api_async.py
+# Асинхронные версии эндпоинтов из main.py, работающие через AsyncEngine.
+# Подключаются вместо синхронных, когда включен settings.DB_ASYNC (см. main.py).
+
+from fastapi import Depends, HTTPException, APIRouter, File, UploadFile, Form, Body, Query, Request, Response, BackgroundTasks
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from config import settings
+from database import get_async_db, get_async_read_db, get_async_feed_read_db, async_read_sessionmaker
+from crud import async_user as user_crud
+from crud import async_announcement as announcement_crud
+from crud.announcement import get_next_cursor
+from schemas import user as user_schema
+from schemas import announcement as announcement_schema
+from regions import region_lookup
+from pagination import NEXT_CURSOR_HEADER, MAX_BATCH_IDS, parse_id_list
+from cache import feed_cache, announcement_response, feed_response
+from singleflight import AsyncSingleFlight
+from uploads import save_upload
+import geo
+import serialization
+
+async_api_router = APIRouter(prefix="/api")
+
+
+# --- Эндпоинты для работы с пользователями ---
+@async_api_router.post("/users/get_or_create", response_model=user_schema.UserDisplay, tags=["Users"])
+async def get_or_create_user_endpoint(user_data: user_schema.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        return await user_crud.get_or_create_user(db=db, user=user_data)
+    except ValueError:
+        raise HTTPException(status_code=409, detail="Username is already taken by another user")
+
+@async_api_router.get("/users/{user_id}", response_model=user_schema.UserDisplay, tags=["Users"])
+async def get_user_endpoint(user_id: int, db: AsyncSession = Depends(get_async_read_db)):
+    db_user = await user_crud.get_user(db, user_id=user_id)
+    if db_user is None: raise HTTPException(status_code=404, detail="User not found")
+    return db_user
+
+@async_api_router.put("/users/{user_id}/region", response_model=user_schema.UserDisplay, tags=["Users"])
+async def update_user_region_endpoint(user_id: int, region_data: user_schema.UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    try:
+        updated_user = await user_crud.update_user_region(db=db, user_id=user_id, region=region_data.region)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Unknown region, see /api/regions")
+    if updated_user is None: raise HTTPException(status_code=404, detail="User not found")
+    return updated_user
+
+@async_api_router.get("/users/{user_id}/announcements", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Users"])
+async def read_user_announcements(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    try:
+        announcements = await announcement_crud.get_announcements_by_owner_id(db=db, owner_id=user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    next_cursor = get_next_cursor(announcements, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return serialization.announcements_response(announcements, headers=headers)
+
+
+# --- Эндпоинты для работы с объявлениями ---
+@async_api_router.post("/announcements/", response_model=announcement_schema.AnnouncementDisplay, tags=["Announcements"])
+async def create_new_announcement(
+    background_tasks: BackgroundTasks,
+    title: str = Form(...),
+    description: Optional[str] = Form(None),
+    price: Optional[float] = Form(None),
+    current_user_id: int = Form(...),
+    latitude: Optional[float] = Form(None, ge=-90, le=90),
+    longitude: Optional[float] = Form(None, ge=-180, le=180),
+    db: AsyncSession = Depends(get_async_db),
+    image: Optional[UploadFile] = File(None)
+):
+    db_user = await user_crud.get_user(db, user_id=current_user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="Author (user) not found")
+
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(status_code=422, detail="latitude and longitude must be given together")
+    announcement_data = announcement_schema.AnnouncementCreate(
+        title=title, description=description, price=price, latitude=latitude, longitude=longitude
+    )
+
+    image_url_to_save = None
+    if image:
+        image_url_to_save = await save_upload(image)
+
+    # Миниатюра и очищенный от EXIF вариант готовятся уже после ответа:
+    # воркером очереди (worker.sh; задача ставится в транзакции объявления)
+    # или, без очереди, в этом же процессе
+    queue_image = bool(image_url_to_save) and settings.JOBS_ENABLED
+    db_announcement = await announcement_crud.create_announcement(
+        db=db,
+        announcement=announcement_data,
+        owner=db_user,
+        image_url=image_url_to_save,
+        enqueue_image=queue_image,
+    )
+
+    if image_url_to_save and not queue_image:
+        import images
+        background_tasks.add_task(images.process_announcement_image, db_announcement.id, image_url_to_save)
+    return db_announcement
+
+@async_api_router.post("/announcements/bulk", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Announcements"])
+async def create_announcements_bulk(
+    current_user_id: int,
+    announcements: List[announcement_schema.AnnouncementCreate] = Body(
+        ..., min_length=1, max_length=announcement_schema.MAX_BULK_ANNOUNCEMENTS
+    ),
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_user = await user_crud.get_user(db, user_id=current_user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="Author (user) not found")
+    return await announcement_crud.create_announcements_bulk(db, announcements=announcements, owner=db_user)
+
+@async_api_router.get("/announcements", response_model=List[announcement_schema.AnnouncementDisplay], include_in_schema=False)
+@async_api_router.get("/announcements/", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Announcements"])
+async def read_announcements(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    region: Optional[str] = None,
+    cursor: Optional[str] = None,
+    ids: Optional[str] = Query(None, description="ID через запятую (1,2,3): вернуть только эти объявления"),
+    db: AsyncSession = Depends(get_async_feed_read_db)
+):
+    if ids is not None:
+        # Обновление сохраненного списка одним запросом вместо N запросов к /announcements/{id}
+        try:
+            id_list = parse_id_list(ids)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"ids must be 1 to {MAX_BATCH_IDS} comma-separated integers")
+        announcements = await announcement_crud.get_announcements_by_ids(db, ids=id_list)
+        return feed_response(request, announcements, None)
+
+    if region:
+        # Одна запись кэша на регион, как бы клиент ни написал его название
+        region = region_lookup.canonical(region)
+
+    # Почти все пользователи региона запрашивают одну и ту же первую страницу -
+    # отдаем ее из кэша уже сериализованной
+    cache_key = feed_cache.key(region, cursor, skip, limit)
+    page = feed_cache.get(cache_key)
+    if page is not None:
+        return page.to_response(request)
+    try:
+        announcements = await announcement_crud.get_announcements(db, skip=skip, limit=limit, region=region, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return feed_response(request, announcements, get_next_cursor(announcements, limit), cache_key)
+
+@async_api_router.get("/announcements/nearby", response_model=List[announcement_schema.AnnouncementNearby], tags=["Announcements"])
+async def nearby_announcements(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=geo.MAX_RADIUS_KM),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    return await announcement_crud.get_nearby_announcements(db, lat=lat, lon=lon, radius_km=radius_km, limit=limit)
+
+@async_api_router.get("/announcements/search", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Announcements"])
+async def search_announcements(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=200),
+    region: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Поиск по заголовку и описанию ("пшеница", "трактор мтз"), сначала самые релевантные.
+
+    Следующая страница запрашивается так же, как в ленте: по курсору из X-Next-Cursor.
+    """
+    try:
+        announcements, next_cursor = await announcement_crud.search_announcements(db, q=q, limit=limit, region=region, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return announcements
+
+announcement_details_flight = AsyncSingleFlight("announcement_details")
+
+@async_api_router.get("/announcements/{announcement_id:int}", response_model=announcement_schema.AnnouncementDisplay, tags=["Announcements"])
+async def read_announcement_details(announcement_id: int, request: Request):
+    # Загрузка идет в отдельной задаче со своей сессией: склеенные запросы
+    # получат результат, даже если клиент, начавший ее, отключится
+    factory = async_read_sessionmaker(request)
+
+    async def load():
+        async with factory() as db:
+            return await announcement_crud.get_announcement_by_id(db, announcement_id=announcement_id)
+
+    db_announcement = await announcement_details_flight.do((announcement_id, factory), load)
+    if db_announcement is None:
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    # Автор загружен тем же запросом: после закрытия сессии ленивых подгрузок не будет
+    return announcement_response(request, db_announcement)
+
+
+@async_api_router.patch("/announcements/{announcement_id:int}", response_model=announcement_schema.AnnouncementDisplay, tags=["Announcements"])
+async def update_announcement_endpoint(
+    announcement_id: int,
+    current_user_id: int,
+    changes: announcement_schema.AnnouncementUpdate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    db_announcement = await announcement_crud.get_announcement_by_id(db, announcement_id=announcement_id)
+    if db_announcement is None:
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    if db_announcement.owner_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Only the author can change the announcement")
+    return await announcement_crud.update_announcement(db, db_announcement, changes.model_dump(exclude_unset=True))
+
+@async_api_router.delete("/announcements/{announcement_id:int}", status_code=204, tags=["Announcements"])
+async def delete_announcement_endpoint(announcement_id: int, current_user_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_announcement = await announcement_crud.get_announcement_by_id(db, announcement_id=announcement_id)
+    if db_announcement is None:
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    if db_announcement.owner_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Only the author can delete the announcement")
+    if not await announcement_crud.delete_announcement(db, announcement_id=announcement_id):
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    return Response(status_code=204)
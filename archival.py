@@ -0,0 +1,118 @@
+# archival.py
+# Снятие с показа истекших объявлений и перенос неактивных в архив.
+#
+# Объявление живет ANNOUNCEMENT_TTL_DAYS дней (expires_at) или пока автор его
+# не удалит (DELETE - мягкое удаление, status = 'deleted'). Лента и поиск
+# читают только живые строки через частичные индексы WHERE status = 'active',
+# а эта задача раз в ARCHIVE_INTERVAL_SECONDS:
+#   1. помечает истекшие объявления статусом expired и уменьшает счетчики;
+#   2. переносит неактивные строки в announcements_archive и удаляет с диска
+#      их картинки, если они не нужны другим объявлениям.
+# Работа идет пачками по ARCHIVE_BATCH_SIZE строк, каждая - отдельная короткая
+# транзакция с SKIP LOCKED, поэтому блокировки не задерживают запросы API,
+# а несколько процессов могут выполнять задачу одновременно.
+#
+# Задачу выполняет воркер очереди (jobs.run_worker), а без очереди
+# (JOBS_ENABLED = False) - сам процесс API (start_in_background). В синхронном
+# режиме API (DB_ASYNC = False) пачки идут через синхронные сессии в пуле
+# потоков, чтобы ради архивирования не создавался асинхронный движок.
+
+import asyncio
+import logging
+from typing import Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+import metrics
+from config import settings
+from database import AsyncSessionLocal, SessionLocal
+from crud import announcement as announcement_crud
+from crud import async_announcement as async_announcement_crud
+from uploads import remove_files
+
+logger = logging.getLogger(__name__)
+
+announcements_expired = metrics.registry.register(metrics.Counter(
+    "announcements_expired_total", "Announcements taken down after expires_at"))
+announcements_archived = metrics.registry.register(metrics.Counter(
+    "announcements_archived_total", "Inactive announcements moved to announcements_archive"))
+archive_images_removed = metrics.registry.register(metrics.Counter(
+    "archive_images_removed_total", "Image files of archived announcements removed from uploads/"))
+
+
+def _in_session(func, *args):
+    with SessionLocal() as db:
+        return func(db, *args)
+
+
+async def _batch(name: str, batch_size: int, sync: bool):
+    """Одна пачка crud-функции name в своей сессии: синхронной (в пуле потоков) или асинхронной."""
+    if sync:
+        return await run_in_threadpool(_in_session, getattr(announcement_crud, name), batch_size)
+    async with AsyncSessionLocal() as db:
+        return await getattr(async_announcement_crud, name)(db, batch_size)
+
+
+async def run_archival(batch_size: Optional[int] = None, sync: bool = False) -> Tuple[int, int]:
+    """Один полный проход: пачки идут, пока очередная не окажется неполной.
+
+    С sync=True работает через синхронный движок. Возвращает (снято с показа, перенесено в архив).
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    expired = archived = 0
+
+    while True:
+        count = await _batch("expire_announcements", batch_size, sync)
+        expired += count
+        announcements_expired.inc(amount=count)
+        if count < batch_size:
+            break
+
+    while True:
+        count, image_urls = await _batch("archive_announcements", batch_size, sync)
+        archived += count
+        announcements_archived.inc(amount=count)
+        if image_urls:
+            # Файлы удаляются после commit: упавший перенос не оставит объявление без картинки
+            archive_images_removed.inc(amount=await run_in_threadpool(remove_files, image_urls))
+        if count < batch_size:
+            break
+
+    if expired or archived:
+        logger.info("Archival: %s announcement(s) expired, %s archived", expired, archived)
+    return expired, archived
+
+
+async def archive_periodically(stop: asyncio.Event, sync: bool = False) -> None:
+    """Запускает run_archival раз в ARCHIVE_INTERVAL_SECONDS, пока не выставлен stop."""
+    while not stop.is_set():
+        try:
+            await run_archival(sync=sync)
+        except Exception:
+            logger.exception("Announcement archival failed")
+        try:
+            await asyncio.wait_for(stop.wait(), settings.ARCHIVE_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+_stop: Optional[asyncio.Event] = None
+_task: Optional[asyncio.Task] = None
+
+
+async def start_in_background() -> None:
+    """Запускает архивирование в процессе API, если его не выполняет воркер очереди."""
+    global _stop, _task
+    if settings.JOBS_ENABLED or _task is not None:
+        return
+    _stop = asyncio.Event()
+    _task = asyncio.create_task(archive_periodically(_stop, sync=not settings.DB_ASYNC))
+
+
+async def stop_background() -> None:
+    global _stop, _task
+    if _task is None:
+        return
+    _stop.set()
+    await _task
+    _stop = _task = None
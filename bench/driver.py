@@ -0,0 +1,287 @@
+# bench/driver.py
+# Нагрузочный прогон API с фиксированной конкурентностью.
+#
+# Запуск из корня проекта (база наполнена через bench/seed.py):
+#     python -m bench.driver                                   # приложение в этом же процессе
+#     python -m bench.driver --base-url http://127.0.0.1:8000  # уже запущенный сервер (с RATE_LIMIT_ENABLED=false)
+#     python -m bench.driver --save-baseline bench/baseline.json
+#     python -m bench.driver --compare bench/baseline.json --tolerance 0.1
+#
+# Для каждого сценария печатаются p50/p95/p99, пропускная способность, доля
+# ошибок и - при прогоне в процессе - среднее число SQL-запросов на запрос
+# (считается по событиям движков SQLAlchemy). При --compare прогон завершается
+# с кодом 1, если p95 или пропускная способность хуже базовых больше чем на --tolerance.
+
+import argparse
+import asyncio
+import json
+import random
+import struct
+import sys
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import httpx
+
+from bench.seed import BBOX, REGIONS, USER_ID_OFFSET
+
+
+def _tiny_png() -> bytes:
+    """Корректный PNG 1x1 для сценария загрузки объявления (без зависимости от Pillow)."""
+    def chunk(kind: bytes, payload: bytes) -> bytes:
+        return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)  # 1x1, 8 бит, RGB
+    pixels = zlib.compress(b"\x00\x6a\xa8\x3c")         # фильтр 0 + один зеленый пиксель
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", pixels) + chunk(b"IEND", b"")
+
+
+_TINY_PNG = _tiny_png()
+
+
+@dataclass
+class Scenario:
+    name: str
+    make_request: Callable  # (client, rng, data) -> awaitable httpx.Response
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    queries: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class Dataset:
+    announcement_ids: List[int]
+    user_ids: List[int]
+
+
+def _feed(client, rng, data):
+    return client.get("/api/announcements/", params={"region": rng.choice(REGIONS), "limit": 20})
+
+
+def _nearby(client, rng, data):
+    south, north, west, east = BBOX
+    return client.get("/api/announcements/nearby", params={
+        "lat": rng.uniform(south, north), "lon": rng.uniform(west, east), "radius_km": 25,
+    })
+
+
+def _detail(client, rng, data):
+    return client.get(f"/api/announcements/{rng.choice(data.announcement_ids)}")
+
+
+def _get_or_create(client, rng, data):
+    user_id = rng.choice(data.user_ids)
+    return client.post("/api/users/get_or_create", json={
+        "id": user_id,
+        "username": f"bench_user_{user_id - USER_ID_OFFSET}",
+        "first_name": f"Фермер {user_id - USER_ID_OFFSET}",
+    })
+
+
+def _create(client, rng, data):
+    return client.post(
+        "/api/announcements/",
+        data={
+            "title": "Продам пшеницу (бенчмарк)",
+            "description": "Тестовое объявление",
+            "price": "12500",
+            "current_user_id": str(rng.choice(data.user_ids)),
+        },
+        files={"image": ("bench.png", _TINY_PNG, "image/png")},
+    )
+
+
+SCENARIOS = {
+    "feed": _feed,
+    "detail": _detail,
+    "nearby": _nearby,
+    "get_or_create": _get_or_create,
+    "create": _create,
+}
+
+
+class QueryCounter:
+    """Считает SQL-запросы движков, которыми пользуются эндпоинты (только при прогоне в процессе).
+
+    Движки выбираются по settings.DB_ASYNC, как и сами эндпоинты: второй режим
+    не создает лишний пул и не попадает в подсчет. Реплика считается вместе с
+    основной базой - на нее идут GET-запросы.
+    """
+
+    def __init__(self):
+        from sqlalchemy import event
+        import database
+        from config import settings
+
+        self.count = 0
+        if settings.DB_ASYNC:
+            engines = [database.get_async_engine().sync_engine, database.get_async_replica_engine().sync_engine]
+        else:
+            engines = [database.get_engine(), database.get_replica_engine()]
+        # Без реплики это один и тот же движок - слушатель вешается один раз
+        self._engines = list(dict.fromkeys(engines))
+        self._event = event
+        for engine in self._engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def close(self):
+        for engine in self._engines:
+            self._event.remove(engine, "before_cursor_execute", self._on_execute)
+
+
+async def _load_dataset(client) -> Dataset:
+    response = await client.get("/api/announcements/", params={"limit": 100})
+    response.raise_for_status()
+    items = response.json()
+    if not items:
+        raise SystemExit("No announcements found - seed the database first (python -m bench.seed)")
+    return Dataset(
+        announcement_ids=[item["id"] for item in items],
+        user_ids=sorted({item["owner"]["id"] for item in items}),
+    )
+
+
+async def _run_scenario(client, scenario: Scenario, data: Dataset, concurrency: int, requests: int,
+                        seed: int, counter: Optional[QueryCounter]):
+    rng = random.Random(seed)
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await scenario.make_request(client, rng, data)
+                if response.status_code >= 400:
+                    scenario.errors += 1
+            except httpx.HTTPError:
+                scenario.errors += 1
+            scenario.latencies.append(time.perf_counter() - started)
+
+    queries_before = counter.count if counter else 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    scenario.elapsed = time.perf_counter() - started
+    scenario.queries = (counter.count - queries_before) if counter else 0
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(scenario: Scenario, in_process: bool) -> dict:
+    total = len(scenario.latencies)
+    return {
+        "requests": total,
+        "errors": scenario.errors,
+        "rps": round(total / scenario.elapsed, 1) if scenario.elapsed else 0.0,
+        "p50_ms": round(_percentile(scenario.latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(scenario.latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(scenario.latencies, 99) * 1000, 2),
+        "queries_per_request": round(scenario.queries / total, 2) if in_process and total else None,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Сравнивает с базовым прогоном. Возвращает список регрессий."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+        if base["rps"] and current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']} -> {current['rps']}")
+        base_q, current_q = base.get("queries_per_request"), current.get("queries_per_request")
+        if base_q is not None and current_q is not None and current_q > base_q:
+            regressions.append(f"{name}: queries/request {base_q} -> {current_q}")
+    return regressions
+
+
+def _print_table(results: dict):
+    header = f"{'scenario':<15}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        q = "-" if r["queries_per_request"] is None else r["queries_per_request"]
+        print(f"{name:<15}{r['requests']:>7}{r['errors']:>6}{r['rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{q:>8}")
+
+
+async def run(args) -> dict:
+    counter = None
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+    else:
+        from config import settings
+        from main import create_app, load_regions
+        # Все запросы прогона идут с одного адреса - лимит частоты резал бы сценарий create
+        settings.RATE_LIMIT_ENABLED = False
+        app = create_app()
+        # ASGITransport не шлет событий startup: без справочника регионов фильтр
+        # ленты по региону ничего не находит и сценарий feed мерил бы пустые ответы
+        load_regions()
+        counter = QueryCounter()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=30)
+
+    results = {}
+    try:
+        async with client:
+            data = await _load_dataset(client)
+            for index, name in enumerate(args.scenarios):
+                scenario = Scenario(name, SCENARIOS[name])
+                # Прогрев: соединения пула, кэши, JIT-подготовка запросов
+                await _run_scenario(client, Scenario(name, SCENARIOS[name]), data, args.concurrency,
+                                    args.warmup, args.seed + index, None)
+                await _run_scenario(client, scenario, data, args.concurrency, args.requests,
+                                    args.seed + index, counter)
+                results[name] = summarize(scenario, in_process=counter is not None)
+    finally:
+        if counter:
+            counter.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон API")
+    parser.add_argument("--base-url", default=None, help="адрес запущенного сервера; без него приложение поднимается в процессе")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2_000, help="запросов на сценарий")
+    parser.add_argument("--warmup", type=int, default=100, help="запросов прогрева на сценарий")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save-baseline", metavar="PATH", help="сохранить результаты как базовые")
+    parser.add_argument("--compare", metavar="PATH", help="сравнить с базовыми результатами")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="допустимое ухудшение (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    _print_table(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as target:
+            json.dump(results, target, indent=2, ensure_ascii=False)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as source:
+            regressions = compare(results, json.load(source), args.tolerance)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# bench/explain.py
+# Печатает планы выполнения основных запросов API на наполненной базе
+# (см. bench/seed.py), чтобы после изменения индексов или crud/announcement.py
+# было видно, какие индексы реально используются и сколько страниц читается.
+#
+# Запуск из корня проекта:
+#     python -m bench.explain
+#     python -m bench.explain --query search --analyze
+#     python -m bench.explain --smoke     # просто выполнить каждый запрос
+#     python -m bench.explain --check     # планы должны использовать EXPECTED_INDEXES
+#
+# На базе из bench.seed (--announcements 1000000) поиск должен идти через GIN:
+# строки объявлений читает Bitmap Heap Scan с Recheck Cond (search_vector @@ ...)
+# поверх Bitmap Index Scan on ix_announcements_search_vector, а сортировка по
+# ts_rank_cd идет уже по найденным строкам.
+# Seq Scan on announcements в плане search - признак того, что условие или
+# предикат частичного индекса (status = 'active') перестали совпадать с индексом.
+#
+# Запросы уходят в Postgres с параметрами, как из приложения: подстановка
+# литералов в текст ломается на типах вроде REGCONFIG (полнотекстовый поиск).
+# Ошибка одного запроса печатается и не мешает остальным; код выхода 1.
+
+import argparse
+import sys
+
+from sqlalchemy.exc import SQLAlchemyError
+
+from bench.seed import REGIONS
+from crud import announcement as announcement_crud
+from crud import region as region_crud
+from database import get_engine, SessionLocal
+
+
+# Индекс, который должен встретиться в плане запроса на наполненной базе (--check)
+EXPECTED_INDEXES = {
+    "feed": "ix_announcements_created_at_id",
+    "feed_region": "ix_announcements_region_id_created_at_id",
+    "search": "ix_announcements_search_vector",
+    "nearby": "ix_announcements_geohash",
+}
+
+
+def _queries(region: str, term: str):
+    return {
+        "feed": announcement_crud.select_announcements(limit=20),
+        "feed_region": announcement_crud.select_announcements(limit=20, region=region),
+        "feed_deep": announcement_crud.select_announcements(skip=50_000, limit=20, region=region),
+        "search": announcement_crud.select_search(term, limit=20),
+        "search_region": announcement_crud.select_search(term, limit=20, region=region),
+        # Воронеж, 25 км
+        "nearby": announcement_crud.select_nearby(51.67, 39.18, 25.0),
+    }
+
+
+def explain(conn, stmt, analyze: bool) -> str:
+    compiled = stmt.compile(dialect=conn.dialect)
+    options = "ANALYZE, BUFFERS" if analyze else "COSTS"
+    rows = conn.exec_driver_sql(f"EXPLAIN ({options}) {compiled}", compiled.params).all()
+    return "\n".join(row[0] for row in rows)
+
+
+def smoke(conn, stmt) -> str:
+    """Выполняет запрос и сообщает число строк - проверка, что он вообще работает."""
+    return f"{len(conn.execute(stmt).all())} row(s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Планы выполнения запросов ленты и поиска")
+    parser.add_argument("--query", action="append", help="какие запросы показать (по умолчанию все)")
+    parser.add_argument("--region", default=REGIONS[0])
+    parser.add_argument("--term", default="пшеница")
+    parser.add_argument("--analyze", action="store_true", help="выполнить запросы (EXPLAIN ANALYZE, BUFFERS)")
+    parser.add_argument("--smoke", action="store_true", help="выполнить каждый запрос без EXPLAIN и показать число строк")
+    parser.add_argument("--check", action="store_true", help="ошибка, если в плане нет индекса из EXPECTED_INDEXES")
+    args = parser.parse_args()
+
+    # Фильтр по региону строится по справочнику в памяти, как в приложении
+    with SessionLocal() as db:
+        region_crud.load_region_lookup(db)
+    queries = _queries(args.region, args.term)
+    failed = []
+    with get_engine().connect() as conn:
+        for name in args.query or queries:
+            print(f"=== {name}")
+            try:
+                output = smoke(conn, queries[name]) if args.smoke else explain(conn, queries[name], args.analyze)
+            except SQLAlchemyError as exc:
+                conn.rollback()
+                failed.append(name)
+                print(f"ERROR: {exc}")
+                print()
+                continue
+            print(output)
+            expected = EXPECTED_INDEXES.get(name)
+            if args.check and not args.smoke and expected and expected not in output:
+                failed.append(name)
+                print(f"CHECK FAILED: {expected} is not used")
+            print()
+    if failed:
+        print(f"Failed: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
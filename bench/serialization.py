@@ -0,0 +1,105 @@
+# bench/serialization.py
+# Микробенчмарк сериализации страницы объявлений, без базы и без HTTP.
+#
+# Запуск из корня проекта:
+#     python -m bench.serialization
+#     python -m bench.serialization --sizes 20 100 500 --repeat 2000
+#
+# Сравниваются три пути для одной и той же страницы ORM-объектов:
+#   default   - как FastAPI с response_model: валидация через AnnouncementDisplay,
+#               jsonable_encoder, json.dumps (JSONResponse)
+#   validated - та же валидация, но тело через orjson
+#   lean      - словари прямо из атрибутов (serialization.lean_announcements) + orjson,
+#               то, что отдается при JSON_FAST=true
+# Печатается время на одну страницу и ускорение относительно default.
+
+import argparse
+import datetime
+import time
+from typing import List
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+import serialization
+from bench.seed import REGIONS
+from regions import region_lookup
+from models.announcement import Announcement
+from models.user import User
+from schemas import announcement as announcement_schema
+
+_page_adapter = TypeAdapter(List[announcement_schema.AnnouncementDisplay])
+
+
+def make_page(size: int) -> list:
+    """Страница из несохраненных ORM-объектов с заполненными полями и автором."""
+    region_lookup.load(enumerate(REGIONS, start=1))
+    now = datetime.datetime(2025, 8, 1, 12, 0, 0, 123456)
+    owners = [
+        User(id=9_000_000_000 + n, username=f"bench_user_{n}", first_name=f"Фермер {n}", last_name=None,
+             region=REGIONS[n % len(REGIONS)], created_at=now, updated_at=now)
+        for n in range(10)
+    ]
+    page = []
+    for n in range(size):
+        owner = owners[n % len(owners)]
+        page.append(Announcement(
+            id=n + 1, title=f"Продам пшеницу 3 кл. #{n}", description="самовывоз, возможен торг, влажность 12%",
+            price=12500.0 + n, region=owner.region, image_url=f"/uploads/ab/cd/{n:064x}_full.webp",
+            image_thumb_url=f"/uploads/ab/cd/{n:064x}_thumb.webp",
+            created_at=now - datetime.timedelta(minutes=n), owner=owner,
+        ))
+    return page
+
+
+def render_default(page) -> bytes:
+    validated = _page_adapter.validate_python(page, from_attributes=True)
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def render_validated(page) -> bytes:
+    return ORJSONResponse(serialization.validated_announcements(page)).body
+
+
+def render_lean(page) -> bytes:
+    return ORJSONResponse(serialization.lean_announcements(page)).body
+
+
+PATHS = {"default": render_default, "validated": render_validated, "lean": render_lean}
+
+
+def measure(render, page, repeat: int) -> float:
+    """Среднее время одной страницы, мкс (лучший из трех прогонов)."""
+    render(page)  # прогрев
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            render(page)
+        best = min(best, (time.perf_counter() - started) / repeat)
+    return best * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость сериализации страницы объявлений")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 20, 50, 100])
+    parser.add_argument("--repeat", type=int, default=500, help="сериализаций страницы на замер")
+    args = parser.parse_args()
+
+    header = f"{'page':>6}" + "".join(f"{name + ' us':>14}" for name in PATHS) + f"{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes:
+        page = make_page(size)
+        # Пути должны отдавать одинаковые данные, иначе сравнение бессмысленно
+        if orjson.loads(render_default(page)) != orjson.loads(render_lean(page)):
+            raise SystemExit(f"lean output differs from default for page size {size}")
+        timings = {name: measure(render, page, args.repeat) for name, render in PATHS.items()}
+        row = f"{size:>6}" + "".join(f"{timings[name]:>14.1f}" for name in PATHS)
+        print(row + f"{timings['default'] / timings['lean']:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
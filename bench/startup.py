@@ -0,0 +1,93 @@
+# bench/startup.py
+# Профиль холодного старта: сколько стоит импорт приложения и create_app()
+# в свежем процессе интерпретатора и какие импорты на это тратят время.
+#
+# Запуск из корня проекта (база не нужна - движки создаются при первом запросе):
+#     python -m bench.startup
+#     python -m bench.startup --runs 10 --top 30
+#     DB_ASYNC=true python -m bench.startup
+#
+# Каждый прогон - отдельный процесс с python -X importtime. Печатаются медианы
+# времени до готового объекта приложения (без startup-хуков: они ходят в базу)
+# и самые дорогие пакеты по собственному времени импорта (self) последнего прогона.
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+_CHILD = (
+    "import time; started = time.perf_counter(); "
+    "import main; main.create_app(); "
+    "print(f'{time.perf_counter() - started:.6f}')"
+)
+
+# import time:       self [us] |  cumulative | imported package
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+_PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_once():
+    """(с запуска процесса, импорт + create_app, строки -X importtime) одного прогона."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD],
+        cwd=_PROJECT_DIR, capture_output=True, text=True,
+    )
+    total = time.perf_counter() - started
+    if result.returncode != 0:
+        raise SystemExit(result.stderr[-2000:])
+    return total, float(result.stdout.strip().splitlines()[-1]), result.stderr.splitlines()
+
+
+def _project_modules() -> set:
+    names = set()
+    for name in os.listdir(_PROJECT_DIR):
+        if name.endswith(".py"):
+            names.add(name[:-3])
+        elif os.path.isdir(os.path.join(_PROJECT_DIR, name)) and not name.startswith((".", "_")):
+            names.add(name)
+    return names
+
+
+def by_package(lines):
+    """Собственное время импорта (мс), сложенное по пакетам верхнего уровня."""
+    totals = defaultdict(float)
+    for line in lines:
+        match = _IMPORT_LINE.match(line)
+        if match:
+            totals[match.group(3).split(".")[0]] += int(match.group(1)) / 1000
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время холодного старта приложения")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20, help="сколько пакетов показать")
+    args = parser.parse_args()
+
+    totals, app_times, lines = [], [], []
+    for _ in range(args.runs):
+        total, app_time, lines = run_once()
+        totals.append(total)
+        app_times.append(app_time)
+
+    print(f"process start to app ready: {statistics.median(totals) * 1000:.0f} ms (median of {args.runs})")
+    print(f"import main + create_app(): {statistics.median(app_times) * 1000:.0f} ms")
+    print()
+    project = _project_modules()
+    header = f"{'package':<28}{'self ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for package, self_ms in by_package(lines)[:args.top]:
+        marker = "  (project)" if package in project else ""
+        print(f"{package:<28}{self_ms:>10.1f}{marker}")
+
+
+if __name__ == "__main__":
+    main()
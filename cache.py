@@ -0,0 +1,198 @@
+# cache.py
+# Кэш готовых страниц ленты объявлений в памяти процесса.
+#
+# Первую страницу ленты своего региона запрашивают почти все пользователи,
+# поэтому ответ на (region, cursor/skip, limit) хранится уже сериализованным
+# вместе с ETag и курсором следующей страницы.
+#
+# Инвалидация сделана через "поколения": номер поколения региона входит в ключ,
+# и новое объявление просто увеличивает его - старые записи становятся
+# недостижимыми и вытесняются по LRU/TTL. Для этого хранилищу нужны только
+# get/set/incr, поэтому MemoryCacheBackend можно заменить общим для всех
+# воркеров uvicorn (разделяемая память, Redis и т.п.), не трогая FeedCache.
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from fastapi import Request, Response
+
+import metrics
+import serialization
+from config import settings
+from http_cache import announcements_etag, not_modified_response, validator_headers
+from pagination import NEXT_CURSOR_HEADER
+
+
+class CacheBackend:
+    """Интерфейс хранилища кэша."""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """Атомарно увеличивает счетчик (без TTL) и возвращает новое значение."""
+        raise NotImplementedError
+
+    def counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """LRU с ограничением числа записей и TTL. Потокобезопасен: sync-эндпоинты работают в потоках."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: dict = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def incr(self, key):
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters[key] = value
+            return value
+
+    def counter(self, key):
+        return self._counters.get(key, 0)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+@dataclass
+class FeedPage:
+    """Сериализованная страница ленты, готовая к отдаче без обращения к БД."""
+    items: List[dict]
+    etag: str
+    next_cursor: Optional[str]
+
+    def to_response(self, request: Request, single: bool = False) -> Response:
+        """single=True - в теле единственный элемент, а не список (GET /announcements/{id})."""
+        # Сначала ETag: на 304 тело не кодируется
+        cached = not_modified_response(request, self.etag)
+        if cached is not None:
+            return cached
+        headers = validator_headers(self.etag)
+        if self.next_cursor:
+            headers[NEXT_CURSOR_HEADER] = self.next_cursor
+        return serialization.response_class(self.items[0] if single else self.items, headers=headers)
+
+
+class FeedCache:
+    # Поколение ленты без фильтра по региону: в нее попадают объявления всех регионов
+    _ALL = "*"
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    def key(self, region: Optional[str], cursor: Optional[str], skip: int, limit: int) -> str:
+        """Ключ страницы. Вычисляется один раз на запрос и передается в get/set."""
+        scope = region or self._ALL
+        generation = self.backend.counter(f"gen:{scope}")
+        return f"feed:{scope}:{generation}:{cursor or ''}:{skip}:{limit}"
+
+    def get(self, key: str) -> Optional[FeedPage]:
+        return self.backend.get(key)
+
+    def set(self, key: str, page: FeedPage) -> None:
+        self.backend.set(key, page, self.ttl)
+
+    def invalidate_region(self, region: Optional[str]) -> None:
+        """Сбрасывает ленту региона и общую ленту."""
+        if region:
+            self.backend.incr(f"gen:{region}")
+        self.backend.incr(f"gen:{self._ALL}")
+
+    def stats(self) -> dict:
+        return {"ttl": self.ttl, **self.backend.stats()}
+
+
+def build_feed_page(announcements, next_cursor: Optional[str], etag: Optional[str] = None) -> FeedPage:
+    """Сериализует страницу ленты один раз - дальше она отдается из кэша как есть."""
+    items = serialization.serialize_announcements(announcements)
+    return FeedPage(items=items, etag=etag or announcements_etag(announcements), next_cursor=next_cursor)
+
+
+def announcement_response(request: Request, announcement) -> Response:
+    """Одно объявление (GET /announcements/{id}). ETag по загруженной строке проверяется до сериализации."""
+    etag = announcements_etag([announcement])
+    cached = not_modified_response(request, etag)
+    if cached is not None:
+        return cached
+    return build_feed_page([announcement], None, etag).to_response(request, single=True)
+
+
+def feed_response(request: Request, announcements, next_cursor: Optional[str], cache_key: Optional[str] = None) -> Response:
+    """Ответ со страницей, прочитанной из БД (промах кэша), с записью в кэш по cache_key.
+
+    ETag считается по id и updated_at строк еще до сериализации: клиенту, у
+    которого страница уже есть, уходит 304 без сборки тела. Такая страница в
+    кэш не попадает - ее сериализует первый запрос, которому нужно тело.
+    """
+    etag = announcements_etag(announcements)
+    cached = not_modified_response(request, etag)
+    if cached is not None:
+        return cached
+    page = build_feed_page(announcements, next_cursor, etag)
+    if cache_key is not None:
+        feed_cache.set(cache_key, page)
+    return page.to_response(request)
+
+
+feed_cache = FeedCache(MemoryCacheBackend(settings.FEED_CACHE_MAX_ENTRIES), ttl=settings.FEED_CACHE_TTL)
+
+
+def _collect_cache_metrics():
+    stats = feed_cache.stats()
+    return [
+        (f"feed_cache_{key}", f"Feed cache {key.replace('_', ' ')}", [({}, stats[key])])
+        for key in ("entries", "hits", "misses", "evictions", "expirations")
+    ]
+
+metrics.registry.add_gauge_collector(_collect_cache_metrics)
@@ -0,0 +1,137 @@
+# commands/import_prices.py
+# Массовая загрузка цен из CSV через COPY ... FROM STDIN.
+#
+# Формат файла - CSV с заголовком: crop,region,price,observed_at
+#     Пшеница 3 кл.,Ростовская область,12500,2025-08-01 10:00
+#
+# Запуск из корня проекта:
+#     python -m commands.import_prices prices.csv [еще.csv ...]
+#
+# Строки не проходят через ORM: файл читается пачками по --batch-rows строк,
+# каждая пачка уходит в COPY отдельной транзакцией, а в конце пересчитывается
+# материализованное представление price_trends, из которого читает /api/prices.
+# Строки, которые отвергла база, печатаются с номерами строк файла; остальные
+# загружаются, а код выхода в этом случае - 1.
+
+import argparse
+import csv
+import sys
+
+import psycopg
+from sqlalchemy.exc import DBAPIError
+
+from database import engine, SessionLocal
+from crud import price as price_crud
+
+COLUMNS = ("crop", "region", "price", "observed_at")
+_COPY_SQL = f"COPY prices ({', '.join(COLUMNS)}) FROM STDIN"
+_INSERT_SQL = f"INSERT INTO prices ({', '.join(COLUMNS)}) VALUES ({', '.join(['%s'] * len(COLUMNS))})"
+
+# Сколько ошибочных строк одной пачки печатать подробно
+MAX_REPORTED_ROWS = 20
+
+
+def _copy_batch(conn: psycopg.Connection, batch) -> None:
+    with conn.cursor() as cursor, cursor.copy(_COPY_SQL) as copy:
+        for _, values in batch:
+            copy.write_row(values)
+    conn.commit()
+
+
+def _insert_rows_one_by_one(conn: psycopg.Connection, batch):
+    """Медленный путь для пачки, которую отверг COPY: каждая строка в своей точке сохранения.
+
+    Возвращает (загружено строк, [(номер строки файла, ошибка)]).
+    """
+    loaded, errors = 0, []
+    with conn.transaction():
+        for line, values in batch:
+            try:
+                with conn.transaction():  # SAVEPOINT: ошибка откатывает только эту строку
+                    conn.execute(_INSERT_SQL, values)
+                loaded += 1
+            except psycopg.Error as exc:
+                errors.append((line, str(exc).strip().splitlines()[0]))
+    return loaded, errors
+
+
+def import_file(path: str, batch_rows: int):
+    """Загружает один CSV-файл. Возвращает (загружено строк, число отвергнутых строк).
+
+    Пачка, на которой COPY упал (неверная цена, дата и т.п.), откатывается и
+    загружается построчно: хорошие строки попадают в базу, плохие печатаются
+    с номерами строк файла.
+    """
+    loaded = rejected = 0
+    raw = engine.raw_connection()
+    try:
+        conn = raw.driver_connection  # psycopg.Connection
+        with open(path, newline="", encoding="utf-8-sig") as source:
+            reader = csv.DictReader(source)
+            missing = set(COLUMNS) - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+
+            exhausted = False
+            while not exhausted:
+                batch = []
+                for row in reader:
+                    batch.append((reader.line_num, [row[name] for name in COLUMNS]))
+                    if len(batch) >= batch_rows:
+                        break
+                else:
+                    exhausted = True
+                if not batch:
+                    break
+                try:
+                    _copy_batch(conn, batch)
+                    loaded += len(batch)
+                except psycopg.Error as exc:
+                    conn.rollback()
+                    print(f"  {path}: batch at lines {batch[0][0]}-{batch[-1][0]} rejected ({type(exc).__name__}), loading row by row",
+                          file=sys.stderr)
+                    batch_loaded, errors = _insert_rows_one_by_one(conn, batch)
+                    loaded += batch_loaded
+                    rejected += len(errors)
+                    for line, error in errors[:MAX_REPORTED_ROWS]:
+                        print(f"  {path}:{line}: {error}", file=sys.stderr)
+                    if len(errors) > MAX_REPORTED_ROWS:
+                        print(f"  {path}: ... and {len(errors) - MAX_REPORTED_ROWS} more rejected row(s)", file=sys.stderr)
+                print(f"  {path}: {loaded} rows")
+    finally:
+        raw.close()
+    return loaded, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Загрузка цен из CSV в таблицу prices")
+    parser.add_argument("files", nargs="+", help="CSV-файлы с колонками crop,region,price,observed_at")
+    parser.add_argument("--batch-rows", type=int, default=100_000, help="строк на одну транзакцию COPY")
+    parser.add_argument("--no-refresh", action="store_true", help="не пересчитывать price_trends после загрузки")
+    args = parser.parse_args()
+
+    total = rejected = 0
+    for path in args.files:
+        try:
+            loaded, bad = import_file(path, args.batch_rows)
+        except (OSError, ValueError, psycopg.Error) as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            sys.exit(1)
+        total += loaded
+        rejected += bad
+
+    if not args.no_refresh:
+        db = SessionLocal()
+        try:
+            price_crud.refresh_price_trends(db)
+        except DBAPIError as exc:
+            print(f"Error: failed to refresh price_trends: {exc.orig}", file=sys.stderr)
+            sys.exit(1)
+        finally:
+            db.close()
+    print(f"Done: {total} rows imported, {rejected} rejected")
+    if rejected:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
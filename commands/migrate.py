@@ -0,0 +1,110 @@
+# commands/migrate.py
+# Применение миграций при старте экземпляра (run.sh) с быстрой проверкой.
+#
+# Запуск из корня проекта:
+#     python -m commands.migrate          # upgrade head, только если схема отстает
+#     python -m commands.migrate --check  # код выхода 1, если миграции не применены
+#
+# `alembic upgrade head` на каждом старте - это импорт alembic, env.py и всех
+# моделей даже тогда, когда схема уже актуальна, то есть почти всегда. Здесь
+# последняя ревизия определяется разбором файлов alembic/versions без импорта
+# alembic, а текущая - одним SELECT из alembic_version через psycopg, без
+# SQLAlchemy и моделей. Совпали - выходим; иначе под advisory-блокировкой
+# (несколько экземпляров могут стартовать одновременно) выполняется обычный
+# alembic upgrade head.
+
+import argparse
+import os
+import re
+import sys
+import time
+
+import psycopg
+
+from config import settings
+
+VERSIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic", "versions")
+
+_REVISION = re.compile(r"^revision(?:\s*:[^=]+)?\s*=\s*['\"]([0-9a-zA-Z_]+)['\"]", re.MULTILINE)
+_DOWN_REVISION = re.compile(r"^down_revision(?:\s*:[^=]+)?\s*=\s*(.+)$", re.MULTILINE)
+_QUOTED = re.compile(r"['\"]([0-9a-zA-Z_]+)['\"]")
+
+# Произвольный ключ pg_advisory_lock для миграций этого приложения
+_LOCK_KEY = 7_402_113_065
+
+
+def head_revisions(versions_dir: str = VERSIONS_DIR) -> set:
+    """Ревизии, на которые не ссылается ни одна другая (головы цепочки миграций)."""
+    revisions, parents = set(), set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions_dir, name), encoding="utf-8") as source:
+            text = source.read()
+        revision = _REVISION.search(text)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION.search(text)
+        if down:
+            parents.update(_QUOTED.findall(down.group(1)))
+    return revisions - parents
+
+
+def _connect() -> psycopg.Connection:
+    return psycopg.connect(
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        user=settings.DB_USER,
+        password=settings.DB_PASS,
+        dbname=settings.DB_NAME,
+        autocommit=True,
+        connect_timeout=10,
+    )
+
+
+def current_revisions(conn: psycopg.Connection) -> set:
+    """Ревизии из alembic_version; пустое множество для новой базы."""
+    try:
+        return {row[0] for row in conn.execute("SELECT version_num FROM alembic_version")}
+    except psycopg.errors.UndefinedTable:
+        return set()
+
+
+def _alembic_upgrade() -> None:
+    from alembic.config import main as alembic_main  # нужен только когда схема отстает
+    alembic_main(argv=["upgrade", "head"])
+
+
+def migrate(check_only: bool = False) -> bool:
+    """Доводит схему до последней ревизии. Возвращает True, если она уже была актуальной."""
+    started = time.perf_counter()
+    heads = head_revisions()
+    with _connect() as conn:
+        if current_revisions(conn) == heads:
+            print(f"Schema is at head {', '.join(sorted(heads))} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+            return True
+        if check_only:
+            print("Schema is behind head: run python -m commands.migrate")
+            return False
+        conn.execute("SELECT pg_advisory_lock(%s)", (_LOCK_KEY,))
+        try:
+            # Пока ждали блокировку, миграции мог применить другой экземпляр
+            if current_revisions(conn) != heads:
+                _alembic_upgrade()
+        finally:
+            conn.execute("SELECT pg_advisory_unlock(%s)", (_LOCK_KEY,))
+    print(f"Schema upgraded to {', '.join(sorted(heads))} ({time.perf_counter() - started:.1f} s)")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы с быстрой проверкой актуальности")
+    parser.add_argument("--check", action="store_true", help="только проверить, ничего не применяя")
+    args = parser.parse_args()
+    if not migrate(check_only=args.check) and args.check:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
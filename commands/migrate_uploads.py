@@ -0,0 +1,102 @@
+# commands/migrate_uploads.py
+# Разовый перенос старых загрузок (uploads/<uuid>_<имя файла>) в хранилище
+# с именами по хэшу содержимого и переписывание Announcement.image_url.
+#
+# Файл сначала копируется, затем коммитится строка объявления и только потом
+# удаляется старый файл. Если команда упадет посередине, база ссылается либо на
+# старый файл (он на месте), либо на новый (он уже скопирован), и повторный
+# запуск просто продолжает перенос.
+#
+# Запуск из корня проекта:
+#     python -m commands.migrate_uploads            # перенести
+#     python -m commands.migrate_uploads --dry-run  # только показать, что будет сделано
+
+import argparse
+import os
+import re
+
+from sqlalchemy import or_, select
+
+from database import SessionLocal
+from models.announcement import Announcement
+from uploads import remove_files, store_file, url_to_path
+
+# Старые файлы лежат прямо в uploads/, новые - в uploads/ab/cd/
+_FLAT_URL = re.compile(r"^/uploads/[^/]+$")
+
+BATCH_SIZE = 500
+_FIELDS = ("image_url", "image_thumb_url")
+
+
+def _migrate_url(url, dry_run: bool):
+    """Возвращает новый URL для старого или None, если переносить нечего."""
+    if not url or not _FLAT_URL.match(url):
+        return None
+    path = url_to_path(url)
+    if not os.path.exists(path):
+        print(f"  missing file: {path}")
+        return None
+    if dry_run:
+        return url
+    return store_file(path)
+
+
+def _referenced(db, url: str) -> bool:
+    """Ссылается ли на старый файл еще какое-нибудь объявление (одна картинка у нескольких)."""
+    return db.scalar(
+        select(Announcement.id)
+        .where(or_(Announcement.image_url == url, Announcement.image_thumb_url == url))
+        .limit(1)
+    ) is not None
+
+
+def migrate(dry_run: bool = False) -> int:
+    moved = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            batch = db.scalars(
+                select(Announcement)
+                .where(Announcement.id > last_id)
+                .where(Announcement.image_url.is_not(None))
+                .order_by(Announcement.id)
+                .limit(BATCH_SIZE)
+            ).all()
+            if not batch:
+                break
+
+            for announcement in batch:
+                old_urls = set()
+                for field in _FIELDS:
+                    old_url = getattr(announcement, field)
+                    new_url = _migrate_url(old_url, dry_run)
+                    if new_url is None:
+                        continue
+                    print(f"  #{announcement.id} {field}: {old_url} -> {new_url}")
+                    if not dry_run:
+                        setattr(announcement, field, new_url)
+                        old_urls.add(old_url)
+                    moved += 1
+
+                if old_urls:
+                    # Сначала база ссылается на копию, потом удаляется оригинал
+                    db.commit()
+                    remove_files(url for url in old_urls if not _referenced(db, url))
+
+            last_id = batch[-1].id
+    finally:
+        db.close()
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенос загрузок в хранилище с именами по хэшу содержимого")
+    parser.add_argument("--dry-run", action="store_true", help="ничего не менять, только показать список")
+    args = parser.parse_args()
+    moved = migrate(dry_run=args.dry_run)
+    print(f"Done: {moved} file reference(s) {'to migrate' if args.dry_run else 'migrated'}")
+
+
+if __name__ == "__main__":
+    main()
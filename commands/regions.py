@@ -0,0 +1,42 @@
+# commands/regions.py
+# Справочник регионов: просмотр и добавление новых.
+#
+# Запуск из корня проекта:
+#     python -m commands.regions list
+#     python -m commands.regions add "Новый регион" ["Еще один" ...]
+#
+# Уже существующие названия (в любом регистре и с лишними пробелами) пропускаются.
+# Работающие процессы API подхватят новые регионы без перезапуска - см. regions.py.
+
+import argparse
+
+from database import SessionLocal
+from crud import region as region_crud
+from regions import region_lookup
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Справочник регионов")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="показать все регионы")
+    add = commands.add_parser("add", help="добавить регионы")
+    add.add_argument("names", nargs="+", help="названия регионов")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.command == "add":
+            added = region_crud.add_regions(db, args.names)
+            for name in added:
+                print(f"Added: {name}")
+            print(f"Done: {len(added)} region(s) added")
+        else:
+            region_crud.load_region_lookup(db)
+            for region_id, name in region_lookup.all():
+                print(f"{region_id}\t{name}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
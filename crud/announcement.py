@@ -1,39 +1,499 @@
 # crud/announcement.py
-from sqlalchemy.orm import Session
+from collections import Counter
+from sqlalchemy import and_, delete, false, func, insert, literal_column, or_, select, tuple_, update
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from models import announcement as announcement_model
+from models.announcement_archive import AnnouncementArchive
 from schemas import announcement as announcement_schema
-from typing import Optional
+from typing import Iterable, List, Optional, Tuple
 from models import user as user_model
+from crud import job as job_crud
+from models.region import Region
+from pagination import encode_cursor, decode_cursor, encode_rank_cursor, decode_rank_cursor
+from cache import feed_cache
+import geo
+from regions import region_lookup
+from database import mark_written
 
-def create_announcement(db: Session, announcement: announcement_schema.AnnouncementCreate, owner: user_model.User, image_url: Optional[str] = None):
-    """Создает новое объявление, автоматически подставляя регион из профиля автора."""
-    db_announcement = announcement_model.Announcement(
+# Запросы собираются отдельными функциями select_*, чтобы синхронный (этот модуль)
+# и асинхронный (crud/async_announcement.py) слои выполняли один и тот же SQL.
+
+# Автор нужен в каждом ответе (AnnouncementDisplay.owner), поэтому подгружаем его
+# тем же запросом через JOIN, а не отдельным SELECT на каждую строку (N+1).
+# owner_id NOT NULL, поэтому INNER JOIN безопасен.
+_with_owner = joinedload(announcement_model.Announcement.owner, innerjoin=True)
+
+def build_announcement(announcement: announcement_schema.AnnouncementCreate, owner: user_model.User, image_url: Optional[str] = None):
+    """Собирает объект объявления, подставляя регион из профиля автора."""
+    return announcement_model.Announcement(
         title=announcement.title,
         description=announcement.description,
         price=announcement.price,
         owner_id=owner.id,
-        region=owner.region,  
-        image_url=image_url
+        owner=owner,
+        region_id=owner.region_id,
+        image_url=image_url,
+        **coordinates(announcement)
+    )
+
+def coordinates(announcement: announcement_schema.AnnouncementCreate) -> dict:
+    """Координаты и геохеш для записи в БД (пустые, если точка не указана)."""
+    if announcement.latitude is None or announcement.longitude is None:
+        return {"latitude": None, "longitude": None, "geohash": None}
+    return {
+        "latitude": announcement.latitude,
+        "longitude": announcement.longitude,
+        "geohash": geo.encode(announcement.latitude, announcement.longitude),
+    }
+
+def insert_announcements_statement():
+    """Многострочный INSERT ... RETURNING для пакетного создания (порядок строк сохраняется)."""
+    return insert(announcement_model.Announcement).returning(
+        announcement_model.Announcement, sort_by_parameter_order=True
+    )
+
+def bulk_rows(announcements: List[announcement_schema.AnnouncementCreate], owner: user_model.User) -> List[dict]:
+    """Параметры INSERT для пакета объявлений одного автора."""
+    return [
+        {
+            "title": announcement.title,
+            "description": announcement.description,
+            "price": announcement.price,
+            "owner_id": owner.id,
+            "region_id": owner.region_id,
+            **coordinates(announcement),
+        }
+        for announcement in announcements
+    ]
+
+def attach_owner(announcements, owner: user_model.User):
+    """Проставляет уже загруженного автора без запросов в БД (нужно для сериализации ответа)."""
+    for announcement in announcements:
+        set_committed_value(announcement, "owner", owner)
+    return announcements
+
+def is_live():
+    """Условие "объявление показывается": активно и срок еще не истек.
+
+    Статус подставляется в SQL литералом, а не параметром: с параметром
+    подготовленный (generic) план не смог бы выбрать частичные индексы
+    WHERE status = 'active'.
+    """
+    Announcement = announcement_model.Announcement
+    return and_(
+        Announcement.status == literal_column(f"'{announcement_model.ACTIVE}'"),
+        Announcement.expires_at > func.now(),
+    )
+
+def region_filter(region: str):
+    """Условие "объявление из региона"; неизвестный регион не совпадает ни с чем."""
+    region_id = region_lookup.id_of(region)
+    if region_id is None:
+        return false()
+    return announcement_model.Announcement.region_id == region_id
+
+def select_announcements(skip: int = 0, limit: int = 100, region: Optional[str] = None, cursor: Optional[str] = None):
+    """Запрос ленты объявлений (сначала новые). Неверный курсор приводит к ValueError."""
+    Announcement = announcement_model.Announcement
+    stmt = select(Announcement).options(_with_owner).where(is_live())
+
+    # Если регион передан, добавляем фильтр (по целому ключу из справочника)
+    if region:
+        stmt = stmt.where(region_filter(region))
+
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Announcement.created_at, Announcement.id) < tuple_(created_at, last_id))
+        skip = 0
+
+    stmt = stmt.order_by(Announcement.created_at.desc(), Announcement.id.desc())
+    return stmt.offset(skip).limit(limit)
+
+def select_search(q: str, limit: int = 20, region: Optional[str] = None, cursor: Optional[str] = None):
+    """Полнотекстовый поиск по заголовку и описанию, сначала самые релевантные.
+
+    Возвращает пары (объявление, rank). Неверный курсор приводит к ValueError.
+    """
+    Announcement = announcement_model.Announcement
+    # websearch_to_tsquery понимает обычный пользовательский ввод: слова, "фразы", -исключения
+    query = func.websearch_to_tsquery('russian', q)
+    rank = func.ts_rank_cd(Announcement.search_vector, query)
+
+    stmt = (
+        select(Announcement, rank.label("rank"))
+        .options(_with_owner)
+        .where(Announcement.search_vector.op("@@")(query))
+        .where(is_live())
+    )
+    if region:
+        stmt = stmt.where(region_filter(region))
+
+    if cursor:
+        last_rank, last_id = decode_rank_cursor(cursor)
+        stmt = stmt.where(tuple_(rank, Announcement.id) < tuple_(last_rank, last_id))
+
+    return stmt.order_by(rank.desc(), Announcement.id.desc()).limit(limit)
+
+def select_announcement_by_id(announcement_id: int):
+    """Запрос одного объявления по его ID."""
+    return (
+        select(announcement_model.Announcement)
+        .options(_with_owner)
+        .where(announcement_model.Announcement.id == announcement_id)
+        .where(is_live())
+    )
+
+def select_announcements_by_ids(ids: List[int]):
+    """Запрос объявлений по списку ID."""
+    return (
+        select(announcement_model.Announcement)
+        .options(_with_owner)
+        .where(announcement_model.Announcement.id.in_(ids))
+        .where(is_live())
+    )
+
+def order_by_ids(announcements, ids: List[int]):
+    """Расставляет найденные объявления в порядке запрошенных ID; ненайденные пропускаются."""
+    by_id = {announcement.id: announcement for announcement in announcements}
+    return [by_id[announcement_id] for announcement_id in ids if announcement_id in by_id]
+
+def select_announcements_by_owner_id(owner_id: int, limit: int = 50, cursor: Optional[str] = None):
+    """Страница объявлений пользователя (сначала новые). Неверный курсор приводит к ValueError."""
+    Announcement = announcement_model.Announcement
+    stmt = select(Announcement).options(_with_owner).where(Announcement.owner_id == owner_id, is_live())
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Announcement.created_at, Announcement.id) < tuple_(created_at, last_id))
+    return stmt.order_by(Announcement.created_at.desc(), Announcement.id.desc()).limit(limit)
+
+# Счетчики меняются без синхронизации объектов сессии: в ответах они не участвуют
+_COUNTER_OPTIONS = {"synchronize_session": False}
+
+def counter_statements(region_id: Optional[int], owner_id: int, delta: int):
+    """UPDATE счетчиков объявлений региона и автора; выполняются в транзакции вставки/удаления.
+
+    Так "N объявлений в регионе" и число объявлений пользователя читаются одной
+    строкой, без COUNT(*) по announcements.
+    """
+    User = user_model.User
+    statements = [
+        update(User)
+        .where(User.id == owner_id)
+        # Счетчик - не изменение профиля: updated_at (и ETag автора) не трогаем
+        .values(announcement_count=User.announcement_count + delta, updated_at=User.updated_at)
+        .execution_options(**_COUNTER_OPTIONS)
+    ]
+    if region_id is not None:
+        statements.append(
+            update(Region)
+            .where(Region.id == region_id)
+            .values(announcement_count=Region.announcement_count + delta)
+            .execution_options(**_COUNTER_OPTIONS)
+        )
+    return statements
+
+def counter_deltas(rows: Iterable[Tuple[Optional[int], int]]):
+    """UPDATE счетчиков для снятых с показа строк (region_id, owner_id): по одному на пару."""
+    statements = []
+    for (region_id, owner_id), count in Counter(rows).items():
+        statements.extend(counter_statements(region_id, owner_id, -count))
+    return statements
+
+def update_values(changes: dict) -> dict:
+    """Значения колонок для изменения объявления; при смене точки пересчитывается геохеш."""
+    values = dict(changes)
+    if "latitude" in values:
+        lat, lon = values["latitude"], values["longitude"]
+        values["geohash"] = geo.encode(lat, lon) if lat is not None else None
+    return values
+
+def soft_delete_statement(announcement_id: int):
+    """Снимает активное объявление с показа. Возвращает (region_id, owner_id) или ничего, если оно уже неактивно."""
+    Announcement = announcement_model.Announcement
+    return (
+        update(Announcement)
+        .where(Announcement.id == announcement_id, Announcement.status == announcement_model.ACTIVE)
+        .values(status=announcement_model.DELETED)
+        .returning(Announcement.region_id, Announcement.owner_id)
+        .execution_options(synchronize_session=False)
+    )
+
+def expire_statement(batch_size: int):
+    """Помечает истекшими до batch_size активных объявлений с прошедшим expires_at.
+
+    Строки, которые сейчас меняет кто-то другой, пропускаются (SKIP LOCKED) -
+    до них дойдет следующая пачка. Возвращает (region_id, owner_id) для счетчиков.
+    """
+    Announcement = announcement_model.Announcement
+    batch = (
+        select(Announcement.id)
+        .where(Announcement.status == literal_column(f"'{announcement_model.ACTIVE}'"))
+        .where(Announcement.expires_at <= func.now())
+        .order_by(Announcement.expires_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(Announcement)
+        .where(Announcement.id.in_(batch.scalar_subquery()))
+        .values(status=announcement_model.EXPIRED)
+        .returning(Announcement.region_id, Announcement.owner_id)
+        .execution_options(synchronize_session=False)
     )
+
+# Колонки, которые переносятся в архив
+_ARCHIVED_COLUMNS = [
+    "id", "title", "description", "price", "region_id", "owner_id",
+    "latitude", "longitude", "status", "created_at", "updated_at", "expires_at",
+]
+
+def archive_statement(batch_size: int):
+    """Переносит до batch_size неактивных объявлений в announcements_archive одним запросом.
+
+    DELETE ... RETURNING и INSERT в архив выполняются как CTE одного
+    оператора. Возвращает (image_url, image_thumb_url) перенесенных строк.
+    """
+    Announcement = announcement_model.Announcement
+    batch = (
+        select(Announcement.id)
+        .where(Announcement.status != literal_column(f"'{announcement_model.ACTIVE}'"))
+        .order_by(Announcement.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    moved = (
+        delete(Announcement)
+        .where(Announcement.id.in_(batch.scalar_subquery()))
+        .returning(*(getattr(Announcement, name) for name in _ARCHIVED_COLUMNS), Announcement.image_url, Announcement.image_thumb_url)
+        .cte("moved")
+    )
+    archived = (
+        insert(AnnouncementArchive)
+        .from_select(_ARCHIVED_COLUMNS, select(*(moved.c[name] for name in _ARCHIVED_COLUMNS)))
+        .cte("archived")
+    )
+    return select(moved.c.image_url, moved.c.image_thumb_url).add_cte(archived)
+
+def select_image_urls_in_use(urls: List[str]):
+    """Какие из картинок еще нужны оставшимся объявлениям (одинаковые фото хранятся одним файлом)."""
+    Announcement = announcement_model.Announcement
+    return select(Announcement.image_url).where(Announcement.image_url.in_(urls)).distinct()
+
+def unused_image_urls(rows, in_use) -> List[str]:
+    """Файлы перенесенных в архив объявлений, которые можно удалить с диска."""
+    in_use = set(in_use)
+    urls = []
+    for image_url, thumb_url in rows:
+        if image_url and image_url not in in_use:
+            urls.append(image_url)
+            if thumb_url:
+                urls.append(thumb_url)
+    return urls
+
+def distance_km(lat: float, lon: float):
+    """Расстояние по большому кругу (гаверсинус) от точки до объявления, км."""
+    Announcement = announcement_model.Announcement
+    haversine = (
+        func.power(func.sin(func.radians(Announcement.latitude - lat) / 2), 2)
+        + func.cos(func.radians(lat)) * func.cos(func.radians(Announcement.latitude))
+        * func.power(func.sin(func.radians(Announcement.longitude - lon) / 2), 2)
+    )
+    # least: погрешность округления не должна выводить аргумент asin за 1
+    return 2 * geo.EARTH_RADIUS_KM * func.asin(func.sqrt(func.least(haversine, 1.0)))
+
+def select_nearby(lat: float, lon: float, radius_km: float, limit: int = 50):
+    """Объявления в радиусе radius_km от точки, сначала ближайшие.
+
+    Возвращает пары (объявление, расстояние). Кандидаты выбираются диапазонами
+    индекса ix_announcements_geohash по ячейкам, накрывающим круг, и только
+    для них считается точное расстояние.
+    """
+    Announcement = announcement_model.Announcement
+    cells = [
+        and_(Announcement.geohash >= start, Announcement.geohash < end)
+        for start, end in map(geo.prefix_range, geo.cover(lat, lon, radius_km))
+    ]
+    distance = distance_km(lat, lon)
+    return (
+        select(Announcement, distance.label("distance_km"))
+        .options(_with_owner)
+        .where(or_(*cells))
+        .where(is_live())
+        .where(distance <= radius_km)
+        .order_by(distance, Announcement.id)
+        .limit(limit)
+    )
+
+def get_nearby_page(rows):
+    """Переносит расстояние в объект объявления (поле distance_km в ответе)."""
+    announcements = []
+    for announcement, distance in rows:
+        announcement.distance_km = round(distance, 3)
+        announcements.append(announcement)
+    return announcements
+
+def create_announcement(db: Session, announcement: announcement_schema.AnnouncementCreate, owner: user_model.User, image_url: Optional[str] = None, enqueue_image: bool = False):
+    """Создает новое объявление, автоматически подставляя регион из профиля автора.
+
+    С enqueue_image задача обработки картинки ставится в очередь той же транзакцией:
+    объявление не может появиться без задачи, а задача - без объявления.
+    """
+    db_announcement = build_announcement(announcement, owner, image_url)
     db.add(db_announcement)
+    db.flush()
+    announcement_id, region = db_announcement.id, db_announcement.region
+    for stmt in counter_statements(owner.region_id, owner.id, 1):
+        db.execute(stmt)
+    if enqueue_image and image_url:
+        db.execute(job_crud.process_image_statement(announcement_id, image_url))
     db.commit()
-    db.refresh(db_announcement)
+    feed_cache.invalidate_region(region)
+    mark_written(user_id=owner.id, region=region, feed=True)
+    # Перечитываем объявление вместе с автором одним запросом, чтобы ответ
+    # сериализовался без ленивых подгрузок (в т.ч. вне потока этой сессии).
+    db_announcement = get_announcement_by_id(db, announcement_id)
+    import feed_events  # отложенный импорт: модуль нужен только при создании объявлений
+    feed_events.publish_announcements([db_announcement])
     return db_announcement
 
-def get_announcements(db: Session, skip: int = 0, limit: int = 100, region: Optional[str] = None):
-    """Возвращает список объявлений с возможностью фильтрации по региону."""
-    query = db.query(announcement_model.Announcement)
-    
-    # Если регион передан, добавляем фильтр
-    if region:
-        query = query.filter(announcement_model.Announcement.region == region)
-        
-    return query.offset(skip).limit(limit).all()
+def create_announcements_bulk(db: Session, announcements: List[announcement_schema.AnnouncementCreate], owner: user_model.User):
+    """Создает пачку объявлений одного автора в одной транзакции многострочным INSERT."""
+    created = db.scalars(insert_announcements_statement(), bulk_rows(announcements, owner)).all()
+    for stmt in counter_statements(owner.region_id, owner.id, len(created)):
+        db.execute(stmt)
+    db.commit()
+    feed_cache.invalidate_region(owner.region)
+    mark_written(user_id=owner.id, region=owner.region, feed=True)
+    attach_owner(created, owner)
+    import feed_events
+    feed_events.publish_announcements(created)
+    return created
+
+def update_announcement(db: Session, db_announcement, changes: dict):
+    """Меняет переданные поля объявления (changes - уже проверенный AnnouncementUpdate без незаданных полей)."""
+    for name, value in update_values(changes).items():
+        setattr(db_announcement, name, value)
+    announcement_id, owner_id, region = db_announcement.id, db_announcement.owner_id, db_announcement.region
+    db.commit()
+    feed_cache.invalidate_region(region)
+    mark_written(user_id=owner_id, region=region, feed=True)
+    return get_announcement_by_id(db, announcement_id)
+
+def delete_announcement(db: Session, announcement_id: int) -> bool:
+    """Удаляет объявление (мягко: статус deleted). False - оно уже было неактивным.
+
+    Строка и картинки убираются позже, при архивировании (archival.py).
+    """
+    row = db.execute(soft_delete_statement(announcement_id)).first()
+    if row is None:
+        db.rollback()
+        return False
+    region_id, owner_id = row
+    for stmt in counter_statements(region_id, owner_id, -1):
+        db.execute(stmt)
+    db.commit()
+    region = region_lookup.name_of(region_id)
+    feed_cache.invalidate_region(region)
+    mark_written(user_id=owner_id, region=region, feed=True)
+    return True
+
+def expire_announcements(db: Session, batch_size: int) -> int:
+    """Одна пачка: истекшие объявления снимаются с показа, счетчики уменьшаются. Возвращает число строк."""
+    rows = db.execute(expire_statement(batch_size)).all()
+    for stmt in counter_deltas(map(tuple, rows)):
+        db.execute(stmt)
+    db.commit()
+    for region_id in {region_id for region_id, _ in rows}:
+        region = region_lookup.name_of(region_id)
+        feed_cache.invalidate_region(region)
+        mark_written(region=region, feed=True)
+    return len(rows)
+
+def archive_announcements(db: Session, batch_size: int) -> Tuple[int, List[str]]:
+    """Одна пачка: неактивные объявления переносятся в архив.
+
+    Возвращает число перенесенных строк и URL картинок, которые больше никому не нужны.
+    """
+    rows = db.execute(archive_statement(batch_size)).all()
+    db.commit()
+    image_urls = [image_url for image_url, _ in rows if image_url]
+    in_use = []
+    if image_urls:
+        in_use = db.scalars(select_image_urls_in_use(image_urls)).all()
+    return len(rows), unused_image_urls(rows, in_use)
+
+def get_announcements(db: Session, skip: int = 0, limit: int = 100, region: Optional[str] = None, cursor: Optional[str] = None):
+    """Возвращает список объявлений (сначала новые) с возможностью фильтрации по региону.
+
+    Если передан курсор, выборка продолжается с позиции после него (keyset-пагинация),
+    и параметр skip игнорируется. Неверный курсор приводит к ValueError.
+    """
+    return db.scalars(select_announcements(skip=skip, limit=limit, region=region, cursor=cursor)).all()
+
+def get_next_cursor(announcements, limit: int) -> Optional[str]:
+    """Возвращает курсор следующей страницы или None, если страница последняя."""
+    if not announcements or len(announcements) < limit:
+        return None
+    last = announcements[-1]
+    return encode_cursor(last.created_at, last.id)
+
+def search_announcements(db: Session, q: str, limit: int = 20, region: Optional[str] = None, cursor: Optional[str] = None):
+    """Ищет объявления по словам. Возвращает (объявления, курсор следующей страницы)."""
+    rows = db.execute(select_search(q, limit=limit, region=region, cursor=cursor)).all()
+    return get_search_page(rows, limit)
+
+def get_search_page(rows, limit: int):
+    """Разбирает строки (объявление, rank) поиска на список и курсор следующей страницы."""
+    announcements = [row[0] for row in rows]
+    next_cursor = None
+    if rows and len(rows) == limit:
+        last_announcement, last_rank = rows[-1]
+        next_cursor = encode_rank_cursor(last_rank, last_announcement.id)
+    return announcements, next_cursor
 
 def get_announcement_by_id(db: Session, announcement_id: int):
     """Возвращает одно объявление по его ID."""
-    return db.query(announcement_model.Announcement).filter(announcement_model.Announcement.id == announcement_id).first()
+    return db.scalars(select_announcement_by_id(announcement_id)).first()
+
+def get_announcements_by_ids(db: Session, ids: List[int]):
+    """Возвращает объявления по списку ID в запрошенном порядке."""
+    return order_by_ids(db.scalars(select_announcements_by_ids(ids)).all(), ids)
+
+def get_announcements_by_owner_id(db: Session, owner_id: int, limit: int = 50, cursor: Optional[str] = None):
+    """Возвращает страницу объявлений пользователя. Неверный курсор приводит к ValueError."""
+    return db.scalars(select_announcements_by_owner_id(owner_id, limit=limit, cursor=cursor)).all()
 
-def get_announcements_by_owner_id(db: Session, owner_id: int):
-    """Возвращает все объявления указанного пользователя."""
-    return db.query(announcement_model.Announcement).filter(announcement_model.Announcement.owner_id == owner_id).all()
\ No newline at end of file
+def get_nearby_announcements(db: Session, lat: float, lon: float, radius_km: float, limit: int = 50):
+    """Возвращает объявления в радиусе radius_km, отсортированные по расстоянию."""
+    return get_nearby_page(db.execute(select_nearby(lat, lon, radius_km, limit=limit)).all())
+
+def image_url_in_use(db: Session, image_url: str) -> bool:
+    """Ссылается ли на файл хоть одно объявление (например, еще не обработанное с той же картинкой)."""
+    return db.scalars(select_image_urls_in_use([image_url])).first() is not None
+
+def is_announcement_live(db: Session, announcement_id: int) -> bool:
+    """Показывается ли еще объявление (не удалено, не в архиве, срок не истек)."""
+    Announcement = announcement_model.Announcement
+    return db.scalar(select(Announcement.id).where(Announcement.id == announcement_id, is_live())) is not None
+
+def set_image_variants(db: Session, announcement_id: int, image_url: str, thumb_url: str) -> bool:
+    """Записывает в объявление URL обработанной картинки и ее миниатюры.
+
+    Только если объявление еще показывается; возвращает False, если его уже
+    удалили или перенесли в архив и ничего не записано.
+    """
+    Announcement = announcement_model.Announcement
+    row = db.execute(
+        update(Announcement)
+        .where(Announcement.id == announcement_id, is_live())
+        .values(image_url=image_url, image_thumb_url=thumb_url)
+        .returning(Announcement.region_id)
+    ).first()
+    db.commit()
+    if row is None:
+        return False
+    region = region_lookup.name_of(row.region_id)
+    feed_cache.invalidate_region(region)
+    mark_written(region=region, feed=True)
+    return True
@@ -0,0 +1,127 @@
+# crud/async_announcement.py
+# Асинхронные версии функций из crud/announcement.py. SQL у них общий.
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Tuple
+from crud import announcement as announcement_crud
+from crud import job as job_crud
+from schemas import announcement as announcement_schema
+from models import user as user_model
+from cache import feed_cache
+from database import mark_written
+from regions import region_lookup
+
+async def create_announcement(db: AsyncSession, announcement: announcement_schema.AnnouncementCreate, owner: user_model.User, image_url: Optional[str] = None, enqueue_image: bool = False):
+    """Создает новое объявление, автоматически подставляя регион из профиля автора.
+
+    С enqueue_image задача обработки картинки ставится в очередь той же транзакцией.
+    """
+    db_announcement = announcement_crud.build_announcement(announcement, owner, image_url)
+    db.add(db_announcement)
+    for stmt in announcement_crud.counter_statements(owner.region_id, owner.id, 1):
+        await db.execute(stmt)
+    if enqueue_image and image_url:
+        await db.flush()
+        await db.execute(job_crud.process_image_statement(db_announcement.id, image_url))
+    await db.commit()
+    feed_cache.invalidate_region(db_announcement.region)
+    mark_written(user_id=owner.id, region=db_announcement.region, feed=True)
+    # Перечитываем только серверные значения: автор уже загружен, а ленивая
+    # подгрузка связи в асинхронной сессии невозможна.
+    await db.refresh(db_announcement, attribute_names=["created_at", "updated_at", "expires_at"])
+    import feed_events  # отложенный импорт: модуль нужен только при создании объявлений
+    feed_events.publish_announcements([db_announcement])
+    return db_announcement
+
+async def create_announcements_bulk(db: AsyncSession, announcements: List[announcement_schema.AnnouncementCreate], owner: user_model.User):
+    """Создает пачку объявлений одного автора в одной транзакции многострочным INSERT."""
+    result = await db.scalars(announcement_crud.insert_announcements_statement(), announcement_crud.bulk_rows(announcements, owner))
+    created = result.all()
+    for stmt in announcement_crud.counter_statements(owner.region_id, owner.id, len(created)):
+        await db.execute(stmt)
+    await db.commit()
+    feed_cache.invalidate_region(owner.region)
+    mark_written(user_id=owner.id, region=owner.region, feed=True)
+    announcement_crud.attach_owner(created, owner)
+    import feed_events
+    feed_events.publish_announcements(created)
+    return created
+
+async def update_announcement(db: AsyncSession, db_announcement, changes: dict):
+    """Меняет переданные поля объявления (changes - уже проверенный AnnouncementUpdate без незаданных полей)."""
+    for name, value in announcement_crud.update_values(changes).items():
+        setattr(db_announcement, name, value)
+    await db.commit()
+    feed_cache.invalidate_region(db_announcement.region)
+    mark_written(user_id=db_announcement.owner_id, region=db_announcement.region, feed=True)
+    await db.refresh(db_announcement, attribute_names=["updated_at"])
+    return db_announcement
+
+async def delete_announcement(db: AsyncSession, announcement_id: int) -> bool:
+    """Удаляет объявление (мягко: статус deleted). False - оно уже было неактивным."""
+    row = (await db.execute(announcement_crud.soft_delete_statement(announcement_id))).first()
+    if row is None:
+        await db.rollback()
+        return False
+    region_id, owner_id = row
+    for stmt in announcement_crud.counter_statements(region_id, owner_id, -1):
+        await db.execute(stmt)
+    await db.commit()
+    region = region_lookup.name_of(region_id)
+    feed_cache.invalidate_region(region)
+    mark_written(user_id=owner_id, region=region, feed=True)
+    return True
+
+async def expire_announcements(db: AsyncSession, batch_size: int) -> int:
+    """Одна пачка: истекшие объявления снимаются с показа, счетчики уменьшаются. Возвращает число строк."""
+    rows = (await db.execute(announcement_crud.expire_statement(batch_size))).all()
+    for stmt in announcement_crud.counter_deltas(map(tuple, rows)):
+        await db.execute(stmt)
+    await db.commit()
+    for region_id in {region_id for region_id, _ in rows}:
+        region = region_lookup.name_of(region_id)
+        feed_cache.invalidate_region(region)
+        mark_written(region=region, feed=True)
+    return len(rows)
+
+async def archive_announcements(db: AsyncSession, batch_size: int) -> Tuple[int, List[str]]:
+    """Одна пачка: неактивные объявления переносятся в архив.
+
+    Возвращает число перенесенных строк и URL картинок, которые больше никому не нужны.
+    """
+    rows = (await db.execute(announcement_crud.archive_statement(batch_size))).all()
+    await db.commit()
+    image_urls = [image_url for image_url, _ in rows if image_url]
+    in_use = []
+    if image_urls:
+        in_use = (await db.scalars(announcement_crud.select_image_urls_in_use(image_urls))).all()
+    return len(rows), announcement_crud.unused_image_urls(rows, in_use)
+
+async def get_announcements(db: AsyncSession, skip: int = 0, limit: int = 100, region: Optional[str] = None, cursor: Optional[str] = None):
+    """Возвращает список объявлений (сначала новые). Неверный курсор приводит к ValueError."""
+    result = await db.scalars(announcement_crud.select_announcements(skip=skip, limit=limit, region=region, cursor=cursor))
+    return result.all()
+
+async def search_announcements(db: AsyncSession, q: str, limit: int = 20, region: Optional[str] = None, cursor: Optional[str] = None):
+    """Ищет объявления по словам. Возвращает (объявления, курсор следующей страницы)."""
+    result = await db.execute(announcement_crud.select_search(q, limit=limit, region=region, cursor=cursor))
+    return announcement_crud.get_search_page(result.all(), limit)
+
+async def get_nearby_announcements(db: AsyncSession, lat: float, lon: float, radius_km: float, limit: int = 50):
+    """Возвращает объявления в радиусе radius_km, отсортированные по расстоянию."""
+    result = await db.execute(announcement_crud.select_nearby(lat, lon, radius_km, limit=limit))
+    return announcement_crud.get_nearby_page(result.all())
+
+async def get_announcement_by_id(db: AsyncSession, announcement_id: int):
+    """Возвращает одно объявление по его ID."""
+    result = await db.scalars(announcement_crud.select_announcement_by_id(announcement_id))
+    return result.first()
+
+async def get_announcements_by_ids(db: AsyncSession, ids: List[int]):
+    """Возвращает объявления по списку ID в запрошенном порядке."""
+    result = await db.scalars(announcement_crud.select_announcements_by_ids(ids))
+    return announcement_crud.order_by_ids(result.all(), ids)
+
+async def get_announcements_by_owner_id(db: AsyncSession, owner_id: int, limit: int = 50, cursor: Optional[str] = None):
+    """Возвращает страницу объявлений пользователя. Неверный курсор приводит к ValueError."""
+    result = await db.scalars(announcement_crud.select_announcements_by_owner_id(owner_id, limit=limit, cursor=cursor))
+    return result.all()
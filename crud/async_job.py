@@ -0,0 +1,30 @@
+# crud/async_job.py
+# Асинхронные версии функций из crud/job.py. SQL у них общий.
+from sqlalchemy.ext.asyncio import AsyncSession
+from crud import job as job_crud
+
+async def enqueue_job(db: AsyncSession, kind: str, payload: dict, delay_seconds: float = 0) -> int:
+    """Ставит задачу в очередь и возвращает ее ID."""
+    job_id = await db.scalar(job_crud.enqueue_statement(kind, payload, delay_seconds))
+    await db.commit()
+    return job_id
+
+async def claim_jobs(db: AsyncSession, limit: int = 1):
+    """Забирает готовые задачи и сразу фиксирует это, чтобы не держать блокировки во время работы."""
+    await db.execute(job_crud.fail_abandoned_statement())
+    result = await db.scalars(job_crud.claim_statement(limit))
+    jobs = result.all()
+    await db.commit()
+    return jobs
+
+async def complete_job(db: AsyncSession, job_id: int):
+    await db.execute(job_crud.complete_statement(job_id))
+    await db.commit()
+
+async def retry_job(db: AsyncSession, job_id: int, error: str, delay_seconds: float):
+    await db.execute(job_crud.retry_statement(job_id, error, delay_seconds))
+    await db.commit()
+
+async def fail_job(db: AsyncSession, job_id: int, error: str):
+    await db.execute(job_crud.fail_statement(job_id, error))
+    await db.commit()
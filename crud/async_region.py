@@ -0,0 +1,18 @@
+# crud/async_region.py
+# Асинхронные версии функций из crud/region.py. SQL у них общий.
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from crud import region as region_crud
+from regions import region_lookup
+
+async def get_regions(db: AsyncSession):
+    result = await db.execute(region_crud.select_regions())
+    return result.all()
+
+async def load_region_lookup(db: AsyncSession):
+    region_lookup.load(await get_regions(db))
+
+async def refresh_region_lookup(db: AsyncSession, name: Optional[str] = None):
+    """Перечитывает справочник, если он устарел (с name - только если названия в нем нет)."""
+    if region_lookup.needs_refresh(name):
+        await load_region_lookup(db)
@@ -0,0 +1,34 @@
+# crud/async_user.py
+# Асинхронные версии функций из crud/user.py. SQL у них общий.
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from crud import user as user_crud
+from crud import async_region as region_crud
+from database import mark_written
+from schemas import user as user_schema
+
+async def get_user(db: AsyncSession, user_id: int):
+    result = await db.scalars(user_crud.select_user(user_id))
+    return result.first()
+
+async def get_or_create_user(db: AsyncSession, user: user_schema.UserCreate):
+    """Создает или обновляет пользователя. username, занятый другим пользователем, - ValueError."""
+    try:
+        result = await db.scalars(user_crud.upsert_user_statement(user), execution_options=user_crud.UPSERT_OPTIONS)
+        db_user = result.one()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise ValueError(f"Username is taken: {user.username}")
+    mark_written(user_id=user.id)
+    return db_user
+
+async def update_user_region(db: AsyncSession, user_id: int, region: Optional[str]):
+    """Меняет регион пользователя. Неизвестный регион приводит к ValueError."""
+    await region_crud.refresh_region_lookup(db, region)
+    result = await db.scalars(user_crud.update_region_statement(user_id, user_crud.region_id_for(region)), execution_options=user_crud.UPSERT_OPTIONS)
+    db_user = result.first()
+    await db.commit()
+    mark_written(user_id=user_id)
+    return db_user
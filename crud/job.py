@@ -0,0 +1,95 @@
+# crud/job.py
+import datetime
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from typing import Optional
+from config import settings
+from models.job import Job
+
+# Запросы общие с асинхронным слоем (crud/async_job.py), которым пользуется воркер.
+
+# Виды задач, которые ставит само приложение (обработчики - в jobs.py)
+PROCESS_IMAGE = "process_image"
+
+def enqueue_statement(kind: str, payload: dict, delay_seconds: float = 0, max_attempts: Optional[int] = None):
+    """INSERT задачи. С delay_seconds задача станет доступна воркерам не сразу."""
+    return insert(Job).values(
+        kind=kind,
+        payload=payload,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=func.now() + datetime.timedelta(seconds=delay_seconds),
+    ).returning(Job.id)
+
+def process_image_statement(announcement_id: int, image_url: str):
+    """Задача: миниатюра и очищенный от EXIF вариант картинки объявления."""
+    return enqueue_statement(PROCESS_IMAGE, {"announcement_id": announcement_id, "image_url": image_url})
+
+def _abandoned(stale_before):
+    """Задача в статусе running дольше JOB_LOCK_TIMEOUT_SECONDS: воркер упал или завис."""
+    return and_(Job.status == 'running', Job.locked_at < stale_before)
+
+def _stale_before():
+    return func.now() - datetime.timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+
+def claim_statement(limit: int = 1):
+    """Забирает до limit готовых задач одним запросом.
+
+    FOR UPDATE SKIP LOCKED: несколько воркеров не ждут друг друга и не берут
+    одну задачу дважды. Брошенные задачи забираются снова, пока у них остаются
+    попытки; задача, которая раз за разом роняет воркер, так не крутится вечно.
+    """
+    stale_before = _stale_before()
+    ready = (
+        select(Job.id)
+        .where(or_(
+            and_(Job.status == 'pending', Job.run_at <= func.now()),
+            and_(_abandoned(stale_before), Job.attempts < Job.max_attempts),
+        ))
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        update(Job)
+        .where(Job.id.in_(ready.scalar_subquery()))
+        .values(status='running', locked_at=func.now(), attempts=Job.attempts + 1)
+        .returning(Job)
+        .execution_options(synchronize_session=False)
+    )
+
+def fail_abandoned_statement():
+    """Брошенные задачи без оставшихся попыток переводятся в failed."""
+    return (
+        update(Job)
+        .where(_abandoned(_stale_before()), Job.attempts >= Job.max_attempts)
+        .values(status='failed', locked_at=None,
+                last_error=func.concat('Abandoned by a worker after ', Job.attempts, ' attempt(s); last error: ', Job.last_error))
+        .execution_options(synchronize_session=False)
+    )
+
+def complete_statement(job_id: int):
+    """Выполненная задача удаляется."""
+    return delete(Job).where(Job.id == job_id).execution_options(synchronize_session=False)
+
+def retry_statement(job_id: int, error: str, delay_seconds: float):
+    return (
+        update(Job)
+        .where(Job.id == job_id)
+        .values(status='pending', locked_at=None, last_error=error,
+                run_at=func.now() + datetime.timedelta(seconds=delay_seconds))
+        .execution_options(synchronize_session=False)
+    )
+
+def fail_statement(job_id: int, error: str):
+    return (
+        update(Job)
+        .where(Job.id == job_id)
+        .values(status='failed', locked_at=None, last_error=error)
+        .execution_options(synchronize_session=False)
+    )
+
+def enqueue_job(db: Session, kind: str, payload: dict, delay_seconds: float = 0) -> int:
+    """Ставит задачу в очередь и возвращает ее ID."""
+    job_id = db.scalar(enqueue_statement(kind, payload, delay_seconds))
+    db.commit()
+    return job_id
@@ -0,0 +1,23 @@
+# crud/price.py
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+from models.price import price_trends
+
+def get_prices_for_region(db: Session, region: str):
+    """Последние цены по культурам региона с трендом, из материализованного представления."""
+    stmt = (
+        select(
+            price_trends.c.crop.label("crop_name"),
+            price_trends.c.price,
+            price_trends.c.trend,
+            price_trends.c.observed_at,
+        )
+        .where(price_trends.c.region == region)
+        .order_by(price_trends.c.crop)
+    )
+    return db.execute(stmt).mappings().all()
+
+def refresh_price_trends(db: Session):
+    """Пересчитывает price_trends, не блокируя чтение эндпоинтом цен."""
+    db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY price_trends"))
+    db.commit()
@@ -0,0 +1,57 @@
+# crud/region.py
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional
+from models.region import Region
+from regions import normalize, region_lookup
+
+def select_regions():
+    return select(Region.id, Region.name).order_by(Region.id)
+
+def get_regions(db: Session):
+    return db.execute(select_regions()).all()
+
+def load_region_lookup(db: Session):
+    """Загружает справочник регионов в память (при старте приложения)."""
+    region_lookup.load(get_regions(db))
+
+def refresh_region_lookup(db: Session, name: Optional[str] = None):
+    """Перечитывает справочник, если он устарел (с name - только если названия в нем нет)."""
+    if region_lookup.needs_refresh(name):
+        load_region_lookup(db)
+
+def new_region_names(names: Iterable[str]) -> List[str]:
+    """Названия, которых еще нет в справочнике ни в каком написании, без лишних пробелов."""
+    seen, result = set(), []
+    for name in names:
+        clean = " ".join(name.split())
+        key = normalize(clean)
+        if key and key not in seen and region_lookup.id_of(clean) is None:
+            seen.add(key)
+            result.append(clean)
+    return result
+
+def insert_regions_statement(names: List[str]):
+    """INSERT ... ON CONFLICT DO NOTHING: повторное добавление того же названия не ошибка."""
+    return insert(Region).values([{"name": name} for name in names]).on_conflict_do_nothing(index_elements=[Region.name])
+
+def add_regions(db: Session, names: Iterable[str]) -> List[str]:
+    """Заводит новые регионы и перечитывает справочник. Возвращает добавленные названия."""
+    load_region_lookup(db)
+    added = new_region_names(names)
+    if added:
+        db.execute(insert_regions_statement(added))
+        db.commit()
+        load_region_lookup(db)
+    return added
+
+def select_region_stats(region_id: Optional[int] = None):
+    stmt = select(Region.id, Region.name, Region.announcement_count).order_by(Region.name)
+    if region_id is not None:
+        stmt = stmt.where(Region.id == region_id)
+    return stmt
+
+def get_region_stats(db: Session, region_id: Optional[int] = None):
+    """Число объявлений по регионам - из поддерживаемых счетчиков, без COUNT(*)."""
+    return db.execute(select_region_stats(region_id)).mappings().all()
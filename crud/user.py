@@ -1,35 +1,93 @@
 # crud/user.py
+from sqlalchemy import case, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from typing import Optional
 from models import user as user_model
+from crud import region as region_crud
+from database import mark_written
+from regions import region_lookup
 from schemas import user as user_schema
 
-def get_user(db: Session, user_id: int):
-    return db.query(user_model.User).filter(user_model.User.id == user_id).first()
+# Запросы и сборка объектов общие с асинхронным слоем (crud/async_user.py)
+
+def select_user(user_id: int):
+    return select(user_model.User).where(user_model.User.id == user_id)
 
-def create_user(db: Session, user: user_schema.UserCreate):
-    # Создаем объект, явно передавая поля, которые есть в схеме
-    db_user = user_model.User(
+def upsert_user_statement(user: user_schema.UserCreate):
+    """INSERT ... ON CONFLICT (id) DO UPDATE ... RETURNING: один запрос вместо SELECT + INSERT.
+
+    Если пользователь уже есть, обновляются username и имя (их можно поменять в Telegram);
+    updated_at сдвигается, только когда что-то действительно изменилось.
+    username уникален: если он записан за другим пользователем, запрос падает с IntegrityError.
+    """
+    User = user_model.User
+    stmt = insert(User).values(
         id=user.id,
         username=user.username,
         first_name=user.first_name,
         last_name=user.last_name
         # region по умолчанию будет NULL
     )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    excluded = stmt.excluded
+    changed = or_(
+        User.username.is_distinct_from(excluded.username),
+        User.first_name.is_distinct_from(excluded.first_name),
+        User.last_name.is_distinct_from(excluded.last_name),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[User.id],
+        set_={
+            "username": excluded.username,
+            "first_name": excluded.first_name,
+            "last_name": excluded.last_name,
+            "updated_at": case((changed, func.now()), else_=User.updated_at),
+        },
+    ).returning(User)
+
+def region_id_for(region: Optional[str]) -> Optional[int]:
+    """Ключ региона по названию. Неизвестное название - ValueError (опечатки не плодят новые регионы)."""
+    if not region:
+        return None
+    region_id = region_lookup.id_of(region)
+    if region_id is None:
+        raise ValueError(f"Unknown region: {region}")
+    return region_id
+
+def update_region_statement(user_id: int, region_id: Optional[int]):
+    """UPDATE ... RETURNING: новый регион и свежая строка пользователя за один запрос."""
+    return (
+        update(user_model.User)
+        .where(user_model.User.id == user_id)
+        .values(region_id=region_id)
+        .returning(user_model.User)
+    )
+
+# Строки из RETURNING должны перезаписать объект, если он уже есть в сессии
+UPSERT_OPTIONS = {"populate_existing": True}
+
+def get_user(db: Session, user_id: int):
+    return db.scalars(select_user(user_id)).first()
 
 def get_or_create_user(db: Session, user: user_schema.UserCreate):
-    db_user = get_user(db, user_id=user.id)
-    if db_user:
-        return db_user
-    return create_user(db, user=user)
-
-def update_user_region(db: Session, user_id: int, region: str):
-    db_user = get_user(db, user_id=user_id)
-    if db_user:
-        db_user.region = region
+    """Создает или обновляет пользователя. username, занятый другим пользователем, - ValueError."""
+    # Одновременные первые запуски с одним id больше не упираются в первичный ключ:
+    # конфликт разрешает сам Postgres
+    try:
+        db_user = db.scalars(upsert_user_statement(user), execution_options=UPSERT_OPTIONS).one()
         db.commit()
-        db.refresh(db_user)
+    except IntegrityError:
+        db.rollback()
+        raise ValueError(f"Username is taken: {user.username}")
+    mark_written(user_id=user.id)
+    return db_user
+
+def update_user_region(db: Session, user_id: int, region: Optional[str]):
+    """Меняет регион пользователя. Неизвестный регион приводит к ValueError."""
+    # Регион могли завести уже после загрузки справочника этим процессом
+    region_crud.refresh_region_lookup(db, region)
+    db_user = db.scalars(update_region_statement(user_id, region_id_for(region)), execution_options=UPSERT_OPTIONS).first()
+    db.commit()
+    mark_written(user_id=user_id)
     return db_user
\ No newline at end of file
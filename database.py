@@ -1,16 +1,228 @@
 # database.py
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import logging
+import threading
+import time
+from typing import Callable, Optional
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from config import settings # Импортируем наши настройки
+from cache import MemoryCacheBackend
+from regions import region_lookup
+import metrics
 
-# 1. Создаем "движок" для подключения к базе данных.
-#    Он использует URL, который мы сформировали в config.py.
-engine = create_engine(settings.DATABASE_URL)
+logger = logging.getLogger(__name__)
+
+
+# 0. Пулы соединений со статистикой ожиданий.
+#    Стандартный QueuePool не считает, сколько раз запросу пришлось ждать свободное
+#    соединение, а именно это число нужно, чтобы подобрать размер пула.
+class _PoolStatsMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0       # сколько выдач соединения пришлось ждать
+        self.wait_time = 0.0      # суммарное время ожидания, секунды
+        self.timeout_count = 0    # сколько раз так и не дождались (TimeoutError)
+
+    def _do_get(self):
+        max_overflow = self._max_overflow
+        exhausted = max_overflow > -1 and self.checkedout() >= self.size() + max_overflow
+        if not exhausted:
+            return super()._do_get()
+
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            self.timeout_count += 1
+            raise
+        finally:
+            self.wait_count += 1
+            self.wait_time += time.perf_counter() - started
+
+
+class InstrumentedQueuePool(_PoolStatsMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_PoolStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _engine_options() -> dict:
+    """Общие настройки пула и соединений для синхронного и асинхронного движков."""
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def pool_stats(pool) -> dict:
+    """Снимок состояния пула для /api/health/db."""
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "wait_count": getattr(pool, "wait_count", 0),
+        "wait_time_ms": round(getattr(pool, "wait_time", 0.0) * 1000, 1),
+        "timeout_count": getattr(pool, "timeout_count", 0),
+    }
+
+
+# 1. Движки создаются при первом обращении к БД, а не при импорте: импорт
+#    приложения (и create_app в main.py) не подключает драйвер и не требует
+#    доступной базы, а движки, которые процессу не нужны (асинхронный в
+#    синхронном режиме, реплика без DB_REPLICA_URL), не создаются вовсе.
+#    Имена - как в метках метрик пулов: sync, async, replica_sync, replica_async.
+_engines: dict = {}
+_engines_lock = threading.Lock()
+
+
+def _has_replica() -> bool:
+    return bool(settings.DB_REPLICA_URL)
+
+
+def _create(name: str):
+    url = settings.DB_REPLICA_URL if name.startswith("replica") else settings.DATABASE_URL
+    if name.endswith("async"):
+        # Асинхронный движок на том же драйвере psycopg (он умеет работать в asyncio)
+        new_engine = create_async_engine(url, poolclass=InstrumentedAsyncQueuePool, **_engine_options())
+        sync_engine = new_engine.sync_engine
+    else:
+        new_engine = create_engine(url, poolclass=InstrumentedQueuePool, **_engine_options())
+        sync_engine = new_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    return new_engine
+
+
+def _get(name: str):
+    found = _engines.get(name)
+    if found is None:
+        with _engines_lock:
+            found = _engines.get(name)
+            if found is None:
+                found = _engines[name] = _create(name)
+    return found
+
+
+def get_engine():
+    """Синхронный движок основной базы."""
+    return _get("sync")
+
+
+def get_async_engine():
+    """Асинхронный движок основной базы (эндпоинты при settings.DB_ASYNC, воркер очереди)."""
+    return _get("async")
+
+
+# 1а. Движки реплики для чтения. Если реплика не настроена, это те же движки,
+#     что и выше, и get_read_db ничем не отличается от get_db.
+def get_replica_engine():
+    return _get("replica_sync") if _has_replica() else get_engine()
+
+
+def get_async_replica_engine():
+    return _get("replica_async") if _has_replica() else get_async_engine()
+
+
+# Старые имена (engine, async_engine, ...) для команд и бенчмарков: движок
+# создается при первом обращении к атрибуту модуля
+_LAZY_ENGINES = {
+    "engine": get_engine,
+    "async_engine": get_async_engine,
+    "replica_engine": get_replica_engine,
+    "async_replica_engine": get_async_replica_engine,
+}
+
+
+def __getattr__(name: str):
+    getter = _LAZY_ENGINES.get(name)
+    if getter is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getter()
+
+
+# 1б. Хуки для метрик: число и длительность SQL-запросов (в том числе в разрезе
+#     HTTP-запроса, см. metrics.MetricsMiddleware) и лог медленных запросов.
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["query_started"] = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+    metrics.record_query(elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        metrics.db_slow_queries.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement[:1000])
+
+def _all_engines():
+    """(имя, синхронный движок) уже созданных движков."""
+    return [
+        (name, getattr(created, "sync_engine", created))
+        for name, created in list(_engines.items())
+    ]
+
+def engine_pools() -> dict:
+    """Состояние пулов всех созданных движков для /api/health/db."""
+    return {name: pool_stats(pool_engine.pool) for name, pool_engine in _all_engines()}
+
+def _collect_pool_metrics():
+    samples = {"checked_out": [], "overflow": [], "wait_count": [], "timeout_count": []}
+    for name, pool_engine in _all_engines():
+        stats = pool_stats(pool_engine.pool)
+        for key in samples:
+            samples[key].append(({"engine": name}, stats[key]))
+    return [
+        ("db_pool_checked_out", "Connections currently checked out of the pool", samples["checked_out"]),
+        ("db_pool_overflow", "Overflow connections currently open", samples["overflow"]),
+        ("db_pool_wait_count", "Checkouts that had to wait for a free connection", samples["wait_count"]),
+        ("db_pool_timeout_count", "Checkouts that timed out waiting for a connection", samples["timeout_count"]),
+    ]
+
+metrics.registry.add_gauge_collector(_collect_pool_metrics)
 
 # 2. Создаем "фабрику сессий".
 #    Каждый экземпляр SessionLocal будет отдельной сессией (разговором) с базой данных.
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+#    Движок сессия берет через get_bind только при первом запросе, поэтому
+#    фабрики можно создать при импорте, не создавая движков.
+#    expire_on_commit=False: объекты, полученные через RETURNING, после commit
+#    отдаются в ответ как есть, без повторного SELECT при сериализации.
+def _lazily_bound(get_bind_engine: Callable):
+    class LazilyBoundSession(Session):
+        def get_bind(self, mapper=None, clause=None, **kw):
+            return get_bind_engine()
+    return LazilyBoundSession
+
+SessionLocal = sessionmaker(
+    class_=_lazily_bound(get_engine), autocommit=False, autoflush=False, expire_on_commit=False
+)
+
+# 2а. Фабрика асинхронных сессий. expire_on_commit=False обязателен: после commit
+#     объекты отдаются в ответ, а ленивая подгрузка атрибутов в asyncio невозможна.
+#     AsyncSession выполняет запросы через синхронную сессию, ей и нужен get_bind.
+AsyncSessionLocal = async_sessionmaker(
+    sync_session_class=_lazily_bound(lambda: get_async_engine().sync_engine),
+    autoflush=False, expire_on_commit=False,
+)
+
+# 2б. Сессии на реплике - только для чтения.
+ReplicaSessionLocal = sessionmaker(
+    class_=_lazily_bound(get_replica_engine), autocommit=False, autoflush=False, expire_on_commit=False
+)
+AsyncReplicaSessionLocal = async_sessionmaker(
+    sync_session_class=_lazily_bound(lambda: get_async_replica_engine().sync_engine),
+    autoflush=False, expire_on_commit=False,
+)
 
 # 3. Создаем базовый класс для наших моделей.
 #    Все наши будущие модели таблиц (User, Announcement и т.д.) будут наследоваться от него.
@@ -28,4 +240,98 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    """
+    Асинхронный вариант get_db: отдает AsyncSession и закрывает ее после запроса.
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# 5. Чтение с реплики с гарантией "читаю свои записи".
+#    Реплика отстает от основной базы, поэтому после записи пользователь и регион
+#    на DB_READ_YOUR_WRITES_SECONDS "прилипают" к основной базе: только что
+#    созданное объявление не пропадает из собственного списка автора, а лента
+#    региона не попадает в кэш со старыми данными с реплики. Любое изменение
+#    объявлений пинит и общую ленту (ключ region:*), но только для эндпоинтов
+#    ленты (get_feed_read_db): остальные чтения без региона остаются на реплике.
+#    Отметки живут в памяти процесса (как кэш ленты); при нескольких воркерах
+#    MemoryCacheBackend заменяется общим хранилищем.
+_recent_writes = MemoryCacheBackend(max_entries=100_000)
+
+# Заголовок, которым клиент сообщает, кто читает (ID пользователя Telegram)
+USER_ID_HEADER = "X-User-Id"
+
+# Область "все регионы" - как у общей ленты в cache.FeedCache
+ALL_REGIONS = "*"
+
+
+def mark_written(user_id: Optional[int] = None, region: Optional[str] = None, feed: bool = False) -> None:
+    """Вызывается CRUD-функциями после commit. feed=True - изменились объявления (а с ними общая лента)."""
+    if not _has_replica():
+        return
+    ttl = settings.DB_READ_YOUR_WRITES_SECONDS
+    if user_id is not None:
+        _recent_writes.set(f"user:{user_id}", True, ttl)
+    if region:
+        _recent_writes.set(f"region:{region}", True, ttl)
+    if feed:
+        _recent_writes.set(f"region:{ALL_REGIONS}", True, ttl)
+
+
+def _reads_from_primary(request: Request, feed: bool = False) -> bool:
+    """Были ли недавно записи у пользователя или региона этого запроса (для ленты без региона - у любого)."""
+    user_id = (
+        request.path_params.get("user_id")
+        or request.headers.get(USER_ID_HEADER)
+        or request.query_params.get("current_user_id")
+    )
+    if user_id and _recent_writes.get(f"user:{user_id}"):
+        return True
+    region = request.path_params.get("region") or request.query_params.get("region")
+    if region:
+        return bool(_recent_writes.get(f"region:{region_lookup.canonical(region)}"))
+    return feed and bool(_recent_writes.get(f"region:{ALL_REGIONS}"))
+
+
+def _read_session(request: Request, feed: bool = False):
+    factory = SessionLocal if not _has_replica() or _reads_from_primary(request, feed) else ReplicaSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db(request: Request):
+    """
+    Зависимость для эндпоинтов, которые только читают: сессия на реплике,
+    а сразу после записи этого пользователя или региона - на основной базе.
+    """
+    yield from _read_session(request)
+
+def get_feed_read_db(request: Request):
+    """
+    get_read_db для ленты, которая кэшируется: после любого изменения объявлений
+    общая лента читается с основной базы, чтобы в кэш не попала страница с отстающей реплики.
+    """
+    yield from _read_session(request, feed=True)
+
+def async_read_sessionmaker(request: Request, feed: bool = False):
+    """Фабрика сессий для чтения в этом запросе - для кода, которому нужна своя сессия, а не зависимость."""
+    return AsyncSessionLocal if not _has_replica() or _reads_from_primary(request, feed) else AsyncReplicaSessionLocal
+
+async def get_async_read_db(request: Request):
+    """
+    Асинхронный вариант get_read_db.
+    """
+    async with async_read_sessionmaker(request)() as db:
+        yield db
+
+async def get_async_feed_read_db(request: Request):
+    """
+    Асинхронный вариант get_feed_read_db.
+    """
+    async with async_read_sessionmaker(request, feed=True)() as db:
+        yield db
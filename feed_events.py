@@ -0,0 +1,296 @@
+# feed_events.py
+# Рассылка новых объявлений подписчикам по регионам (WebSocket и SSE).
+#
+# Мини-приложение раньше опрашивало GET /api/announcements/?region=... в цикле.
+# Теперь оно подписывается на канал своего региона, а create_announcement
+# публикует в него новое объявление.
+#
+# Подписчик - это ограниченная asyncio.Queue, поэтому тысячи простаивающих
+# соединений ничего не стоят, кроме памяти. Публикация сериализует объявление
+# один раз и раскладывает готовую строку по очередям подписчиков канала
+# (put_nowait, без await). Подписчик, который не успевает читать, получает
+# None и отключается: клиент переподключится и дочитает пропущенное из ленты.
+#
+# Broker - интерфейс. MemoryBroker работает внутри одного процесса. При
+# нескольких воркерах uvicorn включается PostgresBroker (FEED_BROKER=postgres):
+# публикация идет через pg_notify, а каждый воркер слушает канал одним
+# соединением и раздает сообщения своим подписчикам через MemoryBroker.
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from starlette.websockets import WebSocketState
+
+import metrics
+import serialization
+from config import settings
+from database import get_engine
+from regions import region_lookup
+
+logger = logging.getLogger(__name__)
+
+feed_events_published = metrics.registry.register(metrics.Counter(
+    "feed_events_published_total", "Announcements published to region streams"))
+feed_subscribers_dropped = metrics.registry.register(metrics.Counter(
+    "feed_subscribers_dropped_total", "Stream subscribers disconnected for falling behind"))
+
+
+class Subscription:
+    """Очередь сообщений одного подписчика канала."""
+
+    def __init__(self, broker: "MemoryBroker", channel: str, max_queue: int):
+        self.broker = broker
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(max_queue)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Следующее сообщение. None - подписку закрыли (отстал или сервер останавливается).
+
+        По истечении timeout выбрасывает asyncio.TimeoutError.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+class Broker:
+    """Интерфейс брокера: подписка на канал и публикация в него готовой строки."""
+
+    async def subscribe(self, channel: str) -> Subscription:
+        raise NotImplementedError
+
+    def publish(self, channel: str, message: str) -> None:
+        """Можно вызывать и из event loop, и из потоков пула (sync-эндпоинты)."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class MemoryBroker(Broker):
+    """Каналы и подписчики внутри одного процесса.
+
+    Словарь каналов меняется только в потоке event loop, поэтому блокировки не нужны:
+    публикации из других потоков передаются в loop через call_soon_threadsafe.
+    """
+
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self._channels: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def subscribe(self, channel):
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(self, channel, self.max_queue)
+        self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._channels.get(subscription.channel)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._channels[subscription.channel]
+
+    def publish(self, channel, message):
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return  # еще никто не подписывался
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(channel, message)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, channel, message)
+
+    def _fan_out(self, channel: str, message: Optional[str]) -> None:
+        for subscription in list(self._channels.get(channel, ())):
+            try:
+                subscription.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscription)
+
+    def _drop(self, subscription: Subscription) -> None:
+        self._disconnect(subscription)
+        feed_subscribers_dropped.inc()
+
+    def _disconnect(self, subscription: Subscription) -> None:
+        self.unsubscribe(subscription)
+        # Освобождаем очередь и оставляем только сигнал "переподключись"
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+
+    async def close(self):
+        for channel in list(self._channels):
+            for subscription in list(self._channels[channel]):
+                self._disconnect(subscription)
+
+    def stats(self):
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(subscribers) for subscribers in self._channels.values()),
+        }
+
+
+class PostgresBroker(Broker):
+    """Брокер для нескольких процессов через LISTEN/NOTIFY.
+
+    Все регионы идут в один канал Postgres, имя региона - в начале сообщения.
+    Полезная нагрузка NOTIFY ограничена 8000 байт, объявление в нее помещается.
+    Сообщения, опубликованные пока слушатель переподключается, теряются -
+    клиенты дочитывают их из ленты.
+    """
+
+    PG_CHANNEL = "announcement_feed"
+
+    def __init__(self, local: MemoryBroker, database_url: str):
+        self.local = local
+        # psycopg принимает обычный URL без "+psycopg"
+        self.conninfo = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def subscribe(self, channel):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return await self.local.subscribe(channel)
+
+    def publish(self, channel, message):
+        payload = f"{channel}\n{message}"
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._notify(payload)
+        else:
+            # Из асинхронного эндпоинта: не блокируем event loop синхронным запросом
+            loop.run_in_executor(None, self._notify, payload)
+
+    def _notify(self, payload: str) -> None:
+        try:
+            with get_engine().begin() as conn:
+                conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.PG_CHANNEL, "payload": payload})
+        except Exception:
+            logger.exception("Failed to publish announcement to %s", self.PG_CHANNEL)
+
+    async def _listen(self) -> None:
+        import psycopg
+
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {self.PG_CHANNEL}")
+                    async for notify in conn.notifies():
+                        channel, _, message = notify.payload.partition("\n")
+                        self.local.publish(channel, message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Feed listener connection lost, reconnecting")
+                await asyncio.sleep(1.0)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        await self.local.close()
+
+    def stats(self):
+        return self.local.stats()
+
+
+def _create_broker() -> Broker:
+    local = MemoryBroker(settings.FEED_STREAM_QUEUE_SIZE)
+    if settings.FEED_BROKER == "postgres":
+        return PostgresBroker(local, settings.DATABASE_URL)
+    return local
+
+
+feed_broker = _create_broker()
+
+
+def publish_announcements(announcements: Iterable) -> None:
+    """Публикует только что созданные объявления в каналы их регионов.
+
+    Вызывается после commit; автор у объявлений должен быть уже загружен.
+    """
+    for announcement in announcements:
+        if not announcement.region:
+            continue
+        data = serialization.serialize_announcements([announcement])[0]
+        feed_broker.publish(announcement.region, serialization.dumps(data))
+        feed_events_published.inc()
+
+
+def _collect_stream_metrics():
+    stats = feed_broker.stats()
+    return [
+        ("feed_stream_channels", "Regions with at least one stream subscriber", [({}, stats["channels"])]),
+        ("feed_stream_subscribers", "Open WebSocket/SSE subscriptions", [({}, stats["subscribers"])]),
+    ]
+
+metrics.registry.add_gauge_collector(_collect_stream_metrics)
+
+
+async def sse_events(region: str):
+    """Тело ответа text/event-stream для подписчика региона."""
+    async with await feed_broker.subscribe(region_lookup.canonical(region)) as subscription:
+        # Через сколько мс браузерный EventSource переподключится после обрыва
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                message = await subscription.get(settings.FEED_STREAM_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # Комментарий SSE: клиент его игнорирует, а прокси не закрывают соединение
+                yield ": ping\n\n"
+                continue
+            if message is None:
+                return
+            yield f"event: announcement\ndata: {message}\n\n"
+
+
+async def serve_websocket(websocket: WebSocket, region: str) -> None:
+    """Пересылает объявления региона в уже принятый WebSocket, пока клиент не отключится."""
+    async with await feed_broker.subscribe(region_lookup.canonical(region)) as subscription:
+        sender = asyncio.create_task(_send_messages(websocket, subscription))
+        receiver = asyncio.create_task(_wait_disconnect(websocket))
+        done, pending = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+    if sender in done and websocket.client_state == WebSocketState.CONNECTED:
+        # Подписку закрыл сервер: 1013 "Try Again Later" - клиенту нужно переподключиться
+        await websocket.close(code=1013)
+
+
+async def _send_messages(websocket: WebSocket, subscription: Subscription) -> None:
+    while True:
+        message = await subscription.get()
+        if message is None:
+            return
+        try:
+            await websocket.send_text(message)
+        except (WebSocketDisconnect, RuntimeError):
+            return
+
+
+async def _wait_disconnect(websocket: WebSocket) -> None:
+    # Сообщения от клиента не нужны - читаем только чтобы заметить отключение
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
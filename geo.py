@@ -0,0 +1,111 @@
+# geo.py
+# Геохеш и покрытие круга ячейками - для поиска объявлений поблизости без PostGIS.
+#
+# У объявления хранится геохеш точки (строка из алфавита base32, см. encode).
+# У соседних точек общий префикс, поэтому ячейка геохеша - это диапазон строк,
+# и обычный B-tree индекс по колонке geohash отдает все точки ячейки одним
+# сканом диапазона. Круг радиуса R покрывается несколькими ячейками подходящего
+# размера (cover), в БД читаются только они, а точное расстояние считается
+# уже по этим строкам. Стоимость запроса зависит от числа объявлений рядом,
+# а не от размера таблицы.
+
+import math
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Точность хранимого геохеша: 9 символов - ячейка примерно 5 x 5 м
+GEOHASH_PRECISION = 9
+
+# Символ сразу после последнего в алфавите ('z'): диапазон [prefix, prefix + '{')
+# при побайтовом сравнении (COLLATE "C") содержит ровно строки с этим префиксом
+_PREFIX_END = "{"
+
+EARTH_RADIUS_KM = 6371.0
+
+# Предельный радиус поиска поблизости, км
+MAX_RADIUS_KM = 200.0
+
+# Больше ячеек - точнее покрытие, но больше диапазонов в запросе
+MAX_COVER_CELLS = 16
+
+
+def encode(lat: float, lon: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Геохеш точки."""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bit, value, even = 0, 0, True
+    while len(chars) < precision:
+        rng, coord = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if coord >= mid:
+            value = (value << 1) | 1
+            rng[0] = mid
+        else:
+            value <<= 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(_BASE32[value])
+            bit, value = 0, 0
+    return "".join(chars)
+
+
+def prefix_range(prefix: str) -> Tuple[str, str]:
+    """Полуинтервал строк [start, end) с данным префиксом."""
+    return prefix, prefix + _PREFIX_END
+
+
+def _cell_size(precision: int) -> Tuple[float, float]:
+    """Размер ячейки в градусах: (широта, долгота)."""
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """(юг, север, запад, восток) квадрата, описанного вокруг круга. Долготы могут выйти за ±180."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    # У полюса круг накрывает все долготы
+    cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+    if cos_lat < 1e-6:
+        return south, north, -180.0, 180.0
+    dlon = min(180.0, math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)))
+    return south, north, lon - dlon, lon + dlon
+
+
+def _cells(south: float, north: float, west: float, east: float, precision: int, limit: int) -> List[str]:
+    """Ячейки заданной точности, покрывающие прямоугольник, или [] если их больше limit."""
+    cell_lat, cell_lon = _cell_size(precision)
+    lat_start = math.floor((south + 90.0) / cell_lat)
+    lat_end = math.floor((min(north, 90.0 - 1e-9) + 90.0) / cell_lat)
+    lon_start = math.floor((west + 180.0) / cell_lon)
+    lon_end = math.floor((east + 180.0) / cell_lon)
+    lon_columns = min(lon_end - lon_start + 1, round(360.0 / cell_lon))
+    if (lat_end - lat_start + 1) * lon_columns > limit:
+        return []
+    cells = set()
+    for i in range(lat_start, lat_end + 1):
+        center_lat = -90.0 + (i + 0.5) * cell_lat
+        for j in range(lon_start, lon_start + lon_columns):
+            # Через антимеридиан (Чукотка) долгота переходит на другую сторону
+            center_lon = (-180.0 + (j + 0.5) * cell_lon + 180.0) % 360.0 - 180.0
+            cells.add(encode(center_lat, center_lon, precision))
+    return sorted(cells)
+
+
+def cover(lat: float, lon: float, radius_km: float, max_cells: int = MAX_COVER_CELLS) -> List[str]:
+    """Префиксы геохеша, ячейки которых вместе накрывают круг радиуса radius_km.
+
+    Берется самая мелкая точность, при которой ячеек не больше max_cells:
+    так в выборку попадает меньше всего лишних точек за углами круга.
+    """
+    south, north, west, east = bounding_box(lat, lon, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        cells = _cells(south, north, west, east, precision, max_cells)
+        if cells:
+            return cells
+    return list(_BASE32)
@@ -0,0 +1,51 @@
+# http_cache.py
+# Условные GET-запросы для JSON-эндпоинтов: слабый ETag считается по id и
+# updated_at объявлений (и их авторов), а при совпадении с If-None-Match
+# отдается пустой 304 - без сериализации и без передачи тела.
+
+import hashlib
+from typing import Iterable, Optional
+from fastapi import Request, Response
+
+# Ответ можно хранить, но перед использованием нужно перепроверить по ETag
+REVALIDATE = "no-cache"
+
+# Файлы в /uploads названы по содержимому и никогда не меняются
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _version(obj) -> str:
+    updated_at = getattr(obj, "updated_at", None)
+    return f"{obj.id}:{updated_at.timestamp() if updated_at else ''}"
+
+
+def announcements_etag(announcements: Iterable) -> str:
+    """Слабый ETag для одного или нескольких объявлений вместе с их авторами."""
+    digest = hashlib.blake2b(digest_size=16)
+    for announcement in announcements:
+        digest.update(_version(announcement).encode("ascii"))
+        digest.update(_version(announcement.owner).encode("ascii"))
+        digest.update(b";")
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Сравнение для If-None-Match всегда слабое: префикс W/ не учитывается
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+def validator_headers(etag: str) -> dict:
+    """Заголовки для перепроверки ответа по ETag - и в 200, и в 304."""
+    return {"ETag": etag, "Cache-Control": REVALIDATE}
+
+
+def not_modified_response(request: Request, etag: str) -> Optional[Response]:
+    """Готовый 304, если клиент прислал тот же ETag. Проверяется до сборки тела ответа."""
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=validator_headers(etag))
+    return None
@@ -0,0 +1,152 @@
+# images.py
+# Обработка загруженных картинок: поворот по EXIF, удаление метаданных,
+# уменьшение и перекодирование в WebP/JPEG. Выполняется в пуле процессов
+# уже после отправки ответа, чтобы не занимать ни event loop, ни потоки uvicorn.
+
+import asyncio
+import logging
+import os
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from config import settings
+from database import SessionLocal
+from crud import announcement as announcement_crud
+from uploads import remove_files, url_to_path
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional["ProcessPoolExecutor"] = None
+
+_EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+
+def get_executor() -> "ProcessPoolExecutor":
+    """Пул процессов создается при первой загрузке картинки."""
+    global _executor
+    if _executor is None:
+        # Импорт тянет multiprocessing - откладываем его до первой картинки, а не до старта
+        from concurrent.futures import ProcessPoolExecutor
+        _executor = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def render_variants(source_path: str, thumb_path: str, full_path: str, fmt: str, thumb_size: int, full_size: int) -> None:
+    """Создает миниатюру и полноразмерный вариант картинки. Работает в отдельном процессе."""
+    from PIL import Image, ImageOps  # Pillow нужен только в процессах-обработчиках
+
+    with Image.open(source_path) as original:
+        # Поворачиваем по EXIF-ориентации, после чего метаданные больше не нужны
+        image = ImageOps.exif_transpose(original)
+        if fmt == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+
+        for path, size in ((full_path, full_size), (thumb_path, thumb_size)):
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+            # Новый файл сохраняется без exif/icc - геометки и данные камеры не утекают
+            if fmt == "WEBP":
+                variant.save(path, "WEBP", quality=80, method=4)
+            else:
+                variant.save(path, "JPEG", quality=85, optimize=True, progressive=True)
+
+
+def variant_urls(image_url: str) -> Tuple[str, str]:
+    """URL миниатюры и полноразмерного варианта для исходного URL картинки."""
+    stem = os.path.splitext(image_url)[0]
+    ext = _EXTENSIONS[settings.IMAGE_FORMAT]
+    return f"{stem}_thumb.{ext}", f"{stem}_full.{ext}"
+
+
+async def render_announcement_image(announcement_id: int, image_url: str) -> None:
+    """Готовит варианты картинки и записывает их URL в объявление. Ошибки не глотает.
+
+    После успешной обработки image_url объявления указывает на полноразмерный
+    вариант без метаданных, а исходный файл (с EXIF) удаляется - если на него
+    не ссылаются другие, еще не обработанные объявления с той же картинкой.
+    Объявление, которое успели удалить или перенести в архив, не обрабатывается,
+    а уже готовые для него варианты удаляются, если больше никому не нужны.
+    Повторный вызов безопасен, поэтому задачу можно перезапускать (см. jobs.py).
+    """
+    source_path = url_to_path(image_url)
+    thumb_url, full_url = variant_urls(image_url)
+    thumb_path, full_path = url_to_path(thumb_url), url_to_path(full_url)
+    # Задача могла ждать в очереди, пока объявление удаляли или архивировали
+    if not await run_in_threadpool(_is_live, announcement_id):
+        return
+    # Файлы названы по хэшу содержимого: если такую картинку уже загружали,
+    # варианты готовы и пересчитывать их не нужно.
+    if not (os.path.exists(thumb_path) and os.path.exists(full_path)):
+        await _render(source_path, thumb_path, full_path)
+    if not await run_in_threadpool(_store_variant_urls, announcement_id, full_url, thumb_url):
+        # Объявление ушло в архив во время обработки - варианты остались бы сиротами
+        if not await run_in_threadpool(_url_in_use, full_url):
+            remove_files([thumb_url, full_url])
+        return
+    # Пока варианты не были записаны в объявление, их могла удалить архивация
+    # другого объявления с той же картинкой; теперь на них есть ссылка и удалять их не будут
+    if not (os.path.exists(thumb_path) and os.path.exists(full_path)):
+        await _render(source_path, thumb_path, full_path)
+
+    # Файлы общие для одинаковых картинок: исходник удаляет последняя из задач
+    source_in_use = await run_in_threadpool(_url_in_use, image_url)
+    if not source_in_use and os.path.exists(source_path):
+        os.remove(source_path)
+
+
+async def _render(source_path: str, thumb_path: str, full_path: str) -> None:
+    await asyncio.get_running_loop().run_in_executor(
+        get_executor(),
+        render_variants,
+        source_path,
+        thumb_path,
+        full_path,
+        settings.IMAGE_FORMAT,
+        settings.IMAGE_THUMB_SIZE,
+        settings.IMAGE_FULL_SIZE,
+    )
+
+
+async def process_announcement_image(announcement_id: int, image_url: str) -> None:
+    """Фоновая задача (BackgroundTasks): то же, что render_announcement_image, но с записью ошибки в лог."""
+    try:
+        await render_announcement_image(announcement_id, image_url)
+    except Exception:
+        logger.exception("Failed to process image %s for announcement %s", image_url, announcement_id)
+
+
+def _is_live(announcement_id: int) -> bool:
+    db = SessionLocal()
+    try:
+        return announcement_crud.is_announcement_live(db, announcement_id)
+    finally:
+        db.close()
+
+
+def _store_variant_urls(announcement_id: int, image_url: str, thumb_url: str) -> bool:
+    """Записывает URL вариантов. Возвращает False, если объявление уже не показывается."""
+    db = SessionLocal()
+    try:
+        return announcement_crud.set_image_variants(db, announcement_id, image_url=image_url, thumb_url=thumb_url)
+    finally:
+        db.close()
+
+
+def _url_in_use(url: str) -> bool:
+    """Ссылается ли на файл хоть одно объявление."""
+    db = SessionLocal()
+    try:
+        return announcement_crud.image_url_in_use(db, url)
+    finally:
+        db.close()
@@ -0,0 +1,112 @@
+# jobs.py
+# Фоновые задачи в таблице jobs и воркер, который их выполняет.
+#
+# Эндпоинт ставит задачу в очередь в той же транзакции, что и свои изменения
+# (см. crud.announcement.create_announcement), и сразу отвечает.
+# Воркер (worker.sh) - отдельный процесс, который масштабируется независимо
+# от uvicorn. Он забирает задачи через SELECT ... FOR UPDATE SKIP LOCKED, так
+# что воркеров можно запускать сколько угодно. Неудачная задача повторяется с
+# экспоненциальной паузой, после JOB_MAX_ATTEMPTS попыток остается в статусе
+# failed с текстом последней ошибки. Так же считаются попытки задачи, на которой
+# воркер упал: брошенная задача без оставшихся попыток тоже переходит в failed.
+#
+# Кроме задач из очереди воркер периодически архивирует объявления (archival.py).
+#
+# Задача может выполниться больше одного раза (воркер упал после работы, но до
+# удаления задачи), поэтому обработчики должны быть идемпотентными.
+
+import asyncio
+import logging
+import random
+import signal
+import traceback
+from typing import Awaitable, Callable, Dict
+
+from config import settings
+from database import AsyncSessionLocal
+from crud import async_job as job_crud
+from crud.job import PROCESS_IMAGE
+import archival
+import images
+
+logger = logging.getLogger(__name__)
+
+# kind -> async-функция, принимающая payload задачи как именованные аргументы
+HANDLERS: Dict[str, Callable[..., Awaitable[None]]] = {}
+
+def handler(kind: str):
+    """Регистрирует обработчик задач вида kind."""
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+@handler(PROCESS_IMAGE)
+async def _process_image(announcement_id: int, image_url: str) -> None:
+    await images.render_announcement_image(announcement_id, image_url)
+
+
+def retry_delay(attempt: int) -> float:
+    """Пауза перед следующей попыткой: экспонента с потолком и разбросом, чтобы повторы не шли пачкой."""
+    delay = min(settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempt - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def _execute(job) -> None:
+    func = HANDLERS.get(job.kind)
+    try:
+        if func is None:
+            raise LookupError(f"No handler for job kind {job.kind!r}")
+        await func(**job.payload)
+    except Exception:
+        error = traceback.format_exc(limit=20)
+        async with AsyncSessionLocal() as db:
+            if job.attempts >= job.max_attempts:
+                logger.error("Job %s (%s) failed after %s attempts", job.id, job.kind, job.attempts)
+                await job_crud.fail_job(db, job.id, error)
+            else:
+                delay = retry_delay(job.attempts)
+                logger.warning("Job %s (%s) attempt %s failed, retrying in %.0fs", job.id, job.kind, job.attempts, delay)
+                await job_crud.retry_job(db, job.id, error, delay)
+        return
+
+    async with AsyncSessionLocal() as db:
+        await job_crud.complete_job(db, job.id)
+
+
+async def _worker_loop(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            async with AsyncSessionLocal() as db:
+                claimed = await job_crud.claim_jobs(db, limit=1)
+        except Exception:
+            logger.exception("Failed to claim a job")
+            claimed = []
+
+        if not claimed:
+            # Очередь пуста: ждем следующего опроса или сигнала остановки
+            try:
+                await asyncio.wait_for(stop.wait(), settings.JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await _execute(claimed[0])
+
+
+async def run_worker(concurrency: int) -> None:
+    """Выполняет задачи, пока процесс не получит SIGINT/SIGTERM; начатые задачи дорабатываются."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Job worker started: %s concurrent job(s), handlers: %s", concurrency, ", ".join(sorted(HANDLERS)))
+    try:
+        await asyncio.gather(
+            archival.archive_periodically(stop),
+            *(_worker_loop(stop) for _ in range(concurrency)),
+        )
+    finally:
+        images.shutdown_executor()
+    logger.info("Job worker stopped")
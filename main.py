@@ -1,51 +1,58 @@
 # main.py
 
-import shutil
-import uuid
 import os
-from fastapi import FastAPI, Depends, HTTPException, APIRouter, File, UploadFile, Form
+import sys
+from fastapi import FastAPI, Depends, HTTPException, APIRouter, File, UploadFile, Form, Body, Query, Request, Response, BackgroundTasks, WebSocket
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 # Импортируем наши модули
-from database import get_db
+from config import settings
+from database import SessionLocal, get_db, get_read_db, get_feed_read_db, engine_pools
 from crud import user as user_crud
 from crud import announcement as announcement_crud
+from crud import price as price_crud
+from crud import region as region_crud
 from schemas import user as user_schema
 from schemas import announcement as announcement_schema
+from schemas import price as price_schema
+from schemas import region as region_schema
+from schemas import stats as stats_schema
+from regions import region_lookup
+from pagination import NEXT_CURSOR_HEADER, MAX_BATCH_IDS, parse_id_list
+from cache import feed_cache, announcement_response, feed_response
+from singleflight import SingleFlight
+from uploads import UPLOADS_DIR, FORM_OVERHEAD_BYTES, ImmutableStaticFiles, RequestSizeLimitMiddleware, save_upload
+import ratelimit
+import geo
+import metrics
+import serialization
 
-# --- Константы и начальная настройка ---
-UPLOADS_DIR = "uploads"
-
-# --- Создание экземпляра FastAPI и роутера ---
-app = FastAPI(
-    title="Farmer's App API",
-    description="API для приложения фермерского сообщества",
-    version="2.1.0-prefixed-storage"
-)
-
+# --- Роутер API. Само приложение собирает create_app() в конце файла ---
 api_router = APIRouter(prefix="/api")
 
-# --- Настройка CORS ---
-# Для продакшена лучше указать конкретные домены фронтенда
-origins = ["*"] 
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+async def shutdown_background():
+    """Останавливает пул обработки картинок и брокер ленты - если они вообще понадобились.
 
-# --- Создаем папку для загрузок при старте приложения ---
-os.makedirs(UPLOADS_DIR, exist_ok=True)
+    Модули images и feed_events импортируются при первом использовании, а не при старте.
+    """
+    images = sys.modules.get("images")
+    if images is not None:
+        images.shutdown_executor()
+    feed_events = sys.modules.get("feed_events")
+    if feed_events is not None:
+        await feed_events.feed_broker.close()
 
-# --- "Примонтируем" папку uploads для раздачи картинок ---
-# Любой запрос на /uploads/some_file.jpg будет искать файл в папке uploads на сервере
-app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
+def load_regions():
+    """Справочник регионов читается один раз при старте - дальше без обращений к БД."""
+    db = SessionLocal()
+    try:
+        region_crud.load_region_lookup(db)
+    finally:
+        db.close()
 
 
 # =================================================================
@@ -58,104 +65,395 @@ def health_check():
     """Проверка работоспособности сервера."""
     return {"status": "ok"}
 
+@api_router.get("/health/db", status_code=200, tags=["System"])
+def db_pool_health():
+    """Состояние пулов соединений с БД (для подбора DB_POOL_SIZE / DB_MAX_OVERFLOW).
+
+    Движки создаются при первом запросе к базе, поэтому в ответе только те,
+    которыми процесс уже пользовался (sync, async, replica_sync, replica_async).
+    """
+    return engine_pools()
+
+@api_router.get("/health/cache", status_code=200, tags=["System"])
+def feed_cache_health():
+    """Статистика кэша ленты объявлений этого процесса."""
+    return feed_cache.stats()
+
 # --- Эндпоинты для работы с пользователями ---
 @api_router.post("/users/get_or_create", response_model=user_schema.UserDisplay, tags=["Users"])
 def get_or_create_user_endpoint(user_data: user_schema.UserCreate, db: Session = Depends(get_db)):
-    return user_crud.get_or_create_user(db=db, user=user_data)
+    try:
+        return user_crud.get_or_create_user(db=db, user=user_data)
+    except ValueError:
+        raise HTTPException(status_code=409, detail="Username is already taken by another user")
 
 @api_router.get("/users/{user_id}", response_model=user_schema.UserDisplay, tags=["Users"])
-def get_user_endpoint(user_id: int, db: Session = Depends(get_db)):
+def get_user_endpoint(user_id: int, db: Session = Depends(get_read_db)):
     db_user = user_crud.get_user(db, user_id=user_id)
     if db_user is None: raise HTTPException(status_code=404, detail="User not found")
     return db_user
 
 @api_router.put("/users/{user_id}/region", response_model=user_schema.UserDisplay, tags=["Users"])
 def update_user_region_endpoint(user_id: int, region_data: user_schema.UserUpdate, db: Session = Depends(get_db)):
-    updated_user = user_crud.update_user_region(db=db, user_id=user_id, region=region_data.region)
+    try:
+        updated_user = user_crud.update_user_region(db=db, user_id=user_id, region=region_data.region)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="Unknown region, see /api/regions")
     if updated_user is None: raise HTTPException(status_code=404, detail="User not found")
     return updated_user
 
 @api_router.get("/users/{user_id}/announcements", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Users"])
-def read_user_announcements(user_id: int, db: Session = Depends(get_db)):
-    announcements = announcement_crud.get_announcements_by_owner_id(db=db, owner_id=user_id)
-    return announcements
+def read_user_announcements(
+    user_id: int,
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Объявления пользователя, сначала новые.
+
+    Следующая страница - по заголовку X-Next-Cursor, как в ленте.
+    Общее число объявлений - в /api/users/{user_id}/stats.
+    """
+    try:
+        announcements = announcement_crud.get_announcements_by_owner_id(db=db, owner_id=user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    next_cursor = announcement_crud.get_next_cursor(announcements, limit)
+    headers = {NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    return serialization.announcements_response(announcements, headers=headers)
+
+
+# --- Справочник регионов ---
+@api_router.get("/regions", response_model=List[region_schema.RegionDisplay], tags=["Regions"])
+def list_regions(db: Session = Depends(get_read_db)):
+    """Все регионы по алфавиту - для выбора региона в профиле. Отдается из памяти."""
+    # Справочник перечитывается не чаще раза в regions.REFRESH_INTERVAL секунд
+    region_crud.refresh_region_lookup(db)
+    return [{"id": region_id, "name": name} for region_id, name in region_lookup.all()]
+
+
+# --- Счетчики объявлений ---
+@api_router.get("/stats/regions", response_model=List[stats_schema.RegionStats], tags=["Stats"])
+def region_stats(region: Optional[str] = None, db: Session = Depends(get_read_db)):
+    """Число объявлений по регионам ("N объявлений в вашем регионе"). С region - только этот регион."""
+    region_id = None
+    if region:
+        region_id = region_lookup.id_of(region)
+        if region_id is None:
+            raise HTTPException(status_code=404, detail="Region not found")
+    return region_crud.get_region_stats(db, region_id=region_id)
+
+@api_router.get("/users/{user_id}/stats", response_model=stats_schema.UserStats, tags=["Users"])
+def user_stats(user_id: int, db: Session = Depends(get_read_db)):
+    """Число объявлений пользователя - из счетчика в строке пользователя."""
+    db_user = user_crud.get_user(db, user_id=user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"user_id": db_user.id, "announcement_count": db_user.announcement_count}
 
 
 # --- Эндпоинты для цен ---
-@api_router.get("/prices/{region}", tags=["Prices"])
-def get_prices_for_region(region: str):
-    # В будущем эти данные будут браться из базы данных или парсера
-    mock_prices = [
-        {"crop_name": "Пшеница 3 кл.", "price": 12500, "trend": "up"},
-        {"crop_name": "Подсолнечник", "price": 28100, "trend": "down"},
-    ]
-    return mock_prices
+@api_router.get("/prices/{region}", response_model=List[price_schema.PriceDisplay], tags=["Prices"])
+def get_prices_for_region(region: str, db: Session = Depends(get_read_db)):
+    """Последние цены по культурам региона и их тренд.
+
+    Данные загружаются командой commands/import_prices.py.
+    """
+    return price_crud.get_prices_for_region(db, region=region)
 
 
 # --- Эндпоинты для работы с объявлениями ---
 @api_router.post("/announcements/", response_model=announcement_schema.AnnouncementDisplay, tags=["Announcements"])
-def create_new_announcement(
+async def create_new_announcement(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     description: Optional[str] = Form(None),
     price: Optional[float] = Form(None),
     current_user_id: int = Form(...),
+    latitude: Optional[float] = Form(None, ge=-90, le=90),
+    longitude: Optional[float] = Form(None, ge=-180, le=180),
     db: Session = Depends(get_db),
     image: Optional[UploadFile] = File(None) 
 ):
-    db_user = user_crud.get_user(db, user_id=current_user_id)
+    # Эндпоинт асинхронный ради потоковой записи картинки на диск,
+    # а синхронные вызовы БД уходят в пул потоков.
+    db_user = await run_in_threadpool(user_crud.get_user, db, user_id=current_user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="Author (user) not found")
 
-    image_url_to_save = None
-    if image:
-        # Генерируем уникальное имя файла и путь один раз
-        unique_filename = f"{uuid.uuid4()}_{image.filename}"
-        file_path = os.path.join(UPLOADS_DIR, unique_filename)
-        
-        # Сохраняем файл на диск
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-            
-        # Формируем URL для записи в базу данных
-        image_url_to_save = f"/uploads/{unique_filename}"
-        
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(status_code=422, detail="latitude and longitude must be given together")
     announcement_data = announcement_schema.AnnouncementCreate(
-        title=title, description=description, price=price
+        title=title, description=description, price=price, latitude=latitude, longitude=longitude
     )
-    
-    return announcement_crud.create_announcement(
+
+    image_url_to_save = None
+    if image:
+        image_url_to_save = await save_upload(image)
+
+    # Миниатюра и очищенный от EXIF вариант готовятся уже после ответа:
+    # воркером очереди (worker.sh; задача ставится в транзакции объявления)
+    # или, без очереди, в этом же процессе
+    queue_image = bool(image_url_to_save) and settings.JOBS_ENABLED
+    db_announcement = await run_in_threadpool(
+        announcement_crud.create_announcement,
         db=db,
         announcement=announcement_data,
         owner=db_user,
-        image_url=image_url_to_save
+        image_url=image_url_to_save,
+        enqueue_image=queue_image,
     )
 
+    if image_url_to_save and not queue_image:
+        import images
+        background_tasks.add_task(images.process_announcement_image, db_announcement.id, image_url_to_save)
+    return db_announcement
+
+@api_router.post("/announcements/bulk", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Announcements"])
+def create_announcements_bulk(
+    current_user_id: int,
+    announcements: List[announcement_schema.AnnouncementCreate] = Body(
+        ..., min_length=1, max_length=announcement_schema.MAX_BULK_ANNOUNCEMENTS
+    ),
+    db: Session = Depends(get_db)
+):
+    """Пакетное создание объявлений (импорт от кооперативов): JSON-массив, одна транзакция."""
+    db_user = user_crud.get_user(db, user_id=current_user_id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="Author (user) not found")
+    return announcement_crud.create_announcements_bulk(db, announcements=announcements, owner=db_user)
+
+@api_router.get("/announcements", response_model=List[announcement_schema.AnnouncementDisplay], include_in_schema=False)
 @api_router.get("/announcements/", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Announcements"])
-def read_announcements(skip: int = 0, limit: int = 100, region: Optional[str] = None, db: Session = Depends(get_db)):
-    announcements = announcement_crud.get_announcements(db, skip=skip, limit=limit, region=region)
+def read_announcements(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    region: Optional[str] = None,
+    cursor: Optional[str] = None,
+    ids: Optional[str] = Query(None, description="ID через запятую (1,2,3): вернуть только эти объявления"),
+    db: Session = Depends(get_feed_read_db)
+):
+    """Лента объявлений, сначала новые.
+
+    Для глубокой прокрутки используйте курсор: значение заголовка X-Next-Cursor
+    из ответа передается в параметр cursor следующего запроса. Старые клиенты
+    могут по-прежнему пользоваться skip/limit.
+    """
+    if ids is not None:
+        # Обновление сохраненного списка одним запросом вместо N запросов к /announcements/{id}
+        try:
+            id_list = parse_id_list(ids)
+        except ValueError:
+            raise HTTPException(status_code=422, detail=f"ids must be 1 to {MAX_BATCH_IDS} comma-separated integers")
+        announcements = announcement_crud.get_announcements_by_ids(db, ids=id_list)
+        return feed_response(request, announcements, None)
+
+    if region:
+        # Одна запись кэша на регион, как бы клиент ни написал его название
+        region = region_lookup.canonical(region)
+
+    # Почти все пользователи региона запрашивают одну и ту же первую страницу -
+    # отдаем ее из кэша уже сериализованной
+    cache_key = feed_cache.key(region, cursor, skip, limit)
+    page = feed_cache.get(cache_key)
+    if page is not None:
+        return page.to_response(request)
+    try:
+        announcements = announcement_crud.get_announcements(db, skip=skip, limit=limit, region=region, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return feed_response(request, announcements, announcement_crud.get_next_cursor(announcements, limit), cache_key)
+
+# Подписка на новые объявления региона вместо опроса ленты в цикле.
+# Сообщение - объявление в формате AnnouncementDisplay.
+@api_router.get("/announcements/stream", tags=["Announcements"])
+async def stream_announcements(region: str = Query(..., min_length=1)):
+    """Server-Sent Events (EventSource): событие "announcement" на каждое новое объявление региона."""
+    import feed_events
+    return StreamingResponse(
+        feed_events.sse_events(region),
+        media_type="text/event-stream",
+        # X-Accel-Buffering: nginx не должен копить поток в буфере
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.websocket("/announcements/ws")
+async def announcements_websocket(websocket: WebSocket, region: str = Query(..., min_length=1)):
+    """То же, что /announcements/stream, но через WebSocket: одно объявление - одно текстовое сообщение."""
+    import feed_events
+    await websocket.accept()
+    await feed_events.serve_websocket(websocket, region)
+
+@api_router.get("/announcements/nearby", response_model=List[announcement_schema.AnnouncementNearby], tags=["Announcements"])
+def nearby_announcements(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=geo.MAX_RADIUS_KM),
+    limit: int = Query(50, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Объявления в радиусе radius_km от точки, сначала ближайшие - в том числе из соседних регионов.
+
+    Учитываются только объявления, у которых указаны координаты.
+    """
+    return announcement_crud.get_nearby_announcements(db, lat=lat, lon=lon, radius_km=radius_km, limit=limit)
+
+@api_router.get("/announcements/search", response_model=List[announcement_schema.AnnouncementDisplay], tags=["Announcements"])
+def search_announcements(
+    response: Response,
+    q: str = Query(..., min_length=2, max_length=200),
+    region: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Поиск по заголовку и описанию ("пшеница", "трактор мтз"), сначала самые релевантные.
+
+    Следующая страница запрашивается так же, как в ленте: по курсору из X-Next-Cursor.
+    """
+    try:
+        announcements, next_cursor = announcement_crud.search_announcements(db, q=q, limit=limit, region=region, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return announcements
 
-@api_router.get("/announcements/{announcement_id}", response_model=announcement_schema.AnnouncementDisplay, tags=["Announcements"])
-def read_announcement_details(announcement_id: int, db: Session = Depends(get_db)):
+announcement_details_flight = SingleFlight("announcement_details")
+
+@api_router.get("/announcements/{announcement_id:int}", response_model=announcement_schema.AnnouncementDisplay, tags=["Announcements"])
+def read_announcement_details(announcement_id: int, request: Request, db: Session = Depends(get_read_db)):
+    """Одно объявление.
+
+    Одновременные запросы одного и того же объявления (ссылка из большого чата)
+    делят один запрос к БД, см. singleflight.py.
+    """
+    # Движок в ключе: чтения с реплики и с основной базы не склеиваются
+    db_announcement = announcement_details_flight.do(
+        (announcement_id, db.get_bind()),
+        lambda: announcement_crud.get_announcement_by_id(db, announcement_id=announcement_id),
+    )
+    if db_announcement is None:
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    # Строка уже загружена вместе с автором: ETag и сериализация - без запросов к БД
+    return announcement_response(request, db_announcement)
+
+
+@api_router.patch("/announcements/{announcement_id:int}", response_model=announcement_schema.AnnouncementDisplay, tags=["Announcements"])
+def update_announcement_endpoint(
+    announcement_id: int,
+    current_user_id: int,
+    changes: announcement_schema.AnnouncementUpdate,
+    db: Session = Depends(get_db)
+):
+    """Изменение своего объявления: меняются только переданные поля."""
     db_announcement = announcement_crud.get_announcement_by_id(db, announcement_id=announcement_id)
     if db_announcement is None:
         raise HTTPException(status_code=404, detail="Announcement not found")
-    return db_announcement
+    if db_announcement.owner_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Only the author can change the announcement")
+    return announcement_crud.update_announcement(db, db_announcement, changes.model_dump(exclude_unset=True))
+
+@api_router.delete("/announcements/{announcement_id:int}", status_code=204, tags=["Announcements"])
+def delete_announcement_endpoint(announcement_id: int, current_user_id: int, db: Session = Depends(get_db)):
+    """Удаление своего объявления: из ленты оно пропадает сразу, строка и картинка уходят в архив позже."""
+    db_announcement = announcement_crud.get_announcement_by_id(db, announcement_id=announcement_id)
+    if db_announcement is None:
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    if db_announcement.owner_id != current_user_id:
+        raise HTTPException(status_code=403, detail="Only the author can delete the announcement")
+    if not announcement_crud.delete_announcement(db, announcement_id=announcement_id):
+        raise HTTPException(status_code=404, detail="Announcement not found")
+    return Response(status_code=204)
+
+
+# --- Служебные эндпоинты вне /api ---
+def prometheus_metrics():
+    """Метрики в формате Prometheus."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+def read_root(request: Request):
+    """Корневой эндпоинт для проверки, что сам сайт работает."""
+    return {"message": f"API для фермеров, версия {request.app.version}"}
 
 
 # =================================================================
-# ===          ПОДКЛЮЧЕНИЕ РОУТЕРОВ И ЗАПУСК ПРИЛОЖЕНИЯ         ===
+# ===          СБОРКА ПРИЛОЖЕНИЯ И ПОДКЛЮЧЕНИЕ РОУТЕРОВ         ===
 # =================================================================
 
-# Подключаем роутер с префиксом /api
-app.include_router(api_router)
+def create_app() -> FastAPI:
+    """Собирает приложение. Запуск: uvicorn main:create_app --factory.
+
+    Импорт модуля ничего не подключает и не создает: движки БД появляются при
+    первом запросе к базе (см. database.py), а асинхронный роутер
+    импортируется, только если он включен.
+    """
+    app = FastAPI(
+        title="Farmer's App API",
+        description="API для приложения фермерского сообщества",
+        version="2.1.0-prefixed-storage",
+        default_response_class=serialization.response_class,
+    )
+
+    # --- Настройка CORS ---
+    # Для продакшена лучше указать конкретные домены фронтенда
+    origins = ["*"]
+
+    # Middleware, добавленные до CORS, оказываются внутри него: их ответы 413 и 429
+    # получают заголовки CORS, и браузер дает фронтенду их прочитать.
+
+    # --- Ограничение размера тела запроса (картинка + поля формы) ---
+    app.add_middleware(RequestSizeLimitMiddleware, max_body_size=settings.UPLOAD_MAX_BYTES + FORM_OVERHEAD_BYTES)
+
+    # --- Ограничение частоты запросов (до чтения тела) ---
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(ratelimit.RateLimitMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Курсор следующей страницы отдаем в заголовке - его нужно явно открыть для браузера.
+        # Retry-After - через сколько секунд повторить запрос после 429 (ratelimit.py)
+        expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Retry-After"],
+    )
+
+    # --- Метрики запросов (подключается последним, чтобы измерять весь стек) ---
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    app.add_event_handler("startup", load_regions)
+    # Без воркера очереди истекшие объявления архивирует сам процесс API (см. archival.py)
+    if not settings.JOBS_ENABLED:
+        import archival
+        app.add_event_handler("startup", archival.start_in_background)
+        app.add_event_handler("shutdown", archival.stop_background)
+    app.add_event_handler("shutdown", shutdown_background)
+
+    # --- Создаем папку для загрузок ---
+    os.makedirs(UPLOADS_DIR, exist_ok=True)
+
+    # --- "Примонтируем" папку uploads для раздачи картинок ---
+    # Любой запрос на /uploads/some_file.jpg будет искать файл в папке uploads на сервере.
+    # Имена файлов уникальны и содержимое по ним не меняется, поэтому кэшируем "навсегда".
+    app.mount("/uploads", ImmutableStaticFiles(directory=UPLOADS_DIR), name="uploads")
+
+    # В асинхронном режиме асинхронные эндпоинты подключаются первыми и перекрывают
+    # одноименные синхронные. Синхронный роутер остается для всего, что еще не портировано.
+    if settings.DB_ASYNC:
+        from api_async import async_api_router
+        app.include_router(async_api_router)
+
+    # Подключаем роутер с префиксом /api
+    app.include_router(api_router)
 
-# Корневой эндпоинт для проверки, что сам сайт работает
-@app.get("/")
-def read_root():
-    return {"message": f"API для фермеров, версия {app.version}"}
+    app.add_api_route("/metrics", prometheus_metrics, include_in_schema=False)
+    app.add_api_route("/", read_root)
+    return app
 
 # Блок для прямого запуска (удобно для локальной отладки)
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="127.0.0.1", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run("main:create_app", factory=True, host="127.0.0.1", port=8000, reload=True)
@@ -0,0 +1,213 @@
+# metrics.py
+# Метрики приложения в формате Prometheus без внешних зависимостей.
+#
+# MetricsMiddleware измеряет длительность каждого запроса по шаблону маршрута
+# (/api/announcements/{announcement_id}, а не конкретный id - иначе число рядов
+# неограниченно), а хуки движков из database.py складывают в текущий запрос
+# число SQL-запросов и время в БД. Все это отдается эндпоинтом /metrics.
+#
+# Наблюдение стоит один bisect и инкремент под коротким локом, поэтому
+# метрики можно держать включенными в продакшене.
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Секунды: от 5 мс до 10 с
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Время отдельного SQL-запроса: от 0.5 мс
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+# Число SQL-запросов на один HTTP-запрос
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labelvalues, value in items:
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labelvalues -> [счетчики по корзинам (+Inf последней), сумма, количество]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labelvalues) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, (list(s[0]), s[1], s[2])) for labels, s in self._series.items()]
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labelvalues, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labelvalues)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labelvalues)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        # Функции, которые в момент выгрузки возвращают готовые значения для данных,
+        # уже посчитанных в другом месте (пул соединений, кэш ленты):
+        # список (имя, описание, [({метка: значение}, число), ...])
+        self._gauge_collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_gauge_collector(self, collector: Callable) -> None:
+        self._gauge_collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._gauge_collectors:
+            for name, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} gauge")
+                for labels, value in samples:
+                    lines.append(f"{name}{_labels(tuple(labels), tuple(labels.values()))} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")))
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")))
+http_request_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per HTTP request", ("method", "route"), COUNT_BUCKETS))
+http_request_db_duration = registry.register(Histogram(
+    "http_request_db_duration_seconds", "Time spent in the database per HTTP request", ("method", "route")))
+db_query_duration = registry.register(Histogram(
+    "db_query_duration_seconds", "Duration of individual SQL statements", (), QUERY_BUCKETS))
+db_slow_queries = registry.register(Counter(
+    "db_slow_queries_total", "SQL statements slower than SLOW_QUERY_MS"))
+
+
+class RequestStats:
+    """Счетчики БД текущего HTTP-запроса. Хуки движков меняют объект на месте,
+    поэтому данные видны и из потоков пула, куда FastAPI копирует контекст."""
+    __slots__ = ("queries", "db_time")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+
+def record_query(elapsed: float) -> None:
+    """Вызывается хуками движков после каждого SQL-запроса."""
+    db_query_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    if scope.get("path", "").startswith("/uploads/"):
+        return "/uploads"
+    # Несуществующие адреса в одну корзину, чтобы сканеры не плодили ряды
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Латентность, статус и нагрузка на БД по каждому маршруту."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        started = time.perf_counter()
+        finished = None
+
+        async def tracking_send(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = time.perf_counter()
+
+        try:
+            await self.app(scope, receive, tracking_send)
+        finally:
+            # Время до отправки ответа: фоновые задачи после него в латентность не входят
+            elapsed = (finished or time.perf_counter()) - started
+            current_request.reset(token)
+            method, route = scope["method"], _route_label(scope)
+            http_requests.inc(method, route, str(status))
+            http_request_duration.observe(elapsed, method, route)
+            http_request_db_queries.observe(stats.queries, method, route)
+            http_request_db_duration.observe(stats.db_time, method, route)
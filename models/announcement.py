@@ -1,7 +1,22 @@
 # models/announcement.py
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, func
-from sqlalchemy.orm import relationship
+import datetime
+from sqlalchemy import BigInteger, Column, Computed, Integer, SmallInteger, String, Float, ForeignKey, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
+from config import settings
 from database import Base
+from regions import region_lookup
+
+# Статусы объявления: active - показывается; deleted - удалено автором;
+# expired - истек срок (expires_at). Неактивные объявления фоновая задача
+# переносит в announcements_archive (см. archival.py).
+ACTIVE = 'active'
+DELETED = 'deleted'
+EXPIRED = 'expired'
+
+# Условие частичных индексов: в них попадают только живые строки, поэтому
+# удаленные и истекшие объявления не раздувают индексы ленты
+ACTIVE_ONLY = text("status = 'active'")
 
 class Announcement(Base):
     __tablename__ = 'announcements'
@@ -10,9 +25,15 @@ class Announcement(Base):
     title = Column(String, index=True, nullable=False)
     description = Column(String, nullable=True)
     price = Column(Float, nullable=True)
-    region = Column(String, index=True, nullable=True)
+    region_id = Column(SmallInteger, ForeignKey('regions.id'), nullable=True)
     image_url = Column(String, nullable=True)
-    owner_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    image_thumb_url = Column(String, nullable=True) # Миниатюра, появляется после фоновой обработки
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    # Геохеш точки (geo.encode) для поиска поблизости; COLLATE "C", чтобы
+    # префикс ячейки был диапазоном B-tree индекса
+    geohash = Column(String(12, collation="C"), nullable=True)
+    owner_id = Column(BigInteger, ForeignKey('users.id'), nullable=False)
     
     # Эта строка создает связь с моделью User.
     # SQLAlchemy будет понимать, что owner_id - это ссылка на пользователя.
@@ -21,5 +42,50 @@ class Announcement(Base):
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    status = Column(String, nullable=False, server_default=ACTIVE)
+    # Срок показа считается по часам БД, как и created_at
+    expires_at = Column(
+        DateTime,
+        nullable=False,
+        default=func.now() + datetime.timedelta(days=settings.ANNOUNCEMENT_TTL_DAYS),
+    )
+
+    # Поисковый вектор по заголовку (вес A) и описанию (вес B) с русской морфологией.
+    # Вычисляется самим Postgres; в обычных выборках не загружается.
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+    ))
+
+    # Индексы под ленту "сначала новые": по региону и общую.
+    # Порядок колонок совпадает с ORDER BY в crud.announcement.get_announcements,
+    # поэтому keyset-пагинация читает ровно одну страницу индекса.
+    # Индексы выборок для пользователей частичные (только status = 'active').
+    __table_args__ = (
+        Index('ix_announcements_region_id_created_at_id', 'region_id', created_at.desc(), id.desc(), postgresql_where=ACTIVE_ONLY),
+        Index('ix_announcements_created_at_id', created_at.desc(), id.desc(), postgresql_where=ACTIVE_ONLY),
+        Index('ix_announcements_owner_id_created_at_id', 'owner_id', created_at.desc(), id.desc(), postgresql_where=ACTIVE_ONLY),
+        Index('ix_announcements_search_vector', 'search_vector', postgresql_using='gin', postgresql_where=ACTIVE_ONLY),
+        Index('ix_announcements_geohash', 'geohash', postgresql_where=ACTIVE_ONLY),
+        # Для архивирования: истекающие активные и уже неактивные строки
+        Index('ix_announcements_active_expires_at', 'expires_at', postgresql_where=ACTIVE_ONLY),
+        Index('ix_announcements_inactive_id', 'id', postgresql_where=text("status <> 'active'")),
+        # Файлы картинок общие для одинаковых фото: перед удалением файла проверяем, нужен ли он еще
+        Index('ix_announcements_image_url', 'image_url', postgresql_where=text("image_url IS NOT NULL")),
+    )
+
+    # Название региона для API - из справочника в памяти, без JOIN
+    @property
+    def region(self):
+        return region_lookup.name_of(self.region_id)
+
+    @region.setter
+    def region(self, name):
+        self.region_id = region_lookup.id_of(name)
+
     def __repr__(self):
         return f"<Announcement(id={self.id}, title='{self.title}')>"
\ No newline at end of file
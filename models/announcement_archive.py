@@ -0,0 +1,26 @@
+# models/announcement_archive.py
+from sqlalchemy import BigInteger, Column, Integer, SmallInteger, String, Float, DateTime, func
+from database import Base
+
+# Удаленные и истекшие объявления, перенесенные из announcements (см. archival.py).
+# Таблица только пополняется, API ее не читает - индексов, кроме первичного
+# ключа, нет. Картинки архивных объявлений с диска удалены.
+class AnnouncementArchive(Base):
+    __tablename__ = 'announcements_archive'
+
+    id = Column(Integer, primary_key=True)  # тот же ID, что был в announcements
+    title = Column(String, nullable=False)
+    description = Column(String, nullable=True)
+    price = Column(Float, nullable=True)
+    region_id = Column(SmallInteger, nullable=True)
+    owner_id = Column(BigInteger, nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    status = Column(String, nullable=False)  # deleted или expired
+    created_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<AnnouncementArchive(id={self.id}, status='{self.status}')>"
@@ -0,0 +1,29 @@
+# models/job.py
+from sqlalchemy import Column, BigInteger, Integer, String, Text, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
+from database import Base
+
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    id = Column(BigInteger, primary_key=True)
+    kind = Column(String, nullable=False)           # имя обработчика, см. jobs.handler
+    payload = Column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))  # аргументы обработчика
+    # pending - ждет выполнения, running - взята воркером, failed - попытки кончились.
+    # Выполненные задачи удаляются, чтобы таблица оставалась маленькой.
+    status = Column(String, nullable=False, server_default='pending')
+    attempts = Column(Integer, nullable=False, server_default='0')
+    max_attempts = Column(Integer, nullable=False, server_default='5')
+    run_at = Column(DateTime, nullable=False, server_default=func.now())  # не раньше этого времени
+    locked_at = Column(DateTime, nullable=True)     # когда воркер взял задачу
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now())
+
+    # Частичные индексы: воркер ищет только готовые к запуску и брошенные задачи
+    __table_args__ = (
+        Index('ix_jobs_pending_run_at', 'run_at', postgresql_where=text("status = 'pending'")),
+        Index('ix_jobs_running_locked_at', 'locked_at', postgresql_where=text("status = 'running'")),
+    )
+
+    def __repr__(self):
+        return f"<Job(id={self.id}, kind='{self.kind}', status='{self.status}')>"
@@ -0,0 +1,37 @@
+# models/price.py
+from sqlalchemy import Column, BigInteger, String, Float, DateTime, Index, table, column
+from database import Base
+
+class Price(Base):
+    __tablename__ = 'prices'
+
+    id = Column(BigInteger, primary_key=True)
+    crop = Column(String, nullable=False)          # Культура, например "Пшеница 3 кл."
+    region = Column(String, nullable=False)        # Регион, к которому относится цена
+    price = Column(Float, nullable=False)          # Цена, руб/т
+    observed_at = Column(DateTime, nullable=False) # Когда цена была зафиксирована
+
+    # История по региону и культуре читается от новых наблюдений к старым
+    __table_args__ = (
+        Index('ix_prices_region_crop_observed_at', 'region', 'crop', observed_at.desc()),
+    )
+
+    def __repr__(self):
+        return f"<Price(crop='{self.crop}', region='{self.region}', price={self.price})>"
+
+
+# Материализованное представление с последней ценой и трендом по каждой паре
+# (регион, культура). Создается миграцией и обновляется после загрузки цен
+# (commands/import_prices.py), поэтому эндпоинт читает по строке на культуру,
+# сколько бы миллионов наблюдений ни накопилось в prices.
+# Объявлено как легковесная таблица вне Base.metadata, чтобы autogenerate
+# не пытался создать его как обычную таблицу.
+price_trends = table(
+    'price_trends',
+    column('region', String),
+    column('crop', String),
+    column('price', Float),
+    column('previous_price', Float),
+    column('trend', String),
+    column('observed_at', DateTime),
+)
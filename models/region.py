@@ -0,0 +1,15 @@
+# models/region.py
+from sqlalchemy import Column, Integer, SmallInteger, String
+from database import Base
+
+class Region(Base):
+    __tablename__ = 'regions'
+
+    # Регионов меньше сотни - SMALLINT хватает, а внешние ключи и индексы остаются компактными
+    id = Column(SmallInteger, primary_key=True)
+    name = Column(String, nullable=False, unique=True)
+    # Число активных объявлений региона; поддерживается в crud.announcement и archival.py
+    announcement_count = Column(Integer, nullable=False, server_default="0")
+
+    def __repr__(self):
+        return f"<Region(id={self.id}, name='{self.name}')>"
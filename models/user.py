@@ -1,6 +1,7 @@
 # models/user.py
-from sqlalchemy import Column, BigInteger, String, DateTime, func
+from sqlalchemy import Column, BigInteger, Integer, SmallInteger, String, DateTime, ForeignKey, func
 from database import Base # Импортируем нашу базовую модель
+from regions import region_lookup
 
 class User(Base):
     __tablename__ = 'users' # Название таблицы в базе данных
@@ -10,10 +11,20 @@ class User(Base):
     username = Column(String, nullable=True, unique=True) # Имя пользователя (@username)
     first_name = Column(String, nullable=False) # Имя
     last_name = Column(String, nullable=True) # Фамилия
-    region = Column(String, nullable=True) # Регион, который укажет пользователь
+    region_id = Column(SmallInteger, ForeignKey('regions.id'), nullable=True) # Регион, который укажет пользователь
+    announcement_count = Column(Integer, nullable=False, server_default="0") # Число активных объявлений, см. crud.announcement
     
     created_at = Column(DateTime, server_default=func.now()) # Дата создания записи
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now()) # Дата обновления
 
+    # Название региона для API - из справочника в памяти, без JOIN
+    @property
+    def region(self):
+        return region_lookup.name_of(self.region_id)
+
+    @region.setter
+    def region(self, name):
+        self.region_id = region_lookup.id_of(name)
+
     def __repr__(self):
         return f"<User(id={self.id}, username='{self.username}')>"
\ No newline at end of file
@@ -0,0 +1,63 @@
+# pagination.py
+import base64
+import datetime
+from typing import List, Tuple
+
+# Курсор - это непрозрачная для клиента строка, в которой закодирована позиция
+# последней отданной записи: (created_at, id) для ленты или (rank, id) для поиска.
+# Следующая страница начинается строго "после" этой пары, поэтому стоимость
+# любой страницы равна стоимости первой.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _pack(key: str, item_id: int) -> str:
+    raw = f"{key}|{item_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _unpack(cursor: str) -> Tuple[str, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    key, item_id = raw.split("|", 1)
+    return key, int(item_id)
+
+
+def encode_cursor(created_at: datetime.datetime, item_id: int) -> str:
+    """Упаковывает позицию записи в курсор."""
+    return _pack(created_at.isoformat(), item_id)
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, int]:
+    """Распаковывает курсор. При неверном формате выбрасывает ValueError."""
+    try:
+        created_at, item_id = _unpack(cursor)
+        return datetime.datetime.fromisoformat(created_at), item_id
+    except (UnicodeError, ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_rank_cursor(rank: float, item_id: int) -> str:
+    """Курсор для выдачи, отсортированной по релевантности."""
+    return _pack(repr(float(rank)), item_id)
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    """Распаковывает курсор поиска. При неверном формате выбрасывает ValueError."""
+    try:
+        rank, item_id = _unpack(cursor)
+        return float(rank), item_id
+    except (UnicodeError, ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+# Сколько объявлений можно запросить одним ?ids=1,2,3
+MAX_BATCH_IDS = 100
+
+
+def parse_id_list(value: str, max_items: int = MAX_BATCH_IDS) -> List[int]:
+    """Разбирает "1,2,3" в [1, 2, 3] без повторов. При неверном формате выбрасывает ValueError."""
+    ids = list(dict.fromkeys(int(part) for part in value.split(",") if part.strip()))
+    if not ids or len(ids) > max_items:
+        raise ValueError(f"Expected 1 to {max_items} ids")
+    return ids
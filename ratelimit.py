@@ -0,0 +1,161 @@
+# ratelimit.py
+# Ограничение частоты запросов к дорогим эндпоинтам (token bucket).
+#
+# У каждого клиента своя "корзина" на BURST жетонов, которая пополняется со
+# скоростью PER_MINUTE жетонов в минуту; запрос тратит один жетон. Пустая
+# корзина - ответ 429 с Retry-After. Так обычный пользователь может отправить
+# несколько запросов подряд, а зациклившийся клиент упирается в ровный поток.
+#
+# Проверка идет в ASGI-middleware (RateLimitMiddleware) до чтения тела запроса:
+# отклоненный клиент не стоит разбора многомегабайтной формы с картинкой.
+# Клиент - это IP-адрес: ID пользователя (заголовок X-User-Id, current_user_id)
+# клиент выбирает сам, и ключ по нему обходился бы новым ID в каждом запросе.
+# За прокси хостинга адрес клиента берется из X-Forwarded-For: uvicorn
+# запускается с --proxy-headers и --forwarded-allow-ips (см. run.sh), иначе все
+# пользователи попали бы в одну корзину - адрес прокси.
+#
+# Корзины хранятся в памяти процесса: при нескольких воркерах uvicorn (или
+# нескольких репликах API) лимит действует на каждый процесс отдельно, то есть
+# фактически умножается на их число. run.sh запускает один процесс, поэтому
+# лимиты включены по умолчанию; с несколькими процессами RATE_LIMIT_* стоит
+# уменьшить или заменить RateLimitBackend общим хранилищем (как CacheBackend в cache.py).
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+import metrics
+from config import settings
+
+rate_limit_rejected = metrics.registry.register(metrics.Counter(
+    "rate_limit_rejected_total", "Requests rejected with 429 by a rate limit", labelnames=("limit",)))
+
+
+class RateLimitBackend:
+    """Интерфейс хранилища корзин."""
+
+    def take(self, key: str, per_second: float, burst: int) -> float:
+        """Списывает жетон. Возвращает 0, если запрос разрешен, иначе сколько секунд ждать жетона."""
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Корзины в памяти процесса с ограничением их числа (LRU). Потокобезопасен.
+
+    Вытесненная корзина просто начинается заново полной - для лимита это
+    безопасно: вытесняются те, кто давно не приходил.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, per_second, burst):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / per_second
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def stats(self):
+        return {"keys": len(self._buckets), "max_keys": self.max_keys}
+
+
+rate_limit_backend = MemoryRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+
+def client_key(scope) -> str:
+    """Ключ корзины: ip:<адрес клиента>. За прокси адрес уже подставлен uvicorn из X-Forwarded-For."""
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimit:
+    """Лимит одного вида запросов: PER_MINUTE жетонов в минуту и BURST подряд."""
+
+    def __init__(self, name: str, per_minute: float, burst: int, backend: RateLimitBackend = rate_limit_backend):
+        self.name = name
+        self.per_second = per_minute / 60
+        self.burst = burst
+        self.backend = backend
+
+    def take(self, key: str) -> float:
+        """0 - запрос разрешен, иначе через сколько секунд появится жетон."""
+        if self.per_second <= 0:
+            return 0.0
+        return self.backend.take(f"{self.name}:{key}", self.per_second, self.burst)
+
+
+# Создание объявлений (форма с картинкой и пакетный импорт) - один общий лимит
+create_announcement_limit = RateLimit(
+    "create_announcement",
+    settings.RATE_LIMIT_CREATE_PER_MINUTE,
+    settings.RATE_LIMIT_CREATE_BURST,
+)
+# Вход мини-приложения: POST /api/users/get_or_create
+get_or_create_user_limit = RateLimit(
+    "get_or_create_user",
+    settings.RATE_LIMIT_USERS_PER_MINUTE,
+    settings.RATE_LIMIT_USERS_BURST,
+)
+
+# (метод, путь без завершающего "/") -> лимит
+LIMITS: Dict[Tuple[str, str], RateLimit] = {
+    ("POST", "/api/announcements"): create_announcement_limit,
+    ("POST", "/api/announcements/bulk"): create_announcement_limit,
+    ("POST", "/api/users/get_or_create"): get_or_create_user_limit,
+}
+
+
+class RateLimitMiddleware:
+    """Отвечает 429 с Retry-After на запросы сверх лимита, не дожидаясь тела."""
+
+    def __init__(self, app, limits: Dict[Tuple[str, str], RateLimit] = LIMITS):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            limit = self.limits.get((scope["method"], scope["path"].rstrip("/")))
+            wait = limit.take(client_key(scope)) if limit is not None else 0.0
+            if wait > 0:
+                rate_limit_rejected.inc(limit.name)
+                await self._reject(send, math.ceil(wait))
+                return
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, retry_after: int):
+        body = b'{"detail":"Too many requests"}'
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(retry_after).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def _collect_rate_limit_metrics():
+    stats = rate_limit_backend.stats()
+    return [("rate_limit_keys", "Clients with a rate limit bucket in this process", [({}, stats["keys"])])]
+
+metrics.registry.add_gauge_collector(_collect_rate_limit_metrics)
@@ -0,0 +1,67 @@
+# regions.py
+# Справочник регионов в памяти процесса.
+#
+# В БД регион хранится как маленький целый ключ (regions.id, SMALLINT): фильтр
+# ленты сравнивает числа, а индексы не хранят название в каждой строке. Наружу
+# API по-прежнему отдает и принимает названия - перевод идет через этот
+# справочник без запросов к БД. Он загружается при старте приложения
+# (crud.region.load_region_lookup). Регион, добавленный позже (миграцией или
+# python -m commands.regions add), подхватывается без перезапуска: промах по
+# названию и список /api/regions перечитывают справочник, но не чаще раза
+# в REFRESH_INTERVAL секунд.
+#
+# Названия сравниваются без учета регистра и лишних пробелов, поэтому
+# "ростовская  область" и "Ростовская область" - один и тот же регион.
+
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Как часто промахи по названию могут перечитывать справочник из БД.
+# Ограничение нужно, чтобы поток опечаток не превращался в поток запросов.
+REFRESH_INTERVAL = 30.0
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class RegionLookup:
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._ids: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+
+    def load(self, rows: Iterable[Tuple[int, str]]) -> None:
+        """Заменяет содержимое справочника парами (id, название)."""
+        names = dict(rows)
+        # Словари подменяются целиком: читатели в других потоках не видят половину
+        self._ids = {normalize(name): region_id for region_id, name in names.items()}
+        self._names = names
+        self._loaded_at = time.monotonic()
+
+    def needs_refresh(self, name: Optional[str] = None) -> bool:
+        """Справочник давно не перечитывался, а название (если передано) в нем не найдено."""
+        if name is not None and (not name or self.id_of(name) is not None):
+            return False
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= REFRESH_INTERVAL
+
+    def id_of(self, name: Optional[str]) -> Optional[int]:
+        if not name:
+            return None
+        return self._ids.get(normalize(name))
+
+    def name_of(self, region_id: Optional[int]) -> Optional[str]:
+        if region_id is None:
+            return None
+        return self._names.get(region_id)
+
+    def canonical(self, name: str) -> str:
+        """Название в том написании, что хранится в справочнике (или как есть, если не найдено)."""
+        return self.name_of(self.id_of(name)) or name
+
+    def all(self) -> List[Tuple[int, str]]:
+        """Все регионы по алфавиту."""
+        return sorted(self._names.items(), key=lambda item: item[1])
+
+
+region_lookup = RegionLookup()
@@ -1,3 +1,5 @@
 #!/usr/bin/env bash
-alembic upgrade head
-uvicorn main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
+python -m commands.migrate
+# Адрес клиента - из X-Forwarded-For прокси хостинга (на него опирается ratelimit.py).
+# "*" допустимо, пока приложение доступно только через прокси; иначе задайте адрес прокси.
+uvicorn main:create_app --factory --host 0.0.0.0 --port $PORT --proxy-headers --forwarded-allow-ips "${FORWARDED_ALLOW_IPS:-*}"
\ No newline at end of file
@@ -1,5 +1,5 @@
 # schemas/announcement.py
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 from typing import Optional
 import datetime
 
@@ -11,7 +11,37 @@ class AnnouncementCreate(BaseModel):
     title: str = Field(..., min_length=3, max_length=100)
     description: Optional[str] = Field(None, max_length=500)
     price: Optional[float] = Field(None, gt=0, description="Цена должна быть больше нуля")
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    @model_validator(mode="after")
+    def check_coordinates(self):
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
     
+# --- Схема для изменения объявления (PATCH): меняются только переданные поля ---
+class AnnouncementUpdate(BaseModel):
+    title: Optional[str] = Field(None, min_length=3, max_length=100)
+    description: Optional[str] = Field(None, max_length=500)
+    price: Optional[float] = Field(None, gt=0, description="Цена должна быть больше нуля")
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    @model_validator(mode="after")
+    def check_fields(self):
+        if "title" in self.model_fields_set and self.title is None:
+            raise ValueError("title cannot be null")
+        # Точку можно убрать (обе координаты null), но не наполовину
+        if ("latitude" in self.model_fields_set) != ("longitude" in self.model_fields_set):
+            raise ValueError("latitude and longitude must be given together")
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be given together")
+        return self
+
+# Сколько объявлений можно создать одним запросом POST /api/announcements/bulk
+MAX_BULK_ANNOUNCEMENTS = 500
+
 # --- Схема для отображения объявления ---
 class AnnouncementDisplay(BaseModel):
     id: int
@@ -20,9 +50,17 @@ class AnnouncementDisplay(BaseModel):
     price: Optional[float] = None
     region: Optional[str] = None
     image_url: Optional[str] = None
+    image_thumb_url: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime.datetime
+    expires_at: Optional[datetime.datetime] = None
     
     # Здесь мы будем отображать полную информацию об авторе
     owner: UserDisplay 
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# --- Объявление в выдаче "поблизости" ---
+class AnnouncementNearby(AnnouncementDisplay):
+    distance_km: float
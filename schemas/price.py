@@ -0,0 +1,11 @@
+# schemas/price.py
+from pydantic import BaseModel, Field
+from typing import Literal
+import datetime
+
+# --- Схема для отображения цены ---
+class PriceDisplay(BaseModel):
+    crop_name: str = Field(..., description="Культура")
+    price: float = Field(..., description="Последняя зафиксированная цена")
+    trend: Literal["up", "down", "flat"] = Field(..., description="Изменение относительно предыдущего наблюдения")
+    observed_at: datetime.datetime
@@ -0,0 +1,7 @@
+# schemas/region.py
+from pydantic import BaseModel
+
+# --- Схема для отображения региона ---
+class RegionDisplay(BaseModel):
+    id: int
+    name: str
@@ -0,0 +1,12 @@
+# schemas/stats.py
+from pydantic import BaseModel
+
+# --- Счетчики объявлений ---
+class RegionStats(BaseModel):
+    id: int
+    name: str
+    announcement_count: int
+
+class UserStats(BaseModel):
+    user_id: int
+    announcement_count: int
@@ -0,0 +1,85 @@
+# singleflight.py
+# Склейка одинаковых одновременных чтений (single-flight).
+#
+# Ссылку на объявление из большого чата открывают сотни людей за секунды, и
+# каждый запрос GET /announcements/{id} шел в Postgres отдельно. Здесь первый
+# запрос по ключу выполняет загрузку, а запросы с тем же ключом, пришедшие до
+# ее окончания, ждут и получают тот же результат (или ту же ошибку).
+# Ничего не кэшируется: после завершения загрузки следующий запрос снова идет
+# в базу, поэтому устаревших данных склейка не добавляет.
+#
+# Результат отдается всем ожидающим, поэтому загрузчик должен возвращать данные,
+# которые читаются без обращения к сессии БД: FeedPage или строку ORM,
+# загруженную целиком (со связями через joinedload), которую никто не меняет.
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+import metrics
+
+singleflight_calls = metrics.registry.register(metrics.Counter(
+    "singleflight_calls_total", "Reads that went to the database through single-flight", labelnames=("name",)))
+singleflight_coalesced = metrics.registry.register(metrics.Counter(
+    "singleflight_coalesced_total", "Reads served by joining an identical in-flight read", labelnames=("name",)))
+
+
+class SingleFlight:
+    """Для синхронных эндпоинтов: ожидающие запросы блокируют свои потоки пула."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+
+        if not leader:
+            singleflight_coalesced.inc(self.name)
+            return call.result()
+
+        singleflight_calls.inc(self.name)
+        try:
+            result = load()
+        except BaseException as exc:
+            call.set_exception(exc)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class AsyncSingleFlight:
+    """Для асинхронных эндпоинтов. Загрузка идет отдельной задачей: если клиент,
+    начавший ее, отключится, остальные ожидающие все равно получат результат."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            singleflight_calls.inc(self.name)
+            task = asyncio.ensure_future(load())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            singleflight_coalesced.inc(self.name)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Ошибку уже получили ожидающие; без этого asyncio ругается, если их не осталось
+            task.exception()
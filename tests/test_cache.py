@@ -0,0 +1,107 @@
+# tests/test_cache.py
+# Кэш страниц ленты (cache.py): инвалидация поколениями, вытеснение по LRU и
+# истечение по TTL в MemoryCacheBackend. База не нужна.
+
+import pytest
+
+import cache
+from cache import FeedCache, FeedPage, MemoryCacheBackend
+
+
+class Clock:
+    """Подменяет time.monotonic в cache.py, чтобы TTL проверялся без ожидания."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def _page(n: int) -> FeedPage:
+    return FeedPage(items=[{"id": n}], etag=f'W/"{n}"', next_cursor=None)
+
+
+def test_stale_generation_is_a_miss(clock):
+    feed = FeedCache(MemoryCacheBackend(max_entries=10), ttl=60)
+    key = feed.key("Ростовская область", None, 0, 20)
+    feed.set(key, _page(1))
+    assert feed.get(key) == _page(1)
+
+    feed.invalidate_region("Ростовская область")
+
+    fresh_key = feed.key("Ростовская область", None, 0, 20)
+    assert fresh_key != key
+    assert feed.get(fresh_key) is None
+
+
+def test_invalidate_region_also_resets_the_unfiltered_feed(clock):
+    feed = FeedCache(MemoryCacheBackend(max_entries=10), ttl=60)
+    all_key = feed.key(None, None, 0, 20)
+    other_key = feed.key("Москва", None, 0, 20)
+    feed.set(all_key, _page(1))
+    feed.set(other_key, _page(2))
+
+    feed.invalidate_region("Ростовская область")
+
+    assert feed.key(None, None, 0, 20) != all_key
+    # Лента другого региона не сбрасывается
+    assert feed.key("Москва", None, 0, 20) == other_key
+    assert feed.get(other_key) == _page(2)
+
+
+def test_key_depends_on_page_position(clock):
+    feed = FeedCache(MemoryCacheBackend(max_entries=10), ttl=60)
+    keys = {
+        feed.key(None, None, 0, 20),
+        feed.key(None, "cursor", 0, 20),
+        feed.key(None, None, 20, 20),
+        feed.key(None, None, 0, 50),
+    }
+    assert len(keys) == 4
+
+
+def test_oldest_entry_is_evicted(clock):
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    backend.set("b", 2, ttl=60)
+    # Чтение делает "a" свежей, поэтому вытесняется "b"
+    assert backend.get("a") == 1
+    backend.set("c", 3, ttl=60)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+    assert backend.stats()["entries"] == 2
+    assert backend.stats()["evictions"] == 1
+
+
+def test_expired_entry_is_a_miss(clock):
+    backend = MemoryCacheBackend(max_entries=10)
+    backend.set("a", 1, ttl=30)
+
+    clock.now += 29
+    assert backend.get("a") == 1
+
+    clock.now += 2
+    assert backend.get("a") is None
+    stats = backend.stats()
+    assert stats["entries"] == 0
+    assert stats["expirations"] == 1
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_set_refreshes_ttl(clock):
+    backend = MemoryCacheBackend(max_entries=10)
+    backend.set("a", 1, ttl=30)
+    clock.now += 20
+    backend.set("a", 2, ttl=30)
+    clock.now += 20
+    assert backend.get("a") == 2
@@ -0,0 +1,68 @@
+# tests/test_geo.py
+# Покрытие круга ячейками геохеша (geo.cover): любая точка в пределах радиуса
+# должна попасть в одну из ячеек покрытия, иначе поиск поблизости ее потеряет.
+# Отдельно проверяются круги через антимеридиан (Чукотка) и у полюсов, где
+# долготы сходятся. База не нужна.
+
+import math
+
+import pytest
+
+import geo
+
+BEARINGS = range(0, 360, 15)
+FRACTIONS = (0.0, 0.25, 0.5, 0.75, 0.99)
+
+
+def destination(lat: float, lon: float, bearing: float, distance_km: float):
+    """Точка на расстоянии distance_km от (lat, lon) по азимуту bearing (по большому кругу)."""
+    phi1, lam1, theta = math.radians(lat), math.radians(lon), math.radians(bearing)
+    delta = distance_km / geo.EARTH_RADIUS_KM
+    phi2 = math.asin(math.sin(phi1) * math.cos(delta) + math.cos(phi1) * math.sin(delta) * math.cos(theta))
+    lam2 = lam1 + math.atan2(
+        math.sin(theta) * math.sin(delta) * math.cos(phi1),
+        math.cos(delta) - math.sin(phi1) * math.sin(phi2),
+    )
+    return math.degrees(phi2), (math.degrees(lam2) + 180.0) % 360.0 - 180.0
+
+
+@pytest.mark.parametrize("lat, lon, radius_km", [
+    (55.7558, 37.6173, 10.0),      # Москва
+    (47.2357, 39.7015, 50.0),      # Ростов-на-Дону
+    (55.0, 37.0, geo.MAX_RADIUS_KM),
+    (0.0, 0.0, 5.0),               # пересечение экватора и нулевого меридиана
+    (64.7, 179.95, 30.0),          # Чукотка, круг через антимеридиан
+    (65.0, -179.9, 100.0),         # то же с западной стороны
+    (89.95, 10.0, 20.0),           # у Северного полюса
+    (-89.9, -45.0, 50.0),          # у Южного полюса
+    (43.1, 131.9, 0.05),           # маленький радиус - мелкие ячейки
+])
+def test_cover_contains_every_point_within_radius(lat, lon, radius_km):
+    prefixes = geo.cover(lat, lon, radius_km)
+    assert 0 < len(prefixes) <= max(geo.MAX_COVER_CELLS, len(geo._BASE32))
+    for bearing in BEARINGS:
+        for fraction in FRACTIONS:
+            point = destination(lat, lon, bearing, radius_km * fraction)
+            geohash = geo.encode(*point)
+            assert any(geohash.startswith(prefix) for prefix in prefixes), (point, geohash, prefixes)
+
+
+def test_cover_respects_max_cells():
+    for max_cells in (1, 4, 9):
+        assert len(geo.cover(55.7558, 37.6173, 25.0, max_cells=max_cells)) <= max_cells
+
+
+def test_cover_across_antimeridian_takes_both_sides():
+    prefixes = geo.cover(64.7, 179.95, 30.0)
+    east, west = geo.encode(64.7, 179.99, 1), geo.encode(64.7, -179.99, 1)
+    assert east != west
+    assert any(prefix.startswith(east) for prefix in prefixes)
+    assert any(prefix.startswith(west) for prefix in prefixes)
+
+
+def test_prefix_range_contains_exactly_the_prefix():
+    start, end = geo.prefix_range("ucfv")
+    assert start <= "ucfv" < end
+    assert start <= "ucfvzzzzz" < end
+    assert not start <= "ucfw" < end
+    assert not start <= "ucfu" < end
@@ -0,0 +1,78 @@
+# tests/test_http_cache.py
+# Условные GET (http_cache.py): сравнение If-None-Match с ETag и то, что ETag
+# меняется вместе с объявлением и его автором. База не нужна: объявления и
+# авторы заменены простыми объектами с id и updated_at.
+
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import Request
+
+from http_cache import _matches, announcements_etag, not_modified_response
+
+ETAG = 'W/"0123abcd"'
+T0 = datetime.datetime(2026, 10, 17, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+def _announcement(announcement_id=1, updated_at=T0, owner_updated_at=T0):
+    owner = SimpleNamespace(id=100, updated_at=owner_updated_at)
+    return SimpleNamespace(id=announcement_id, updated_at=updated_at, owner=owner)
+
+
+@pytest.mark.parametrize("if_none_match, expected", [
+    (ETAG, True),
+    ('"0123abcd"', True),                         # сильный тег совпадает со слабым
+    ("*", True),
+    (" * ", True),
+    ('W/"other", W/"0123abcd"', True),            # список тегов
+    ('"other",W/"0123abcd" ,"third"', True),
+    ('W/"other", "third"', False),
+    ('W/"0123abcde"', False),
+    ("", False),
+    (None, False),
+])
+def test_matches(if_none_match, expected):
+    assert _matches(if_none_match, ETAG) is expected
+
+
+def test_matches_strong_etag():
+    assert _matches('W/"0123abcd"', '"0123abcd"')
+    assert not _matches('W/"x"', '"0123abcd"')
+
+
+def test_etag_is_stable():
+    assert announcements_etag([_announcement()]) == announcements_etag([_announcement()])
+    assert announcements_etag([_announcement()]).startswith('W/"')
+
+
+@pytest.mark.parametrize("changed", [
+    _announcement(announcement_id=2),
+    _announcement(updated_at=T0 + datetime.timedelta(seconds=1)),
+    _announcement(owner_updated_at=T0 + datetime.timedelta(seconds=1)),  # автор сменил имя
+    _announcement(updated_at=None),
+])
+def test_etag_changes_with_announcement_or_owner(changed):
+    assert announcements_etag([changed]) != announcements_etag([_announcement()])
+
+
+def test_etag_depends_on_order_and_count():
+    first, second = _announcement(1), _announcement(2)
+    assert announcements_etag([first, second]) != announcements_etag([second, first])
+    assert announcements_etag([first]) != announcements_etag([first, second])
+
+
+def _request(if_none_match=None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode("latin-1"))] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+def test_not_modified_response():
+    response = not_modified_response(_request(ETAG), ETAG)
+    assert response.status_code == 304
+    assert response.headers["etag"] == ETAG
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.body == b""
+
+    assert not_modified_response(_request('W/"other"'), ETAG) is None
+    assert not_modified_response(_request(), ETAG) is None
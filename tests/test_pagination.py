@@ -0,0 +1,89 @@
+# tests/test_pagination.py
+# Курсоры страниц (pagination.py): курсор, выданный сервером, разбирается в ту же
+# позицию, а любой испорченный или подделанный - в ValueError (эндпоинты отвечают
+# на него 400 "Invalid cursor"). База не нужна.
+
+import base64
+import datetime
+
+import pytest
+
+import pagination
+
+
+def _raw(text: str) -> str:
+    """Курсор с произвольным содержимым - так его мог бы собрать клиент."""
+    return base64.urlsafe_b64encode(text.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime.datetime(2026, 10, 17, 18, 52, 27, 640318, tzinfo=datetime.timezone.utc),
+    datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=3))),
+    datetime.datetime(2026, 1, 1, 12, 0),
+])
+@pytest.mark.parametrize("item_id", [1, 2**31 + 7])
+def test_cursor_round_trip(created_at, item_id):
+    cursor = pagination.encode_cursor(created_at, item_id)
+    assert "=" not in cursor and "|" not in cursor
+    assert pagination.decode_cursor(cursor) == (created_at, item_id)
+
+
+@pytest.mark.parametrize("rank", [0.0, 0.1, 1 / 3, 12.5])
+def test_rank_cursor_round_trip(rank):
+    cursor = pagination.encode_rank_cursor(rank, 42)
+    assert pagination.decode_rank_cursor(cursor) == (rank, 42)
+
+
+INVALID_CURSORS = [
+    "",                                      # пустая строка
+    "!!!",                                   # не base64
+    "курсор",                                # не ASCII
+    base64.urlsafe_b64encode(b"\xff\xfe|1").decode("ascii"),  # не UTF-8
+    _raw("2026-10-17T18:52:27"),             # нет id
+    _raw("2026-10-17T18:52:27|abc"),         # id не число
+    _raw("yesterday|1"),                     # не дата
+    _raw("2026-13-45T00:00:00|1"),           # несуществующая дата
+    None,                                    # не строка
+    123,
+]
+
+
+@pytest.mark.parametrize("cursor", INVALID_CURSORS)
+def test_invalid_cursor_is_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        pagination.decode_cursor(cursor)
+
+
+@pytest.mark.parametrize("cursor", INVALID_CURSORS[:6] + [_raw("nan-ish|1"), None])
+def test_invalid_rank_cursor_is_value_error(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        pagination.decode_rank_cursor(cursor)
+
+
+def test_feed_cursor_is_not_a_rank_cursor():
+    # Курсор ленты, подставленный в поиск (и наоборот), не должен разбираться
+    feed = pagination.encode_cursor(datetime.datetime(2026, 10, 17), 5)
+    with pytest.raises(ValueError):
+        pagination.decode_rank_cursor(feed)
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(pagination.encode_rank_cursor(0.5, 5))
+
+
+def test_tampered_cursor_is_value_error():
+    cursor = pagination.encode_cursor(datetime.datetime(2026, 10, 17), 5)
+    with pytest.raises(ValueError):
+        pagination.decode_cursor(cursor[:-3] + "***")
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1,2,3", [1, 2, 3]),
+    ("3, 1,3,,2", [3, 1, 2]),
+])
+def test_parse_id_list(value, expected):
+    assert pagination.parse_id_list(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", ",", "1,a", ",".join(map(str, range(pagination.MAX_BATCH_IDS + 1)))])
+def test_parse_id_list_rejects_bad_input(value):
+    with pytest.raises(ValueError):
+        pagination.parse_id_list(value)
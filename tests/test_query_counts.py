@@ -0,0 +1,104 @@
+# tests/test_query_counts.py
+# Число SQL-запросов на чтение объявлений. Лента, одно объявление и объявления
+# пользователя должны загружаться вместе с авторами одним запросом (JOIN), а не
+# отдельным SELECT на каждого автора (N+1) - см. _with_owner в crud/announcement.py.
+#
+# Нужна база из настроек .env со схемой (alembic upgrade head); без нее тесты
+# пропускаются. Запуск из корня проекта:
+#     python -m pytest tests
+
+import contextlib
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from cache import feed_cache
+from database import SessionLocal, get_engine
+from main import create_app
+from models.announcement import Announcement
+from models.user import User
+
+# Авторов больше одного: при N+1 число запросов росло бы вместе с ними
+AUTHORS = 3
+PER_AUTHOR = 2
+
+
+@contextlib.contextmanager
+def count_statements():
+    """Собирает SQL всех синхронных движков (основного и реплики) внутри блока."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+
+
+@pytest.fixture(scope="module")
+def authors():
+    try:
+        with get_engine().connect():
+            pass
+    except OperationalError as exc:
+        pytest.skip(f"database is not available: {exc}")
+
+    # Большие ID, как у Telegram, в диапазоне, который не пересекается с bench/seed.py
+    base = random.randrange(8_000_000_000, 8_900_000_000)
+    user_ids = [base + n for n in range(AUTHORS)]
+    with SessionLocal() as db:
+        db.add_all(User(id=user_id, first_name=f"Test {n}") for n, user_id in enumerate(user_ids))
+        db.flush()
+        db.add_all(
+            Announcement(title=f"Query count {user_id}/{n}", price=100, owner_id=user_id)
+            for user_id in user_ids
+            for n in range(PER_AUTHOR)
+        )
+        db.commit()
+    try:
+        yield user_ids
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(Announcement).where(Announcement.owner_id.in_(user_ids)))
+            db.execute(delete(User).where(User.id.in_(user_ids)))
+            db.commit()
+
+
+@pytest.fixture(scope="module")
+def client():
+    # Без with: события startup (справочник регионов, архивирование) тестам не нужны
+    return TestClient(create_app())
+
+
+def test_feed_is_one_query(client, authors):
+    feed_cache.invalidate_region(None)
+    with count_statements() as statements:
+        response = client.get("/api/announcements/", params={"limit": AUTHORS * PER_AUTHOR})
+    assert response.status_code == 200
+    assert all(item["owner"] for item in response.json())
+    assert len(statements) == 1, statements
+
+
+def test_announcement_details_is_one_query(client, authors):
+    with SessionLocal() as db:
+        announcement_id = db.scalar(select(Announcement.id).where(Announcement.owner_id == authors[0]).limit(1))
+    with count_statements() as statements:
+        response = client.get(f"/api/announcements/{announcement_id}")
+    assert response.status_code == 200
+    assert response.json()["owner"]["id"] == authors[0]
+    assert len(statements) == 1, statements
+
+
+def test_user_announcements_is_one_query(client, authors):
+    with count_statements() as statements:
+        response = client.get(f"/api/users/{authors[1]}/announcements")
+    assert response.status_code == 200
+    assert len(response.json()) == PER_AUTHOR
+    assert len(statements) == 1, statements
@@ -0,0 +1,114 @@
+# tests/test_ratelimit.py
+# Ограничение частоты (ratelimit.py): корзина пропускает BURST запросов подряд,
+# дальше пополняется со скоростью PER_MINUTE, а middleware отвечает 429 с
+# Retry-After до того, как запрос дойдет до приложения. База не нужна.
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import ratelimit
+from ratelimit import MemoryRateLimitBackend, RateLimit, RateLimitMiddleware
+
+
+class Clock:
+    """Подменяет time.monotonic в ratelimit.py, чтобы пополнение проверялось без ожидания."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_burst_then_reject(clock):
+    limit = RateLimit("test", per_minute=60, burst=3, backend=MemoryRateLimitBackend(100))
+    assert [limit.take("ip:1") for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Жетон в секунду: до следующего ровно секунда
+    assert limit.take("ip:1") == pytest.approx(1.0)
+    # У другого клиента своя корзина
+    assert limit.take("ip:2") == 0.0
+
+
+def test_refill(clock):
+    limit = RateLimit("test", per_minute=30, burst=2, backend=MemoryRateLimitBackend(100))
+    limit.take("ip:1")
+    limit.take("ip:1")
+    assert limit.take("ip:1") == pytest.approx(2.0)
+
+    clock.now += 2
+    assert limit.take("ip:1") == 0.0
+    assert limit.take("ip:1") > 0
+
+    # Долгая пауза не копит жетонов больше BURST
+    clock.now += 3600
+    assert [limit.take("ip:1") for _ in range(2)] == [0.0, 0.0]
+    assert limit.take("ip:1") > 0
+
+
+def test_zero_rate_is_unlimited(clock):
+    limit = RateLimit("test", per_minute=0, burst=1, backend=MemoryRateLimitBackend(100))
+    assert all(limit.take("ip:1") == 0.0 for _ in range(100))
+
+
+def test_evicted_bucket_starts_full(clock):
+    backend = MemoryRateLimitBackend(max_keys=1)
+    limit = RateLimit("test", per_minute=60, burst=1, backend=backend)
+    limit.take("ip:1")
+    limit.take("ip:2")
+    assert backend.stats()["keys"] == 1
+    assert limit.take("ip:1") == 0.0
+
+
+def test_client_key_ignores_client_chosen_ids():
+    scope = {
+        "headers": [(b"x-user-id", b"42")],
+        "query_string": b"current_user_id=42",
+        "client": ("203.0.113.7", 50000),
+    }
+    assert ratelimit.client_key(scope) == "ip:203.0.113.7"
+    assert ratelimit.client_key({"headers": [], "client": None}) == "ip:unknown"
+
+
+@pytest.fixture
+def client(clock):
+    app = FastAPI()
+
+    @app.post("/api/announcements")
+    def create():
+        return {"ok": True}
+
+    @app.get("/api/announcements")
+    def feed():
+        return []
+
+    limit = RateLimit("test_create", per_minute=6, burst=2, backend=MemoryRateLimitBackend(100))
+    app.add_middleware(RateLimitMiddleware, limits={("POST", "/api/announcements"): limit})
+    return TestClient(app)
+
+
+def test_middleware_answers_429_with_retry_after(client):
+    assert client.post("/api/announcements").status_code == 200
+    # Путь с "/" на конце тратит ту же корзину
+    assert client.post("/api/announcements/", follow_redirects=False).status_code == 307
+    response = client.post("/api/announcements")
+    assert response.status_code == 429
+    # 6 в минуту - жетон раз в 10 секунд
+    assert response.headers["retry-after"] == "10"
+    assert response.json() == {"detail": "Too many requests"}
+    # Пути и методы без лимита не затронуты
+    assert client.get("/api/announcements").status_code == 200
+
+
+def test_middleware_counts_rejections(client):
+    before = ratelimit.rate_limit_rejected.value("test_create")
+    for _ in range(4):
+        client.post("/api/announcements")
+    assert ratelimit.rate_limit_rejected.value("test_create") == before + 2
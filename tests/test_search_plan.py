@@ -0,0 +1,34 @@
+# tests/test_search_plan.py
+# Полнотекстовый поиск должен уметь использовать GIN-индекс ix_announcements_search_vector.
+# Условие запроса и предикат частичного индекса (status = 'active') должны совпадать
+# с индексом буквально; иначе поиск незаметно уходит в Seq Scan по всей таблице.
+#
+# На маленькой тестовой базе планировщик честно выбрал бы Seq Scan, поэтому он
+# здесь запрещен (enable_seqscan = off): индекс в плане значит, что он применим.
+# Выбор плана на реальном объеме проверяет python -m bench.explain --check.
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from bench.explain import explain
+from crud import announcement as announcement_crud
+from database import get_engine
+
+
+@pytest.fixture
+def conn():
+    try:
+        connection = get_engine().connect()
+    except OperationalError as exc:
+        pytest.skip(f"database is not available: {exc}")
+    with connection:
+        connection.execute(text("SET LOCAL enable_seqscan = off"))
+        yield connection
+        connection.rollback()
+
+
+@pytest.mark.parametrize("term", ["пшеница", '"пшеница 3 кл" -ячмень'])
+def test_search_can_use_gin_index(conn, term):
+    plan = explain(conn, announcement_crud.select_search(term, limit=20), analyze=False)
+    assert "ix_announcements_search_vector" in plan, plan
@@ -0,0 +1,145 @@
+# tests/test_singleflight.py
+# Склейка одинаковых чтений (singleflight.py): одновременные вызовы с одним
+# ключом выполняют загрузку один раз и получают ее результат или ее ошибку.
+# База не нужна.
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight, singleflight_coalesced
+
+FOLLOWERS = 5
+
+
+def _wait_for_followers(name: str, before: float):
+    """Ждет, пока все остальные вызовы присоединятся к уже идущей загрузке."""
+    deadline = time.monotonic() + 5
+    while singleflight_coalesced.value(name) < before + FOLLOWERS:
+        assert time.monotonic() < deadline, "followers did not join"
+        time.sleep(0.001)
+
+
+def _run_concurrently(flight: SingleFlight, load):
+    """Лидер и FOLLOWERS ожидающих с одним ключом. Возвращает их Future."""
+    with ThreadPoolExecutor(max_workers=FOLLOWERS + 1) as pool:
+        leader = pool.submit(flight.do, "key", load)
+        followers = [pool.submit(flight.do, "key", load) for _ in range(FOLLOWERS)]
+        return [leader, *followers]
+
+
+def test_concurrent_callers_share_one_load():
+    flight = SingleFlight("test_shared")
+    before = singleflight_coalesced.value(flight.name)
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        return {"id": 1}
+
+    def releaser():
+        _wait_for_followers(flight.name, before)
+        release.set()
+
+    threading.Thread(target=releaser).start()
+    results = [future.result(5) for future in _run_concurrently(flight, load)]
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_leader_error_is_shared():
+    flight = SingleFlight("test_error")
+    before = singleflight_coalesced.value(flight.name)
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        release.wait(5)
+        raise LookupError("boom")
+
+    def releaser():
+        _wait_for_followers(flight.name, before)
+        release.set()
+
+    threading.Thread(target=releaser).start()
+    futures = _run_concurrently(flight, load)
+
+    assert len(calls) == 1
+    for future in futures:
+        with pytest.raises(LookupError, match="boom"):
+            future.result(5)
+
+
+def test_nothing_is_cached_after_the_load():
+    flight = SingleFlight("test_sequential")
+    values = iter([1, 2])
+    assert flight.do("key", lambda: next(values)) == 1
+    assert flight.do("key", lambda: next(values)) == 2
+
+    with pytest.raises(ValueError):
+        flight.do("key", lambda: int("x"))
+    # Ошибка не залипает под ключом
+    assert flight.do("key", lambda: 3) == 3
+
+
+def test_async_callers_share_one_load():
+    flight = AsyncSingleFlight("test_async_shared")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", load) for _ in range(FOLLOWERS + 1)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_async_leader_error_is_shared():
+    flight = AsyncSingleFlight("test_async_error")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise LookupError("boom")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("key", load) for _ in range(FOLLOWERS + 1)), return_exceptions=True)
+        # Следующий вызов после ошибки снова идет в загрузку
+        with pytest.raises(LookupError):
+            await flight.do("key", load)
+        return results
+
+    results = asyncio.run(main())
+    assert len(calls) == 2
+    assert all(isinstance(result, LookupError) for result in results)
+
+
+def test_async_load_survives_a_cancelled_leader():
+    flight = AsyncSingleFlight("test_async_cancel")
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def main():
+        leader = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "done"
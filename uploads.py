@@ -0,0 +1,195 @@
+# uploads.py
+import hashlib
+import os
+import re
+import uuid
+from typing import Iterable, Optional
+import anyio
+from fastapi import HTTPException, UploadFile
+from fastapi.staticfiles import StaticFiles
+from config import settings
+from http_cache import IMMUTABLE
+
+# Папка, куда сохраняются загруженные картинки. Раздается по адресу /uploads.
+#
+# Файлы именуются по SHA-256 содержимого и раскладываются по вложенным папкам
+# по первым байтам хэша: uploads/ab/cd/abcd...ef.jpg. Так в одной папке не
+# скапливаются сотни тысяч файлов, а повторная загрузка той же фотографии
+# не создает вторую копию.
+UPLOADS_DIR = "uploads"
+
+# Недописанные файлы лежат здесь, пока не станет известен их хэш
+_INCOMING_DIR = os.path.join(UPLOADS_DIR, ".incoming")
+
+# Файл копируется на диск порциями, чтобы не держать его целиком в памяти
+CHUNK_SIZE = 256 * 1024
+
+# Запас сверх UPLOAD_MAX_BYTES на остальные поля формы и заголовки multipart
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Расширения, которые сохраняем как есть; остальные файлы хранятся без расширения
+_ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "gif", "heic", "heif"}
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def url_to_path(url: str) -> str:
+    """Переводит URL вида /uploads/<name> в путь к файлу на диске."""
+    return os.path.join(UPLOADS_DIR, url[len("/uploads/"):])
+
+
+def sanitize_filename(filename: Optional[str]) -> str:
+    """Очищает имя файла от клиента: без каталогов, только безопасные символы."""
+    name = (filename or "").replace("\\", "/").rsplit("/", 1)[-1]
+    name = _UNSAFE_CHARS.sub("_", name).strip("._")
+    return name[:100]
+
+
+def safe_extension(filename: Optional[str]) -> str:
+    """Расширение файла для хранилища ('.jpg') или пустая строка, если оно не из разрешенных."""
+    _, ext = os.path.splitext(sanitize_filename(filename))
+    ext = ext[1:].lower()
+    if ext == "jpeg":
+        ext = "jpg"
+    return f".{ext}" if ext in _ALLOWED_EXTENSIONS else ""
+
+
+def content_url(digest: str, suffix: str = "") -> str:
+    """URL файла в хранилище по его хэшу: /uploads/ab/cd/<digest><suffix>."""
+    return f"/uploads/{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+
+def _commit_file(tmp_path: str, digest: str, suffix: str) -> str:
+    """Переносит готовый файл на его место в хранилище. Дубликат просто удаляется."""
+    url = content_url(digest, suffix)
+    final_path = url_to_path(url)
+    if os.path.exists(final_path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(tmp_path, final_path)
+    return url
+
+
+def store_file(path: str) -> str:
+    """Копирует существующий файл в хранилище и возвращает его новый URL. Исходный файл остается.
+
+    Нужна для переноса старых загрузок (commands/migrate_uploads.py): исходный
+    файл удаляется только после того, как база перестала на него ссылаться.
+    """
+    os.makedirs(_INCOMING_DIR, exist_ok=True)
+    tmp_path = os.path.join(_INCOMING_DIR, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    try:
+        with open(path, "rb") as source, open(tmp_path, "wb") as target:
+            while chunk := source.read(CHUNK_SIZE):
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return _commit_file(tmp_path, digest.hexdigest(), safe_extension(path))
+
+
+def remove_files(urls: Iterable[str]) -> int:
+    """Удаляет файлы хранилища по их URL; уже удаленные пропускаются. Возвращает число удаленных."""
+    removed = 0
+    for url in urls:
+        if not url.startswith("/uploads/"):
+            continue
+        try:
+            os.remove(url_to_path(url))
+        except FileNotFoundError:
+            continue
+        removed += 1
+    return removed
+
+
+async def save_upload(image: UploadFile) -> str:
+    """Асинхронно сохраняет загруженный файл в хранилище и возвращает его URL для записи в базу.
+
+    Если файл больше settings.UPLOAD_MAX_BYTES, недописанный файл удаляется
+    и выбрасывается HTTPException 413.
+    """
+    os.makedirs(_INCOMING_DIR, exist_ok=True)
+    tmp_path = os.path.join(_INCOMING_DIR, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+
+    written = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as buffer:
+            while chunk := await image.read(CHUNK_SIZE):
+                written += len(chunk)
+                if written > settings.UPLOAD_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail="Image is too large")
+                digest.update(chunk)
+                await buffer.write(chunk)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return _commit_file(tmp_path, digest.hexdigest(), safe_extension(image.filename))
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Раздача /uploads с долгим кэшированием: содержимое файла по данному URL не меняется."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE
+        return response
+
+
+class RequestSizeLimitMiddleware:
+    """Отклоняет слишком большие тела запросов с 413 еще до разбора формы.
+
+    Starlette целиком вычитывает multipart-тело до вызова эндпоинта, поэтому
+    проверка внутри save_upload срабатывает слишком поздно: медленный клиент
+    уже успел передать все 20 МБ. Здесь запрос обрывается по Content-Length,
+    а для тел без него - как только прочитано больше лимита.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > self.max_body_size:
+                    await self._reject(send)
+                    return
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    # FastAPI пробрасывает HTTPException из разбора тела как есть
+                    raise HTTPException(status_code=413, detail="Request body is too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send):
+        body = b'{"detail":"Request body is too large"}'
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,26 @@
+# worker.py
+# Точка входа воркера фоновых задач (см. jobs.py).
+#
+# Запуск из корня проекта:
+#     ./worker.sh
+#     python worker.py --concurrency 8
+
+import argparse
+import asyncio
+import logging
+
+from config import settings
+import jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воркер очереди фоновых задач")
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_CONCURRENCY, help="задач одновременно")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    asyncio.run(jobs.run_worker(args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
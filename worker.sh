@@ -0,0 +1,2 @@
+#!/usr/bin/env bash
+python worker.py
\ No newline at end of file